@@ -30,7 +30,7 @@ setup(
     include_package_data=True,
     zip_safe=False,
     python_requires=">=2.7, !=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*, !=3.4.*, <4",
-    install_requires=["requests>=2.3"],
+    install_requires=["requests>=2.3", "futures>=3.0.0;python_version<'3'"],
     extras_require={
         "dev": [
             "flake8==3.8.3",
@@ -0,0 +1,139 @@
+"""
+Collects the alerts created since the last collection, remembering where it left off in a
+checkpoint file so that a restarted collector does not fetch the same alerts again.
+"""
+import io
+import json
+import os
+
+from py42._internal.compat import replace_file
+from py42._internal.compat import str
+from py42.exceptions import Py42Error
+from py42.sdk.queries.alerts.alert_query import AlertQuery
+from py42.sdk.queries.query_filter import create_on_or_after_filter_group
+
+
+class AlertCheckpoint(object):
+    """The ``createdAt`` time of the newest alert collected and the IDs of the collected alerts
+    created at that same time, kept in memory or in a JSON file if a path is given.
+    """
+
+    def __init__(self, path=None):
+        self._path = path
+        self._state = None
+
+    def load(self):
+        """Returns the `(created_at, alert_ids)` of the checkpoint, or `(None, set())` if
+        nothing was collected yet."""
+        if self._state is None:
+            self._state = self._read()
+        created_at, alert_ids = self._state
+        return created_at, set(alert_ids)
+
+    def save(self, created_at, alert_ids):
+        self._state = (created_at, sorted(alert_ids))
+        if self._path:
+            self._write()
+
+    def _read(self):
+        if not self._path or not os.path.isfile(self._path):
+            return None, []
+        with io.open(self._path, encoding=u"utf-8") as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+        return checkpoint[u"createdAt"], checkpoint[u"alertIds"]
+
+    def _write(self):
+        created_at, alert_ids = self._state
+        content = json.dumps({u"createdAt": created_at, u"alertIds": alert_ids})
+        # a crash while writing leaves the previous checkpoint in place
+        temp_path = self._path + u".tmp"
+        with io.open(temp_path, u"w", encoding=u"utf-8") as checkpoint_file:
+            checkpoint_file.write(str(content))
+        replace_file(temp_path, self._path)
+
+
+class AlertCollector(object):
+    """Yields the alerts matching a query that were created since the previous collection,
+    oldest first, optionally with their details. The checkpoint is saved after each batch of
+    alerts has been consumed, so alerts are only delivered again if the consumer stops in the
+    middle of a batch.
+    """
+
+    BATCH_SIZE = 500
+
+    def __init__(
+        self,
+        alert_client,
+        checkpoint_path=None,
+        query=None,
+        include_details=False,
+        max_workers=None,
+    ):
+        self._alert_client = alert_client
+        self._checkpoint = AlertCheckpoint(checkpoint_path)
+        self._query_dict = _get_query_dict(query or AlertQuery())
+        self._include_details = include_details
+        self._max_workers = max_workers
+
+    def collect(self):
+        """Yields the new alerts, or their details if the collector includes details."""
+        created_at, boundary_ids = self._checkpoint.load()
+        query = self._create_query(created_at)
+        alerts = self._alert_client.search_all(query, max_workers=self._max_workers)
+        batch = []
+        for alert in alerts:
+            # alerts created at the checkpoint's time may or may not have been collected
+            if alert[u"createdAt"] == created_at and alert[u"id"] in boundary_ids:
+                continue
+            batch.append(alert)
+            if len(batch) == self.BATCH_SIZE:
+                for item in self._deliver(batch):
+                    yield item
+                created_at, boundary_ids = self._save_checkpoint(
+                    batch, created_at, boundary_ids
+                )
+                batch = []
+        if batch:
+            for item in self._deliver(batch):
+                yield item
+            self._save_checkpoint(batch, created_at, boundary_ids)
+
+    def _create_query(self, created_at):
+        query_dict = dict(
+            self._query_dict, pgNum=0, srtKey=u"CreatedAt", srtDirection=u"asc"
+        )
+        if created_at is not None:
+            since = create_on_or_after_filter_group(u"createdAt", created_at)
+            query_dict[u"groups"] = query_dict[u"groups"] + [dict(since)]
+        return json.dumps(query_dict)
+
+    def _deliver(self, alerts):
+        if not self._include_details:
+            return alerts
+        alert_ids = [alert[u"id"] for alert in alerts]
+        response = self._alert_client.get_details(
+            alert_ids, max_workers=self._max_workers
+        )
+        details_by_id = {details[u"id"]: details for details in response[u"alerts"]}
+        # alerts deleted since they were found have no details
+        return [details_by_id[i] for i in alert_ids if i in details_by_id]
+
+    def _save_checkpoint(self, batch, created_at, boundary_ids):
+        newest_created_at = batch[-1][u"createdAt"]
+        if newest_created_at != created_at:
+            boundary_ids = set()
+        boundary_ids.update(
+            alert[u"id"] for alert in batch if alert[u"createdAt"] == newest_created_at
+        )
+        self._checkpoint.save(newest_created_at, boundary_ids)
+        return newest_created_at, boundary_ids
+
+
+def _get_query_dict(query):
+    query_dict = json.loads(str(query))
+    if len(query_dict[u"groups"]) > 1 and query_dict[u"groupClause"] != u"AND":
+        raise Py42Error(
+            u"Alerts can only be collected for queries whose filter groups are all required."
+        )
+    query_dict[u"groupClause"] = u"AND"
+    return query_dict
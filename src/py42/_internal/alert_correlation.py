@@ -0,0 +1,222 @@
+"""
+Finds the file events behind alerts by turning the observations in their details into file
+event searches.
+"""
+from collections import OrderedDict
+from datetime import datetime
+
+from requests.exceptions import RequestException
+
+from py42._internal.concurrency import iter_prefetched
+from py42._internal.concurrency import map_concurrently
+from py42._internal.concurrency import split_into_batches
+from py42.exceptions import Py42Error
+from py42.sdk.queries.fileevents.file_event_query import FileEventQuery
+from py42.sdk.queries.fileevents.filters.event_filter import EventTimestamp
+from py42.sdk.queries.query_filter import create_filter_group
+from py42.sdk.queries.query_filter import create_is_in_filter_group
+from py42.sdk.queries.query_filter import create_query_filter
+from py42.util import convert_datetime_to_epoch
+
+_FILE_EVENTS = u"fileEvents"
+_MILLISECOND = 0.001
+
+
+class AlertEventCorrelator(object):
+    """Yields the file events of alerts, one chunk of alerts at a time.
+
+    Observations that list the IDs of the events they saw are looked up by event ID, with the
+    IDs of all the alerts in a chunk searched together. Other observations are looked up by
+    their actor and activity period, and the periods of the same actor that overlap are
+    searched as one. The searches of a chunk run concurrently while the events of the previous
+    chunk are consumed.
+
+    A search that fails, or that finds more events than can be paged through, is reported
+    against each alert it was made for instead of stopping the others.
+    """
+
+    CHUNK_SIZE = 100
+
+    # the most event IDs searched for in one query
+    EVENT_IDS_PER_QUERY = 100
+
+    # the forensic search rejects requests for results past the first 10,000
+    MAX_RESULTS_PER_SEARCH = 10000
+
+    def __init__(self, alert_client, file_event_client, max_workers=None):
+        self._alert_client = alert_client
+        self._file_event_client = file_event_client
+        self._max_workers = max_workers
+
+    def correlate(self, alert_ids):
+        """Yields an `(alert_id, events, error)` tuple for each alert, in the order of
+        `alert_ids`, where `events` is a list of the file events found for the alert's
+        observations and `error` is None if all of them were found or a message saying why
+        some may be missing."""
+        alert_ids = list(OrderedDict.fromkeys(alert_ids))
+        chunks = split_into_batches(alert_ids, self.CHUNK_SIZE)
+        # the next chunk is fetched while the results of the current one are consumed
+        for results in iter_prefetched(self._correlate_chunk, chunks, max_workers=1):
+            for result in results:
+                yield result
+
+    def _correlate_chunk(self, alert_ids):
+        response = self._alert_client.get_details(
+            alert_ids, max_workers=self._max_workers
+        )
+        searches = _build_searches(response[u"alerts"], self.EVENT_IDS_PER_QUERY)
+        outcomes = map_concurrently(
+            self._run_search, searches, max_workers=self._max_workers
+        )
+        events_by_alert = OrderedDict((alert_id, {}) for alert_id in alert_ids)
+        errors = {}
+        for search, (events, error) in zip(searches, outcomes):
+            if error is not None:
+                for alert_id in search.alert_ids:
+                    errors.setdefault(alert_id, error)
+            for event in events:
+                for alert_id in search.get_alert_ids(event):
+                    events_by_alert[alert_id].setdefault(event.get(u"eventId"), event)
+        return [
+            (alert_id, list(events.values()), errors.get(alert_id))
+            for alert_id, events in events_by_alert.items()
+        ]
+
+    def _run_search(self, search):
+        try:
+            events, truncated = self._search_all(search.query)
+        except (Py42Error, RequestException) as err:
+            return [], u"{}".format(err)
+        if truncated:
+            return (
+                events,
+                u"Stopped after the first {} events of a search; more may "
+                u"exist.".format(len(events)),
+            )
+        return events, None
+
+    def _search_all(self, query):
+        # returns the events found and whether there were more than could be paged through
+        events = []
+        query.page_number = 1
+        while True:
+            response = self._file_event_client.search(query)
+            page = response[_FILE_EVENTS] or []
+            events.extend(page)
+            if len(page) < query.page_size:
+                return events, False
+            if (query.page_number + 1) * query.page_size > self.MAX_RESULTS_PER_SEARCH:
+                return events, True
+            query.page_number += 1
+
+
+class _EventIdSearch(object):
+    def __init__(self, alert_ids_by_event_id):
+        self._alert_ids_by_event_id = alert_ids_by_event_id
+        self.alert_ids = list(
+            OrderedDict.fromkeys(
+                alert_id
+                for alert_ids in alert_ids_by_event_id.values()
+                for alert_id in alert_ids
+            )
+        )
+        self.query = FileEventQuery.all(
+            create_is_in_filter_group(u"eventId", list(alert_ids_by_event_id))
+        )
+
+    def get_alert_ids(self, event):
+        return self._alert_ids_by_event_id.get(event.get(u"eventId"), [])
+
+
+class _ActivitySearch(object):
+    def __init__(self, actor, periods):
+        # `periods` are `(alert_id, start, end)` tuples
+        self._periods = periods
+        self.alert_ids = list(OrderedDict.fromkeys(period[0] for period in periods))
+        start = min(period[1] for period in periods)
+        end = max(period[2] for period in periods)
+        actor_group = create_filter_group(
+            [
+                create_query_filter(u"deviceUserName", u"IS", actor),
+                create_query_filter(u"actor", u"IS", actor),
+            ],
+            u"OR",
+        )
+        # the range is widened to whole milliseconds, the precision of the query
+        self.query = FileEventQuery.all(
+            actor_group,
+            EventTimestamp.in_range(start - _MILLISECOND, end + _MILLISECOND),
+        )
+
+    def get_alert_ids(self, event):
+        timestamp = _parse_timestamp(event.get(u"eventTimestamp"))
+        if timestamp is None:
+            return []
+        return [
+            alert_id
+            for alert_id, start, end in self._periods
+            if start <= timestamp <= end
+        ]
+
+
+def _build_searches(alerts, event_ids_per_query):
+    alert_ids_by_event_id = OrderedDict()
+    periods_by_actor = OrderedDict()
+    for alert in alerts:
+        for observation in alert.get(u"observations") or []:
+            data = observation.get(u"data") or {}
+            event_ids = [
+                item[u"eventId"]
+                for item in data.get(u"files") or []
+                if item.get(u"eventId")
+            ]
+            if event_ids:
+                for event_id in event_ids:
+                    alert_ids = alert_ids_by_event_id.setdefault(event_id, [])
+                    if alert[u"id"] not in alert_ids:
+                        alert_ids.append(alert[u"id"])
+                continue
+            start = _parse_timestamp(data.get(u"firstActivityAt"))
+            end = _parse_timestamp(data.get(u"lastActivityAt"))
+            actor = alert.get(u"actor")
+            if actor and start is not None and end is not None:
+                periods_by_actor.setdefault(actor, []).append((alert[u"id"], start, end))
+
+    searches = []
+    event_ids = list(alert_ids_by_event_id)
+    for batch in split_into_batches(event_ids, event_ids_per_query):
+        searches.append(
+            _EventIdSearch(
+                OrderedDict(
+                    (event_id, alert_ids_by_event_id[event_id]) for event_id in batch
+                )
+            )
+        )
+    for actor, periods in periods_by_actor.items():
+        for overlapping in _group_overlapping(periods):
+            searches.append(_ActivitySearch(actor, overlapping))
+    return searches
+
+
+def _group_overlapping(periods):
+    groups = []
+    group_end = None
+    for period in sorted(periods, key=lambda period: period[1]):
+        if groups and period[1] <= group_end:
+            groups[-1].append(period)
+            group_end = max(group_end, period[2])
+        else:
+            groups.append([period])
+            group_end = period[2]
+    return groups
+
+
+def _parse_timestamp(value):
+    # alert and file event timestamps look like 2020-02-19T01:57:45.0060000Z, with any
+    # number of fractional digits
+    if not value:
+        return None
+    value = value.rstrip(u"Z")
+    whole, _, fraction = value.partition(u".")
+    date = datetime.strptime(whole, u"%Y-%m-%dT%H:%M:%S")
+    return convert_datetime_to_epoch(date) + float(u"0.{}".format(fraction or 0))
@@ -0,0 +1,70 @@
+"""
+An in-memory index of alert rule metadata, so that looking up a rule does not need a request.
+"""
+import time
+from threading import Lock
+
+_RULE_METADATA = u"ruleMetadata"
+
+
+class AlertRuleIndex(object):
+    """Holds the metadata of every alert rule, keyed by rule ID, observer rule ID and name. All
+    the rules are loaded with `get_all_rules`, which returns an iterable of response pages,
+    the first time a lookup is made and again once `ttl_seconds` have passed since they were
+    last loaded or whenever :meth:`refresh` is called.
+    """
+
+    def __init__(self, get_all_rules, ttl_seconds):
+        self._get_all_rules = get_all_rules
+        self._ttl_seconds = ttl_seconds
+        self._expiration = 0
+        self._rules = []
+        self._by_id = {}
+        self._by_observer_id = {}
+        self._by_name = {}
+        self._lock = Lock()
+
+    def get_all(self):
+        """Returns a list of the metadata of all the rules."""
+        return list(self._get_lookups()[0])
+
+    def get_by_id(self, rule_id):
+        """Returns the metadata of the rule with the given ID, or None if there is none."""
+        return self._get_lookups()[1].get(rule_id)
+
+    def get_by_observer_id(self, observer_id):
+        """Returns the metadata of the rule with the given observer rule ID, or None if there is
+        none."""
+        return self._get_lookups()[2].get(observer_id)
+
+    def get_all_by_name(self, rule_name):
+        """Returns a list of the metadata of the rules with the given name, ignoring case."""
+        return list(self._get_lookups()[3].get(rule_name.lower(), []))
+
+    def refresh(self):
+        """Loads the metadata of all the rules again."""
+        with self._lock:
+            self._load()
+
+    def _get_lookups(self):
+        with self._lock:
+            if time.time() >= self._expiration:
+                self._load()
+            return self._rules, self._by_id, self._by_observer_id, self._by_name
+
+    def _load(self):
+        rules = []
+        by_id = {}
+        by_observer_id = {}
+        by_name = {}
+        for page in self._get_all_rules():
+            for rule in page[_RULE_METADATA]:
+                rules.append(rule)
+                by_id[rule.get(u"id")] = rule
+                by_observer_id[rule.get(u"observerRuleId")] = rule
+                by_name.setdefault((rule.get(u"name") or u"").lower(), []).append(rule)
+        self._rules = rules
+        self._by_id = by_id
+        self._by_observer_id = by_observer_id
+        self._by_name = by_name
+        self._expiration = time.time() + self._ttl_seconds
@@ -1,15 +1,36 @@
+import hashlib
+import heapq
+import io
+import itertools
 import json
+import os
 import posixpath
+import re
 import time
 from collections import namedtuple
+from collections import OrderedDict
+from threading import BoundedSemaphore
+from threading import Condition
+from threading import Event
+from threading import Lock
+from threading import Thread
 
+from py42._internal.archive_index import ArchiveCrawler
+from py42._internal.compat import str
+from py42._internal.concurrency import iter_completed
+from py42._internal.concurrency import map_concurrently
+from py42._internal.concurrency import split_into_batches
 from py42.exceptions import Py42ArchiveFileNotFoundError
+from py42.exceptions import Py42HTTPError
+from py42.exceptions import Py42RestoreTimeoutError
 from py42.settings import debug
 from py42.util import format_dict
 
 
 FileSelection = namedtuple(u"FileSelection", u"path_set, num_files, num_dirs, size")
 
+_REGEX_SPECIAL_CHARACTERS = frozenset(u"\\.^$|?*+()[]{}")
+
 
 class FileType(object):
     DIRECTORY = u"directory"
@@ -17,9 +38,20 @@ class FileType(object):
 
 
 class ArchiveAccessorManager(object):
+    # restore sessions unused for this long are not reused, staying well within their lifetime
+    # on the storage server
+    ACCESSOR_IDLE_TIMEOUT_SECONDS = 5 * 60
+
+    # accessors in steady use are still replaced after this long, so that their restore sessions
+    # do not expire and their listings of the archive pick up newer backups
+    ACCESSOR_MAX_AGE_SECONDS = 30 * 60
+
     def __init__(self, archive_client, storage_client_factory):
         self._archive_client = archive_client
         self._storage_client_factory = storage_client_factory
+        self._accessor_pool = {}
+        self._accessor_locks = {}
+        self._lock = Lock()
 
     def get_archive_accessor(
         self,
@@ -27,6 +59,53 @@ class ArchiveAccessorManager(object):
         destination_guid=None,
         private_password=None,
         encryption_key=None,
+    ):
+        key = _create_accessor_pool_key(
+            device_guid, destination_guid, private_password, encryption_key
+        )
+        with self._get_accessor_lock(key):
+            pooled = self._get_pooled_accessor(key)
+            if pooled is None:
+                accessor = self._create_archive_accessor(
+                    device_guid, destination_guid, private_password, encryption_key
+                )
+                created = None
+            else:
+                accessor, created = pooled
+            now = time.time()
+            if created is None:
+                created = now
+            with self._lock:
+                self._accessor_pool[key] = (accessor, created, now)
+        return accessor
+
+    def discard_archive_accessor(self, accessor):
+        """Stops reusing an accessor, such as one whose restore session has expired."""
+        with self._lock:
+            for key, pooled in list(self._accessor_pool.items()):
+                if pooled[0] is accessor:
+                    del self._accessor_pool[key]
+
+    def _get_pooled_accessor(self, key):
+        now = time.time()
+        with self._lock:
+            for pooled_key, (_, created, last_used) in list(
+                self._accessor_pool.items()
+            ):
+                if (
+                    now - last_used > self.ACCESSOR_IDLE_TIMEOUT_SECONDS
+                    or now - created > self.ACCESSOR_MAX_AGE_SECONDS
+                ):
+                    del self._accessor_pool[pooled_key]
+            pooled = self._accessor_pool.get(key)
+        return pooled[:2] if pooled else None
+
+    def _get_accessor_lock(self, key):
+        with self._lock:
+            return self._accessor_locks.setdefault(key, Lock())
+
+    def _create_archive_accessor(
+        self, device_guid, destination_guid, private_password, encryption_key
     ):
         client = self._storage_client_factory.from_device_guid(
             device_guid, destination_guid=destination_guid
@@ -47,6 +126,7 @@ class ArchiveAccessorManager(object):
             client.archive,
             restore_job_manager,
             file_size_poller,
+            storage_host_address=client.host_address,
         )
 
     def _get_decryption_keys(self, device_guid, private_password, encryption_key):
@@ -73,6 +153,47 @@ class ArchiveAccessorManager(object):
         return response[u"webRestoreSessionId"]
 
 
+def call_with_archive_accessor(
+    archive_accessor_manager, func, device_guid, **accessor_kwargs
+):
+    """Calls `func` with the pooled archive accessor for a device and returns its result. If the
+    call is rejected as unauthorized or forbidden, which is how the storage server refuses a
+    restore session that has expired, the accessor is discarded and the call is made once more
+    with a new one. Other errors are raised right away."""
+    accessor = archive_accessor_manager.get_archive_accessor(
+        device_guid, **accessor_kwargs
+    )
+    try:
+        return func(accessor)
+    except Py42HTTPError as err:
+        if not _is_expired_session_error(err):
+            raise
+        debug.logger.info(
+            u"Restore session for device {} failed, starting a new one. Error: {}".format(
+                device_guid, err
+            )
+        )
+    archive_accessor_manager.discard_archive_accessor(accessor)
+    accessor = archive_accessor_manager.get_archive_accessor(
+        device_guid, **accessor_kwargs
+    )
+    return func(accessor)
+
+
+def _is_expired_session_error(err):
+    response = err.response
+    return response is not None and response.status_code in (401, 403)
+
+
+def _create_accessor_pool_key(
+    device_guid, destination_guid, private_password, encryption_key
+):
+    # the pool holds digests rather than the key material itself
+    key_material = json.dumps([private_password, encryption_key])
+    key_digest = hashlib.sha256(key_material.encode(u"utf-8")).hexdigest()
+    return device_guid, destination_guid, key_digest
+
+
 def _create_file_selections(file_paths, metadata_list, file_sizes=None):
     file_selections = []
     for i in range(0, len(file_paths)):
@@ -96,6 +217,12 @@ class ArchiveAccessor(object):
     DEFAULT_DIRECTORY_DOWNLOAD_NAME = u"download"
     JOB_POLLING_INTERVAL = 1
 
+    # paths with at least this many components below their root are looked up with a search
+    # before falling back to walking the tree one directory at a time
+    SEARCH_MIN_PATH_DEPTH = 4
+    SEARCH_BATCH_SIZE = 50
+    SEARCH_MAX_RESULTS = 1000
+
     def __init__(
         self,
         device_guid,
@@ -103,20 +230,110 @@ class ArchiveAccessor(object):
         storage_archive_client,
         restore_job_manager,
         file_size_poller,
+        storage_host_address=None,
     ):
         self._device_guid = device_guid
         self._archive_session_id = archive_session_id
         self._storage_archive_client = storage_archive_client
         self._restore_job_manager = restore_job_manager
         self._file_size_poller = file_size_poller
+        self._tree = ArchiveTree(self._get_children)
+        self.storage_host_address = storage_host_address
 
-    def stream_from_backup(self, file_paths, file_size_calc_timeout=None):
-        file_selections = self._create_file_selections(
+    def stream_from_backup(
+        self,
+        file_paths,
+        file_size_calc_timeout=None,
+        restore_timeout=None,
+        progress_callback=None,
+    ):
+        file_selections = self.create_file_selections(
             file_paths, file_size_calc_timeout
         )
-        return self._restore_job_manager.get_stream(file_selections)
+        return self.stream_file_selections(
+            file_selections,
+            restore_timeout=restore_timeout,
+            progress_callback=progress_callback,
+        )
 
-    def _create_file_selections(self, file_paths, file_size_calc_timeout):
+    def stream_file_selections(
+        self, file_selections, restore_timeout=None, progress_callback=None
+    ):
+        return self._restore_job_manager.get_stream(
+            file_selections,
+            timeout=restore_timeout,
+            progress_callback=progress_callback,
+        )
+
+    def crawl(
+        self,
+        index,
+        path=None,
+        max_depth=None,
+        max_workers=None,
+        max_requests_per_second=None,
+        incremental=True,
+    ):
+        """Writes the files and directories at and under `path`, or under every root of the
+        archive if `path` is None, to an :class:`ArchiveIndex`. Directories without
+        subdirectories whose modification and backup times have not changed since they were
+        last indexed are not listed again. Returns the number of directories listed from the
+        storage server.
+        """
+        if path is None:
+            start_nodes = [dict(root) for root in self._get_children(node_id=None)]
+        else:
+            start_nodes = [dict(self._get_file_via_walking_tree(path))]
+        crawler = ArchiveCrawler(
+            self._device_guid,
+            self._get_children,
+            index,
+            max_depth=max_depth,
+            max_workers=max_workers,
+            max_requests_per_second=max_requests_per_second,
+            incremental=incremental,
+        )
+        return crawler.crawl(start_nodes)
+
+    def find_files(self, path_or_pattern, file_size_calc_timeout=None):
+        """Returns the file path metadata of the files and directories in the archive at a path
+        or matching a pattern, each with the ``numFiles``, ``numDirs`` and ``size`` it holds,
+        which are None if they were not calculated within `file_size_calc_timeout` seconds.
+
+        A pattern may use ``*`` and ``?`` to match within a path component and ``**`` to match
+        across them. A pattern or name without a ``/`` matches file names at any depth.
+        """
+        pattern = path_or_pattern.replace(u"\\", u"/")
+        if _is_glob_pattern(pattern) or u"/" not in pattern:
+            matches = self._search_for_pattern(pattern)
+        else:
+            try:
+                matches = self._get_restore_metadata([pattern])
+            except Py42ArchiveFileNotFoundError:
+                return []
+        if not matches:
+            return []
+
+        file_sizes = self._file_size_poller.get_file_sizes(
+            [match[u"id"] for match in matches], timeout=file_size_calc_timeout
+        )
+        entries = []
+        for i, match in enumerate(matches):
+            size_info = file_sizes[i] if file_sizes else {}
+            entries.append(
+                {
+                    u"path": match[u"path"],
+                    u"type": match[u"type"],
+                    u"id": match[u"id"],
+                    u"deleted": bool(match.get(u"deleted")),
+                    u"numFiles": size_info.get(u"numFiles"),
+                    u"numDirs": size_info.get(u"numDirs"),
+                    u"size": size_info.get(u"size"),
+                }
+            )
+        return entries
+
+    def create_file_selections(self, file_paths, file_size_calc_timeout=None):
         if not isinstance(file_paths, (list, tuple)):
             file_paths = [file_paths]
         file_paths = [fp.replace(u"\\", u"/") for fp in file_paths]
@@ -128,25 +345,88 @@ class ArchiveAccessor(object):
         return _create_file_selections(file_paths, metadata_list, file_sizes)
 
     def _get_restore_metadata(self, file_paths):
-        metadata_list = []
-        for path in file_paths:
+        found_by_search = self._search_for_files(
+            [fp for fp in file_paths if self._is_searchable_path(fp)]
+        )
+        # paths are resolved concurrently; directories they share are only listed once
+        return map_concurrently(
+            lambda fp: self._get_restore_metadata_for_path(fp, found_by_search),
+            file_paths,
+        )
+
+    def _get_restore_metadata_for_path(self, path, found_by_search):
+        metadata = found_by_search.get(path.lower())
+        if metadata is None:
             metadata = self._get_file_via_walking_tree(path)
-            metadata_list_entry = {
-                u"id": metadata[u"id"],
-                u"path": metadata[u"path"],
-                u"type": metadata[u"type"],
-            }
-            metadata_list.append(metadata_list_entry)
-        return metadata_list
+        return {
+            u"id": metadata[u"id"],
+            u"path": metadata[u"path"],
+            u"type": metadata[u"type"],
+            u"deleted": metadata.get(u"deleted"),
+        }
+
+    def _is_searchable_path(self, file_path):
+        path_components = file_path.split(u"/")[1:]
+        is_deep = len(path_components) >= self.SEARCH_MIN_PATH_DEPTH
+        return is_deep and all(path_components)
+
+    def _search_for_files(self, file_paths):
+        batches = split_into_batches(file_paths, self.SEARCH_BATCH_SIZE)
+        found = {}
+        for batch_found in map_concurrently(self._search_for_batch, batches):
+            found.update(batch_found)
+        return found
+
+    def _search_for_batch(self, file_paths):
+        try:
+            response = self._storage_archive_client.search_paths(
+                self._archive_session_id,
+                self._device_guid,
+                regex=_create_search_regex(file_paths),
+                max_results=self.SEARCH_MAX_RESULTS,
+                show_deleted=True,
+            )
+        except Py42HTTPError as err:
+            debug.logger.debug(
+                u"Search failed, walking the archive tree instead: {}".format(err)
+            )
+            return {}
+
+        wanted = {fp.lower() for fp in file_paths}
+        found = {}
+        for result in response:
+            path = result[u"path"].lower()
+            if path in wanted:
+                found.setdefault(path, result)
+        return found
+
+    def _search_for_pattern(self, pattern):
+        pattern = pattern.rstrip(u"/")
+        name_regex = u"(?i)(?:^|/){}$".format(
+            _glob_to_regex(posixpath.basename(pattern))
+        )
+        response = self._storage_archive_client.search_paths(
+            self._archive_session_id,
+            self._device_guid,
+            regex=name_regex,
+            max_results=self.SEARCH_MAX_RESULTS,
+            show_deleted=True,
+        )
+        # the server may compare the regex to file names only, so whole paths are checked here
+        if u"/" in pattern:
+            path_regex = re.compile(u"(?i)^{}$".format(_glob_to_regex(pattern)))
+        else:
+            path_regex = re.compile(name_regex)
+        return [result for result in response if path_regex.search(result[u"path"])]
 
     def _get_file_via_walking_tree(self, file_path):
         path_parts = file_path.split(u"/")
         path_root = path_parts[0] + u"/"
 
-        response = self._get_children(node_id=None)
-        for root in response:
-            if root[u"path"].lower() == path_root.lower():
-                return self._walk_tree(response, root, path_parts[1:])
+        response, roots = self._tree.get_children(node_id=None)
+        root = roots.get(path_root.lower())
+        if root is not None:
+            return self._walk_tree(response, root, path_parts[1:])
 
         raise Py42ArchiveFileNotFoundError(response, self._device_guid, file_path)
 
@@ -154,15 +434,15 @@ class ArchiveAccessor(object):
         if not remaining_path_components or not remaining_path_components[0]:
             return current_node
 
-        children = self._get_children(node_id=current_node[u"id"])
+        _, children = self._tree.get_children(node_id=current_node[u"id"])
         current_node_path = current_node[u"path"]
         target_child_path = posixpath.join(
             current_node_path, remaining_path_components[0]
         )
 
-        for child in children:
-            if child[u"path"].lower() == target_child_path.lower():
-                return self._walk_tree(response, child, remaining_path_components[1:])
+        child = children.get(target_child_path.lower())
+        if child is not None:
+            return self._walk_tree(response, child, remaining_path_components[1:])
 
         raise Py42ArchiveFileNotFoundError(
             response, self._device_guid, target_child_path
@@ -177,6 +457,76 @@ class ArchiveAccessor(object):
         )
 
 
+class ArchiveTree(object):
+    """An in-memory cache of the archive directories listed during a restore session. Each
+    directory is fetched at most once, even when several threads ask for it at the same time,
+    and its children are indexed by their lower-cased paths.
+    """
+
+    def __init__(self, get_children):
+        self._get_children = get_children
+        self._listings = {}
+        self._node_locks = {}
+        self._lock = Lock()
+
+    def get_children(self, node_id=None):
+        """Returns a tuple of the response listing the children of the node with the given ID
+        and a dict mapping the lower-cased path of each child to its metadata.
+        """
+        listing = self._listings.get(node_id)
+        if listing is None:
+            with self._get_node_lock(node_id):
+                listing = self._listings.get(node_id)
+                if listing is None:
+                    response = self._get_children(node_id=node_id)
+                    listing = (response, _index_children_by_path(response))
+                    with self._lock:
+                        self._listings[node_id] = listing
+        return listing
+
+    def _get_node_lock(self, node_id):
+        with self._lock:
+            return self._node_locks.setdefault(node_id, Lock())
+
+
+def _create_search_regex(file_paths):
+    # matches the names whether the server compares them to full paths or to file names
+    names = sorted({_escape_regex(posixpath.basename(fp)) for fp in file_paths})
+    return u"(?i)(?:^|/)(?:{})$".format(u"|".join(names))
+
+
+def _is_glob_pattern(text):
+    return u"*" in text or u"?" in text
+
+
+def _glob_to_regex(pattern):
+    parts = []
+    for token in re.split(u"(\\*\\*|\\*|\\?)", pattern):
+        if token == u"**":
+            parts.append(u".*")
+        elif token == u"*":
+            parts.append(u"[^/]*")
+        elif token == u"?":
+            parts.append(u"[^/]")
+        else:
+            parts.append(_escape_regex(token))
+    return u"".join(parts)
+
+
+def _escape_regex(text):
+    return u"".join(
+        u"\\" + char if char in _REGEX_SPECIAL_CHARACTERS else char for char in text
+    )
+
+
+def _index_children_by_path(children):
+    children_by_path = {}
+    for child in children:
+        # keep the first match, as when the children were scanned in order
+        children_by_path.setdefault(child[u"path"].lower(), child)
+    return children_by_path
+
+
 def _get_default_file_size():
     return {u"numFiles": 1, u"numDirs": 1, u"size": 1}
 
@@ -203,6 +553,10 @@ def _print_file_size(size_dict):
 
 
 class FileSizePoller(_RestorePoller):
+    # polls start this far apart and back off to the job polling interval
+    INITIAL_JOB_POLLING_INTERVAL_SECONDS = 0.1
+    JOB_POLLING_INTERVAL_SECONDS = 5
+
     def __init__(
         self, storage_archive_client, device_guid, job_polling_interval=None,
     ):
@@ -219,74 +573,94 @@ class FileSizePoller(_RestorePoller):
         return self._wait_for_jobs(job_ids, timeout)
 
     def _start_poll(self, file_ids):
-        job_ids = []
-        for file_id in file_ids:
-            response = self._storage_archive_client.create_file_size_job(
-                self._device_guid, file_id
-            )
-            job_id = response[u"jobId"]
-            job_ids.append(job_id)
-        return job_ids
+        return map_concurrently(self._create_job, file_ids)
+
+    def _create_job(self, file_id):
+        response = self._storage_archive_client.create_file_size_job(
+            self._device_guid, file_id
+        )
+        return response[u"jobId"]
 
     def _wait_for_jobs(self, job_ids, timeout):
         t0 = time.time()
-        sizes = []
-
-        # Waits until the job_ids stack is empty
-        while job_ids:
-            for job_id in job_ids:
-                response = self._get_job_status(job_id)
-                size_dict = _create_size_dict(job_id, response)
-                _print_file_size(size_dict)
-                if response[u"status"].lower() == u"done":
-                    job_ids.remove(job_id)
-                    sizes.append(size_dict)
+        sizes = [None] * len(job_ids)
+        pending = list(range(len(job_ids)))
+        interval = min(
+            self.INITIAL_JOB_POLLING_INTERVAL_SECONDS, self._job_polling_interval
+        )
+
+        while pending:
+            size_dicts = map_concurrently(
+                lambda index: self._get_size_dict(job_ids[index]), pending
+            )
+            still_pending = []
+            for index, size_dict in zip(pending, size_dicts):
+                if size_dict[u"status"].lower() == u"done":
+                    sizes[index] = size_dict
+                else:
+                    still_pending.append(index)
+            pending = still_pending
 
             # File size calculation is taking too long.
-            if time.time() - t0 > timeout:
+            elapsed = time.time() - t0
+            if elapsed > timeout:
                 return None
 
-            if job_ids:
-                time.sleep(self._job_polling_interval)
+            if pending:
+                time.sleep(min(interval, timeout - elapsed))
+                interval = min(interval * 2, self._job_polling_interval)
         return sizes
 
+    def _get_size_dict(self, job_id):
+        response = self._get_job_status(job_id)
+        size_dict = _create_size_dict(job_id, response)
+        _print_file_size(size_dict)
+        return size_dict
+
     def _get_job_status(self, job_id):
         return self._storage_archive_client.get_file_size_job(job_id, self._device_guid)
 
 
 class RestoreJobManager(_RestorePoller):
+    # polls start this far apart and adapt to the job's progress, up to the maximum interval
+    JOB_POLLING_INTERVAL_SECONDS = 0.25
+    MAX_JOB_POLLING_INTERVAL_SECONDS = 10
+
     def __init__(
         self,
         storage_archive_client,
         device_guid,
         archive_session_id,
         job_polling_interval=None,
+        scheduler=None,
     ):
         super(RestoreJobManager, self).__init__(
             storage_archive_client, device_guid, job_polling_interval
         )
         self._archive_session_id = archive_session_id
+        self._scheduler = scheduler or default_restore_job_scheduler
 
-    def get_stream(self, file_selections):
+    def get_stream(self, file_selections, timeout=None, progress_callback=None):
         response = self._start_restore(file_selections)
         job_id = response["jobId"]
-        self._wait_for_job(job_id)
+        self._wait_for_job(job_id, timeout, progress_callback)
         return self._get_stream(job_id)
 
-    def _wait_for_job(self, job_id):
-        while not self._is_job_complete(job_id):
-            time.sleep(self._job_polling_interval)
-
-    def _is_job_complete(self, job_id):
-        response = self._storage_archive_client.get_restore_status(job_id)
-        is_done = response[u"done"]
-        percentage_dict = {
-            u"jobId": job_id,
-            u"status": response[u"status"],
-            u"percentComplete": response[u"percentComplete"] if not is_done else 100,
-        }
-        debug.logger.debug(format_dict(percentage_dict))
-        return is_done
+    def _wait_for_job(self, job_id, timeout=None, progress_callback=None):
+        job = self._scheduler.watch(
+            self._storage_archive_client,
+            job_id,
+            min_interval=self._job_polling_interval,
+            max_interval=max(
+                self._job_polling_interval, self.MAX_JOB_POLLING_INTERVAL_SECONDS
+            ),
+            progress_callback=progress_callback,
+        )
+        if not job.wait(timeout):
+            job.stop()
+            # frees the storage server from building a result nobody will download
+            self._storage_archive_client.cancel_restore(job_id)
+            raise Py42RestoreTimeoutError(job_id, timeout)
 
     def _start_restore(self, file_selections):
         num_files = sum([fs.num_files for fs in file_selections])
@@ -309,6 +683,154 @@ class RestoreJobManager(_RestorePoller):
         return response
 
 
+class RestoreJobScheduler(object):
+    """Polls the status of any number of web restore jobs from one background thread. Each job
+    is polled again after an interval estimated from how fast its `percentComplete` has been
+    increasing, which keeps both the delay after a job finishes and the number of polls low.
+    """
+
+    def __init__(self):
+        self._condition = Condition()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._thread = None
+
+    def watch(
+        self,
+        storage_archive_client,
+        job_id,
+        min_interval,
+        max_interval,
+        progress_callback=None,
+    ):
+        """Starts polling the given restore job and returns a :class:`WatchedRestoreJob` for
+        waiting on it. `progress_callback` is called from the polling thread with a dict holding
+        the `jobId`, `status` and `percentComplete` of the job after each poll.
+        """
+        job = WatchedRestoreJob(
+            storage_archive_client,
+            job_id,
+            min_interval,
+            max_interval,
+            progress_callback=progress_callback,
+        )
+        with self._condition:
+            self._schedule(job, time.time())
+            if self._thread is None:
+                self._thread = Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+        return job
+
+    def _schedule(self, job, poll_time):
+        heapq.heappush(self._queue, (poll_time, next(self._sequence), job))
+        self._condition.notify()
+
+    def _run(self):
+        while True:
+            job = self._get_next_due_job()
+            if job is None:
+                return
+            if job.is_finished:
+                continue
+            job.poll()
+            if not job.is_finished:
+                with self._condition:
+                    self._schedule(job, time.time() + job.interval)
+
+    def _get_next_due_job(self):
+        with self._condition:
+            while self._queue:
+                poll_time, _, job = self._queue[0]
+                delay = poll_time - time.time()
+                if delay <= 0:
+                    heapq.heappop(self._queue)
+                    return job
+                self._condition.wait(delay)
+
+            # the thread exits when there is nothing left to poll; `watch` starts a new one
+            self._thread = None
+            return None
+
+
+class WatchedRestoreJob(object):
+    """A web restore job being polled by a :class:`RestoreJobScheduler`."""
+
+    def __init__(
+        self,
+        storage_archive_client,
+        job_id,
+        min_interval,
+        max_interval,
+        progress_callback=None,
+    ):
+        self.job_id = job_id
+        self.interval = min_interval
+        self._storage_archive_client = storage_archive_client
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._progress_callback = progress_callback
+        self._started_at = time.time()
+        self._percent_complete = 0
+        self._error = None
+        self._finished = Event()
+
+    @property
+    def is_finished(self):
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        """Blocks until the job is done and returns True, or returns False if `timeout` seconds
+        pass first. Re-raises any exception raised while polling the job.
+        """
+        if not self._finished.wait(timeout):
+            return False
+        if self._error is not None:
+            raise self._error
+        return True
+
+    def stop(self):
+        """Stops polling the job."""
+        self._finished.set()
+
+    def poll(self):
+        try:
+            response = self._storage_archive_client.get_restore_status(self.job_id)
+            is_done = response[u"done"]
+            percent_complete = response[u"percentComplete"] if not is_done else 100
+            percentage_dict = {
+                u"jobId": self.job_id,
+                u"status": response[u"status"],
+                u"percentComplete": percent_complete,
+            }
+            debug.logger.debug(format_dict(percentage_dict))
+            if self._progress_callback:
+                self._progress_callback(percentage_dict)
+        except Exception as err:
+            self._error = err
+            self._finished.set()
+            return
+
+        if is_done:
+            self._finished.set()
+        else:
+            self._update_interval(percent_complete)
+
+    def _update_interval(self, percent_complete):
+        if 0 < percent_complete < 100 and percent_complete > self._percent_complete:
+            elapsed = time.time() - self._started_at
+            remaining = elapsed * (100 - percent_complete) / percent_complete
+            # polling halfway through the estimate corrects for uneven progress
+            interval = remaining / 2
+            self._percent_complete = percent_complete
+        else:
+            interval = self.interval * 2
+        self.interval = max(self._min_interval, min(interval, self._max_interval))
+
+
+default_restore_job_scheduler = RestoreJobScheduler()
+
+
 def create_restore_job_manager(storage_archive_client, device_guid, archive_session_id):
     return RestoreJobManager(storage_archive_client, device_guid, archive_session_id)
 
@@ -326,3 +848,274 @@ def _check_for_multiple_files(file_selection):
     # Only one file selected
     selection = file_selection[0]
     return selection.path_set[u"type"].lower() == u"directory"
+
+
+class BatchRestorer(object):
+    """Restores files from the backups of many devices to a local directory. The files of each
+    device are restored together with one restore job, jobs for different devices run
+    concurrently, and no storage server runs more than `max_jobs_per_storage_server` of them at
+    a time.
+    """
+
+    MANIFEST_FILE_NAME = u"manifest.json"
+    DEFAULT_MAX_JOBS_PER_STORAGE_SERVER = 4
+
+    def __init__(
+        self,
+        archive_accessor_manager,
+        max_workers=None,
+        max_jobs_per_storage_server=None,
+    ):
+        self._archive_accessor_manager = archive_accessor_manager
+        self._max_workers = max_workers
+        self._max_jobs_per_storage_server = (
+            max_jobs_per_storage_server or self.DEFAULT_MAX_JOBS_PER_STORAGE_SERVER
+        )
+        self._storage_server_semaphores = {}
+        self._lock = Lock()
+
+    def restore_to_directory(
+        self,
+        files,
+        output_directory,
+        archive_password=None,
+        encryption_key=None,
+        file_size_calc_timeout=None,
+        restore_timeout=None,
+    ):
+        """Restores the given `(device_guid, file_path)` pairs, or entries found by
+        :class:`BackupFileLocator`, writing the result of each archive to
+        `<output_directory>/<device_guid>/`, or to
+        `<output_directory>/<device_guid>/<destination_guid>/` for entries of a specific
+        destination, as soon as its restore job is done. Returns the manifest that is also
+        written to `<output_directory>/manifest.json`.
+        """
+        paths_by_archive = _group_paths_by_archive(files)
+
+        def restore(archive):
+            device_guid, destination_guid = archive
+            return self._restore_device(
+                device_guid,
+                destination_guid,
+                paths_by_archive[archive],
+                output_directory,
+                archive_password=archive_password,
+                encryption_key=encryption_key,
+                file_size_calc_timeout=file_size_calc_timeout,
+                restore_timeout=restore_timeout,
+            )
+
+        entries = {}
+        for archive, future in iter_completed(
+            restore, paths_by_archive, max_workers=self._max_workers
+        ):
+            entries[archive] = future.result()
+
+        manifest = [entries[archive] for archive in paths_by_archive]
+        _write_manifest(
+            os.path.join(output_directory, self.MANIFEST_FILE_NAME), manifest
+        )
+        return manifest
+
+    def _restore_device(
+        self,
+        device_guid,
+        destination_guid,
+        file_paths,
+        output_directory,
+        **restore_options
+    ):
+        device_directory = os.path.join(output_directory, device_guid)
+        if destination_guid is not None:
+            device_directory = os.path.join(device_directory, destination_guid)
+        entry = {
+            u"deviceGuid": device_guid,
+            u"destinationGuid": destination_guid,
+            u"paths": file_paths,
+            u"file": None,
+            u"size": None,
+            u"md5": None,
+            u"sha256": None,
+            u"error": None,
+        }
+        try:
+            result_path, download = self._restore_device_to_directory(
+                device_guid,
+                destination_guid,
+                file_paths,
+                device_directory,
+                **restore_options
+            )
+        except Exception as err:
+            # network and file system errors only fail this device, like server errors
+            debug.logger.warning(
+                u"Failed to restore files from device {}: {}".format(device_guid, err)
+            )
+            entry[u"error"] = u"{}".format(err)
+            return entry
+
+        entry[u"file"] = result_path
+        entry[u"size"] = download.size
+        entry[u"md5"] = download.md5
+        entry[u"sha256"] = download.sha256
+        return entry
+
+    def _restore_device_to_directory(
+        self,
+        device_guid,
+        destination_guid,
+        file_paths,
+        device_directory,
+        archive_password=None,
+        encryption_key=None,
+        file_size_calc_timeout=None,
+        restore_timeout=None,
+    ):
+        def restore(accessor):
+            with self._get_storage_server_semaphore(accessor.storage_host_address):
+                file_selections = accessor.create_file_selections(
+                    file_paths, file_size_calc_timeout=file_size_calc_timeout
+                )
+                response = accessor.stream_file_selections(
+                    file_selections, restore_timeout=restore_timeout
+                )
+                if not os.path.isdir(device_directory):
+                    os.makedirs(device_directory)
+                result_path = os.path.join(
+                    device_directory, _get_restore_file_name(file_selections)
+                )
+                # a file left by an earlier run came from a different restore job
+                return result_path, response.download_to(result_path, resume=False)
+
+        return call_with_archive_accessor(
+            self._archive_accessor_manager,
+            restore,
+            device_guid,
+            destination_guid=destination_guid,
+            private_password=archive_password,
+            encryption_key=encryption_key,
+        )
+
+    def _get_storage_server_semaphore(self, host_address):
+        with self._lock:
+            if host_address not in self._storage_server_semaphores:
+                self._storage_server_semaphores[host_address] = BoundedSemaphore(
+                    self._max_jobs_per_storage_server
+                )
+            return self._storage_server_semaphores[host_address]
+
+
+class BackupFileLocator(object):
+    """Finds files in all of the backups of a user's devices. Every destination of every device
+    is searched at once, reusing the restore sessions of the archive accessor manager.
+    """
+
+    def __init__(self, archive_accessor_manager, device_client, max_workers=None):
+        self._archive_accessor_manager = archive_accessor_manager
+        self._device_client = device_client
+        self._max_workers = max_workers
+
+    def find(
+        self,
+        user_uid,
+        path_or_pattern,
+        archive_password=None,
+        encryption_key=None,
+        file_size_calc_timeout=None,
+    ):
+        """Returns the entries matching `path_or_pattern` in the backups of the user's devices,
+        each with the ``deviceGuid`` and ``destinationGuid`` of the archive it was found in.
+        Archives that cannot be searched are skipped.
+        """
+
+        def find_in_archive(archive):
+            device_guid, destination_guid = archive
+            return self._find_in_archive(
+                device_guid,
+                destination_guid,
+                path_or_pattern,
+                archive_password=archive_password,
+                encryption_key=encryption_key,
+                file_size_calc_timeout=file_size_calc_timeout,
+            )
+
+        archives = self._get_archives(user_uid)
+        results = map_concurrently(
+            find_in_archive, archives, max_workers=self._max_workers
+        )
+        return list(itertools.chain.from_iterable(results))
+
+    def _get_archives(self, user_uid):
+        archives = []
+        for page in self._device_client.get_all(
+            user_uid=user_uid, include_backup_usage=True
+        ):
+            for device in page[u"computers"]:
+                for usage in device.get(u"backupUsage") or []:
+                    archives.append((device[u"guid"], usage[u"targetComputerGuid"]))
+        return archives
+
+    def _find_in_archive(
+        self,
+        device_guid,
+        destination_guid,
+        path_or_pattern,
+        archive_password=None,
+        encryption_key=None,
+        file_size_calc_timeout=None,
+    ):
+        try:
+            entries = call_with_archive_accessor(
+                self._archive_accessor_manager,
+                lambda accessor: accessor.find_files(
+                    path_or_pattern, file_size_calc_timeout=file_size_calc_timeout
+                ),
+                device_guid,
+                destination_guid=destination_guid,
+                private_password=archive_password,
+                encryption_key=encryption_key,
+            )
+        except Py42HTTPError as err:
+            debug.logger.warning(
+                u"Failed to search the backup of device {} at destination {}: {}".format(
+                    device_guid, destination_guid, err
+                )
+            )
+            return []
+        for entry in entries:
+            entry[u"deviceGuid"] = device_guid
+            entry[u"destinationGuid"] = destination_guid
+        return entries
+
+
+def _group_paths_by_archive(files):
+    # groups the paths by `(device_guid, destination_guid)`, with a destination GUID of None
+    # for the device's default destination
+    paths_by_archive = OrderedDict()
+    for item in files:
+        if isinstance(item, dict):
+            # an entry found by BackupFileLocator, in the archive of a specific destination
+            archive = (item[u"deviceGuid"], item.get(u"destinationGuid"))
+            file_path = item[u"path"]
+        else:
+            device_guid, file_path = item
+            archive = (device_guid, None)
+        paths = paths_by_archive.setdefault(archive, [])
+        if file_path not in paths:
+            paths.append(file_path)
+    return paths_by_archive
+
+
+def _get_restore_file_name(file_selections):
+    is_zip = _check_for_multiple_files(file_selections)
+    name = None
+    if len(file_selections) == 1:
+        path = file_selections[0].path_set[u"path"].rstrip(u"/")
+        name = posixpath.basename(path)
+    name = name or ArchiveAccessor.DEFAULT_DIRECTORY_DOWNLOAD_NAME
+    return u"{}.zip".format(name) if is_zip else name
+
+
+def _write_manifest(manifest_path, manifest):
+    with io.open(manifest_path, u"w", encoding=u"utf-8") as manifest_file:
+        manifest_file.write(str(json.dumps(manifest, indent=4)))
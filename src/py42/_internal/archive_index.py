@@ -0,0 +1,294 @@
+"""
+A local SQLite index of the files in backup archives and the crawler that fills it.
+"""
+import posixpath
+import re
+import sqlite3
+import time
+
+from py42._internal.concurrency import map_concurrently
+from py42._internal.concurrency import RateLimiter
+
+_SCHEMA = u"""
+CREATE TABLE IF NOT EXISTS nodes (
+    device_guid TEXT NOT NULL,
+    path TEXT NOT NULL,
+    lower_path TEXT NOT NULL,
+    parent_path TEXT,
+    lower_name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    size INTEGER,
+    id TEXT,
+    deleted INTEGER NOT NULL,
+    version TEXT,
+    PRIMARY KEY (device_guid, path)
+);
+CREATE INDEX IF NOT EXISTS nodes_by_lower_path ON nodes (lower_path);
+CREATE INDEX IF NOT EXISTS nodes_by_lower_name ON nodes (lower_name);
+CREATE INDEX IF NOT EXISTS nodes_by_parent ON nodes (device_guid, parent_path);
+CREATE TABLE IF NOT EXISTS directories (
+    device_guid TEXT NOT NULL,
+    path TEXT NOT NULL,
+    version TEXT,
+    crawled_at REAL NOT NULL,
+    PRIMARY KEY (device_guid, path)
+);
+"""
+
+_NODE_COLUMNS = u"device_guid, path, type, size, id, deleted, version"
+
+
+class ArchiveIndex(object):
+    """A searchable index of backup archive files stored in a local SQLite database. It is
+    filled by :meth:`ArchiveAccessor.crawl` and can be queried without contacting any server.
+    An index can only be used from the thread that opened it.
+    """
+
+    def __init__(self, database_path):
+        self._connection = sqlite3.connect(database_path)
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def find_by_prefix(self, prefix, device_guid=None):
+        """Returns the indexed files and directories whose paths start with `prefix`, ignoring
+        case."""
+        return self._find(
+            u"lower_path GLOB ?", [_to_prefix_glob(prefix.lower())], device_guid
+        )
+
+    def find_by_glob(self, pattern, device_guid=None):
+        """Returns the indexed files and directories whose paths match the Unix glob
+        `pattern`, such as ``/Users/*/Documents/*.pdf``. ``*`` and ``?`` match within a path
+        component and ``**`` matches across them. Matching is case-sensitive."""
+        # SQLite's GLOB lets "*" match "/", so it only narrows down the candidates
+        path_regex = re.compile(_glob_to_regex(pattern))
+        candidates = self._find(u"path GLOB ?", [pattern], device_guid)
+        return [node for node in candidates if path_regex.match(node[u"path"])]
+
+    def find_by_name(self, name, device_guid=None):
+        """Returns the indexed files and directories named `name`, ignoring case."""
+        return self._find(u"lower_name = ?", [name.lower()], device_guid)
+
+    def get_children(self, device_guid, parent_path):
+        """Returns the indexed children of a directory."""
+        return self._find(u"parent_path = ?", [parent_path], device_guid)
+
+    def get_directory_version(self, device_guid, path):
+        """Returns the version a directory had when its children were last indexed, or None if
+        they never were."""
+        row = self._connection.execute(
+            u"SELECT version FROM directories WHERE device_guid = ? AND path = ?",
+            (device_guid, path),
+        ).fetchone()
+        return row[0] if row else None
+
+    def add_nodes(self, device_guid, parent_path, nodes):
+        """Adds or updates the given file path metadata nodes."""
+        with self._connection:
+            self._insert_nodes(device_guid, parent_path, nodes)
+
+    def replace_children(self, device_guid, parent_path, nodes, version):
+        """Makes `nodes` the indexed children of a directory, removing earlier children that are
+        no longer in it along with everything under them, and records the directory's
+        version."""
+        current_paths = {node[u"path"] for node in nodes}
+        with self._connection:
+            for child in self.get_children(device_guid, parent_path):
+                if child[u"path"] not in current_paths:
+                    self._remove_subtree(device_guid, child[u"path"])
+            self._insert_nodes(device_guid, parent_path, nodes)
+            self._connection.execute(
+                u"INSERT OR REPLACE INTO directories VALUES (?, ?, ?, ?)",
+                (device_guid, parent_path, version, time.time()),
+            )
+
+    def _insert_nodes(self, device_guid, parent_path, nodes):
+        self._connection.executemany(
+            u"INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    device_guid,
+                    node[u"path"],
+                    node[u"path"].lower(),
+                    parent_path,
+                    _get_name(node[u"path"]).lower(),
+                    node[u"type"],
+                    node.get(u"size"),
+                    node.get(u"id"),
+                    bool(node.get(u"deleted")),
+                    _get_version(node),
+                )
+                for node in nodes
+            ],
+        )
+
+    def _remove_subtree(self, device_guid, path):
+        query = u"DELETE FROM {} WHERE device_guid = ? AND (path = ? OR path GLOB ?)"
+        params = (device_guid, path, _to_prefix_glob(path.rstrip(u"/") + u"/"))
+        for table in (u"nodes", u"directories"):
+            self._connection.execute(query.format(table), params)
+
+    def _find(self, condition, params, device_guid):
+        query = u"SELECT {} FROM nodes WHERE {}".format(_NODE_COLUMNS, condition)
+        if device_guid is not None:
+            query += u" AND device_guid = ?"
+            params = list(params) + [device_guid]
+        rows = self._connection.execute(query + u" ORDER BY device_guid, path", params)
+        return [_row_to_node(row) for row in rows]
+
+
+class ArchiveCrawler(object):
+    """Walks the backup tree of a device one level at a time, listing the directories of each
+    level concurrently, and writes what it finds to an :class:`ArchiveIndex`.
+    """
+
+    def __init__(
+        self,
+        device_guid,
+        get_children,
+        index,
+        max_depth=None,
+        max_workers=None,
+        max_requests_per_second=None,
+        incremental=True,
+    ):
+        self._device_guid = device_guid
+        self._get_children = get_children
+        self._index = index
+        self._max_depth = max_depth
+        self._max_workers = max_workers
+        self._rate_limiter = (
+            RateLimiter(max_requests_per_second) if max_requests_per_second else None
+        )
+        self._incremental = incremental
+
+    def crawl(self, start_nodes):
+        """Indexes `start_nodes` and everything under them down to the maximum depth, and
+        returns the number of directories listed from the server.
+        """
+        self._index.add_nodes(self._device_guid, None, start_nodes)
+        level = [node for node in start_nodes if _is_directory(node)]
+        depth = 0
+        listed_count = 0
+        while level and (self._max_depth is None or depth < self._max_depth):
+            to_list = self._get_directories_to_list(level)
+            listings = map_concurrently(
+                self._list_children, to_list, max_workers=self._max_workers
+            )
+            next_level = []
+            for directory, children in zip(to_list, listings):
+                self._index.replace_children(
+                    self._device_guid,
+                    directory[u"path"],
+                    children,
+                    _get_version(directory),
+                )
+                next_level.extend(children)
+            listed_count += len(to_list)
+            level = [node for node in next_level if _is_directory(node)]
+            depth += 1
+        return listed_count
+
+    def _get_directories_to_list(self, directories):
+        # The versions of directories are only current when they come from a listing of their
+        # parent, so a directory that holds other directories is always listed to find out
+        # which of them changed. Only unchanged directories without subdirectories are skipped.
+        if not self._incremental:
+            return list(directories)
+        return [
+            directory
+            for directory in directories
+            if not self._is_unchanged_leaf(directory)
+        ]
+
+    def _is_unchanged_leaf(self, directory):
+        path = directory[u"path"]
+        version = _get_version(directory)
+        if (
+            not version
+            or self._index.get_directory_version(self._device_guid, path) != version
+        ):
+            return False
+        children = self._index.get_children(self._device_guid, path)
+        return not any(_is_directory(child) for child in children)
+
+    def _list_children(self, directory):
+        if self._rate_limiter:
+            self._rate_limiter.wait()
+        return [dict(child) for child in self._get_children(node_id=directory[u"id"])]
+
+
+def get_node_version(node):
+    """Returns a value that changes when the directory or file described by a file path
+    metadata node is modified or backed up again, or None if the node has no such times."""
+    last_modified = node.get(u"lastModifiedMs")
+    last_backup = node.get(u"lastBackupMs")
+    if last_modified is None and last_backup is None:
+        return None
+    return u"{}:{}".format(last_modified, last_backup)
+
+
+def _get_version(node):
+    # nodes read back from the index carry the version computed when they were added
+    if u"version" in node:
+        return node[u"version"]
+    return get_node_version(node)
+
+
+def _to_prefix_glob(prefix):
+    # brackets make GLOB match its special characters literally
+    escaped = u"".join(u"[{}]".format(c) if c in u"*?[" else c for c in prefix)
+    return escaped + u"*"
+
+
+def _glob_to_regex(pattern):
+    parts = []
+    tokens = re.split(u"(\\*\\*|\\*|\\?|\\[[^]]+\\])", pattern)
+    # the text between the wildcards is at the even positions
+    for i, token in enumerate(tokens):
+        if i % 2 == 0:
+            parts.append(re.escape(token))
+        elif token == u"**":
+            parts.append(u".*")
+        elif token == u"*":
+            parts.append(u"[^/]*")
+        elif token == u"?":
+            parts.append(u"[^/]")
+        else:
+            parts.append(_to_regex_class(token))
+    return u"(?s){}\\Z".format(u"".join(parts))
+
+
+def _to_regex_class(token):
+    # SQLite negates a character class with a leading "^", as regular expressions do
+    members = token[1:-1].replace(u"\\", u"\\\\").replace(u"[", u"\\[")
+    return u"[{}]".format(members)
+
+
+def _get_name(path):
+    return posixpath.basename(path.rstrip(u"/")) or path
+
+
+def _is_directory(node):
+    return node[u"type"].lower() == u"directory"
+
+
+def _row_to_node(row):
+    device_guid, path, node_type, size, node_id, deleted, version = row
+    return {
+        u"deviceGuid": device_guid,
+        u"path": path,
+        u"type": node_type,
+        u"size": size,
+        u"id": node_id,
+        u"deleted": bool(deleted),
+        u"version": version,
+    }
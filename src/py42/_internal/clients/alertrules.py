@@ -1,9 +1,15 @@
 import json
+from collections import OrderedDict
 
+from requests.exceptions import RequestException
+
+from py42._internal.concurrency import map_concurrently
+from py42._internal.concurrency import split_into_batches
 from py42.clients import BaseClient
 from py42.clients.alertrules.cloud_share import CloudShareClient
 from py42.clients.alertrules.exfiltration import ExfiltrationClient
 from py42.clients.alertrules.file_type_mismatch import FileTypeMismatchClient
+from py42.exceptions import Py42Error
 
 
 class AlertRulesClient(BaseClient):
@@ -13,6 +19,9 @@ class AlertRulesClient(BaseClient):
     _resource = u"Rules/"
     _api_prefix = u"/svc/api/{}/{}".format(_version, _resource)
 
+    # the most users sent in one add-users or remove-users request
+    USERS_BATCH_SIZE = 100
+
     def __init__(self, session, user_context, detection_list_user_client):
         super(AlertRulesClient, self).__init__(session)
         self._user_context = user_context
@@ -43,26 +52,109 @@ class AlertRulesClient(BaseClient):
         return self._file_type_mismatch
 
     def add_user(self, rule_id, user_id):
-        tenant_id = self._user_context.get_current_tenant_id()
+        return self._post_add_users(rule_id, [self._get_user_entry(user_id)])
+
+    def remove_user(self, rule_id, user_id):
+        return self._post_remove_users(rule_id, [user_id])
+
+    def add_users(self, rule_id, user_ids, max_workers=None):
+        """Adds any number of users to a rule and returns an ordered dict mapping each user ID to
+        None if it was added or to an error message if it was not. The users' cloud aliases are
+        fetched concurrently and the users are then sent in concurrent batches.
+        """
+
+        def get_user_entry(user_id):
+            try:
+                return self._get_user_entry(user_id), None
+            except (Py42Error, RequestException) as err:
+                return None, u"{}".format(err)
+
+        user_ids = list(OrderedDict.fromkeys(user_ids))
+        results = map_concurrently(get_user_entry, user_ids, max_workers=max_workers)
+        outcomes = OrderedDict()
+        entries = []
+        for user_id, (entry, error) in zip(user_ids, results):
+            outcomes[user_id] = error
+            if entry is not None:
+                entries.append(entry)
+        outcomes.update(
+            self._send_in_batches(
+                self._post_add_users,
+                rule_id,
+                entries,
+                lambda entry: entry[u"userIdFromAuthority"],
+                max_workers,
+            )
+        )
+        return outcomes
+
+    def remove_users(self, rule_id, user_ids, max_workers=None):
+        """Removes any number of users from a rule in concurrent batches and returns an ordered
+        dict mapping each user ID to None if it was removed or to the error message of its batch
+        if it was not.
+        """
+        user_ids = list(OrderedDict.fromkeys(user_ids))
+        return self._send_in_batches(
+            self._post_remove_users,
+            rule_id,
+            user_ids,
+            lambda user_id: user_id,
+            max_workers,
+        )
+
+    def sync_users(self, rule_id, user_ids, current_user_ids, max_workers=None):
+        """Adds the users in `user_ids` that are not in `current_user_ids` to a rule and removes
+        the users in `current_user_ids` that are not in `user_ids` from it. Returns an ordered
+        dict mapping each added or removed user ID to None or to an error message.
+        """
+        user_ids = list(OrderedDict.fromkeys(user_ids))
+        current_user_ids = list(OrderedDict.fromkeys(current_user_ids))
+        wanted = set(user_ids)
+        current = set(current_user_ids)
+        outcomes = OrderedDict()
+        to_add = [user_id for user_id in user_ids if user_id not in current]
+        if to_add:
+            outcomes.update(self.add_users(rule_id, to_add, max_workers=max_workers))
+        to_remove = [user_id for user_id in current_user_ids if user_id not in wanted]
+        if to_remove:
+            outcomes.update(
+                self.remove_users(rule_id, to_remove, max_workers=max_workers)
+            )
+        return outcomes
+
+    def _get_user_entry(self, user_id):
         user_details = self._detection_list_user_client.get_by_id(user_id)
-        user_aliases = user_details["cloudUsernames"] or []
-        data = {
-            u"tenantId": tenant_id,
-            u"ruleId": rule_id,
-            u"userList": [
-                {u"userIdFromAuthority": user_id, u"userAliasList": user_aliases}
-            ],
-        }
+        user_aliases = user_details[u"cloudUsernames"] or []
+        return {u"userIdFromAuthority": user_id, u"userAliasList": user_aliases}
+
+    def _post_add_users(self, rule_id, user_list):
+        tenant_id = self._user_context.get_current_tenant_id()
+        data = {u"tenantId": tenant_id, u"ruleId": rule_id, u"userList": user_list}
         uri = u"{}{}".format(self._api_prefix, u"add-users")
         return self._session.post(uri, data=json.dumps(data))
 
-    def remove_user(self, rule_id, user_id):
-        user_ids = [user_id]
+    def _post_remove_users(self, rule_id, user_ids):
         tenant_id = self._user_context.get_current_tenant_id()
         data = {u"tenantId": tenant_id, u"ruleId": rule_id, u"userIdList": user_ids}
         uri = u"{}{}".format(self._api_prefix, u"remove-users")
         return self._session.post(uri, data=json.dumps(data))
 
+    def _send_in_batches(self, post, rule_id, items, get_user_id, max_workers):
+        def send_batch(batch):
+            try:
+                post(rule_id, batch)
+            except (Py42Error, RequestException) as err:
+                return u"{}".format(err)
+            return None
+
+        batches = split_into_batches(items, self.USERS_BATCH_SIZE)
+        errors = map_concurrently(send_batch, batches, max_workers=max_workers)
+        outcomes = OrderedDict()
+        for batch, error in zip(batches, errors):
+            for item in batch:
+                outcomes[get_user_id(item)] = error
+        return outcomes
+
     def remove_all_users(self, rule_id):
         tenant_id = self._user_context.get_current_tenant_id()
         data = {u"tenantId": tenant_id, u"ruleId": rule_id}
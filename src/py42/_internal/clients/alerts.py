@@ -1,10 +1,22 @@
 import json
+from collections import OrderedDict
+
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import RequestException
+from requests.exceptions import Timeout
 
 from py42 import settings
 from py42._internal.compat import str
+from py42._internal.concurrency import call_with_backoff
+from py42._internal.concurrency import iter_prefetched
+from py42._internal.concurrency import map_concurrently
+from py42._internal.concurrency import split_into_batches
 from py42.clients import BaseClient
 from py42.clients.util import get_all_pages
+from py42.exceptions import Py42Error
+from py42.exceptions import Py42InternalServerError
 from py42.sdk.queries.query_filter import create_eq_filter_group
+from py42.sdk.queries.query_filter import create_on_or_before_filter_group
 
 
 class AlertClient(BaseClient):
@@ -12,6 +24,12 @@ class AlertClient(BaseClient):
 
     _CREATED_AT = u"CreatedAt"
     _RULE_METADATA = u"ruleMetadata"
+    _ALERTS = u"alerts"
+
+    # the most alert IDs sent in one query-details, resolve-alert or reopen-alert request
+    DETAILS_BATCH_SIZE = 100
+    STATE_CHANGE_BATCH_SIZE = 100
+    STATE_CHANGE_MAX_RETRIES = 3
 
     def __init__(self, session, user_context):
         super(AlertClient, self).__init__(session)
@@ -22,14 +40,78 @@ class AlertClient(BaseClient):
         uri = self._uri_prefix.format(u"query-alerts")
         return self._session.post(uri, data=query)
 
-    def get_details(self, alert_ids):
+    def search_all(self, query, max_workers=None):
+        """Yields every alert matching `query`, starting at its page number and requesting the
+        pages after it concurrently.
+
+        When the query is sorted by newest ``CreatedAt`` first, the search is pinned to the
+        alerts created up to the newest one on the first page, so alerts created during the scan
+        do not shift later pages. Alerts that still show up on two pages are yielded once.
+        """
+        query_dict = json.loads(self._add_tenant_id_if_missing(query))
+        page_size = query_dict[u"pgSize"]
+        first_page_number = query_dict[u"pgNum"]
+        first_page = self._search_page(query_dict, first_page_number)
+        first_alerts = first_page[self._ALERTS] or []
+        if first_alerts and _is_newest_first(query_dict):
+            query_dict = _pin_to_created_at(query_dict, first_alerts[0][u"createdAt"])
+
+        seen_ids = set()
+
+        def get_new_alerts(alerts):
+            new_alerts = [alert for alert in alerts if alert[u"id"] not in seen_ids]
+            seen_ids.update(alert[u"id"] for alert in new_alerts)
+            return new_alerts
+
+        for alert in get_new_alerts(first_alerts):
+            yield alert
+        if len(first_alerts) < page_size:
+            return
+
+        def get_page_alerts(page_number):
+            return self._search_page(query_dict, page_number)[self._ALERTS] or []
+
+        # page counts start at the first page's total, but alerts that share the newest
+        # createdAt can still push the last results onto the pages after it
+        total_count = first_page[u"totalCount"] or 0
+        page_count = (total_count + page_size - 1) // page_size
+        page_number = first_page_number + max(page_count, 1)
+        alerts = first_alerts
+        for alerts in iter_prefetched(
+            get_page_alerts,
+            range(first_page_number + 1, page_number),
+            max_workers=max_workers,
+        ):
+            for alert in get_new_alerts(alerts):
+                yield alert
+            if len(alerts) < page_size:
+                return
+        while len(alerts) == page_size:
+            alerts = get_page_alerts(page_number)
+            for alert in get_new_alerts(alerts):
+                yield alert
+            page_number += 1
+
+    def get_details(self, alert_ids, max_workers=None):
         if not isinstance(alert_ids, (list, tuple)):
             alert_ids = [alert_ids]
+        # an empty list of IDs is still sent, as before the IDs were split into batches
+        batches = split_into_batches(alert_ids, self.DETAILS_BATCH_SIZE) or [[]]
+        responses = map_concurrently(
+            self._get_details_batch, batches, max_workers=max_workers
+        )
+        results = responses[0]
+        if len(responses) > 1:
+            results[self._ALERTS] = [
+                alert for response in responses for alert in response[self._ALERTS]
+            ]
+        return _convert_observation_json_strings_to_objects(results)
+
+    def _get_details_batch(self, alert_ids):
         tenant_id = self._user_context.get_current_tenant_id()
         uri = self._uri_prefix.format(u"query-details")
         data = {u"tenantId": tenant_id, u"alertIds": alert_ids}
-        results = self._session.post(uri, data=json.dumps(data))
-        return _convert_observation_json_strings_to_objects(results)
+        return self._session.post(uri, data=json.dumps(data))
 
     def resolve(self, alert_ids, reason=None):
         if not isinstance(alert_ids, (list, tuple)):
@@ -48,6 +130,50 @@ class AlertClient(BaseClient):
         data = {u"tenantId": tenant_id, u"alertIds": alert_ids, u"reason": reason}
         return self._session.post(uri, data=json.dumps(data))
 
+    def _search_page(self, query_dict, page_number):
+        query_dict = dict(query_dict, pgNum=page_number)
+        uri = self._uri_prefix.format(u"query-alerts")
+        return self._session.post(uri, data=json.dumps(query_dict))
+
+    def bulk_resolve(self, alert_ids, reason=None, max_workers=None):
+        """Resolves any number of alerts in concurrent batches and returns an ordered dict
+        mapping each ID to None if its batch succeeded or to the error message if it failed.
+        Batches that fail with a server error are retried with a growing delay first.
+        """
+        return self._change_state_in_batches(
+            self.resolve, alert_ids, reason, max_workers
+        )
+
+    def bulk_reopen(self, alert_ids, reason=None, max_workers=None):
+        """Reopens any number of alerts in concurrent batches and returns an ordered dict
+        mapping each ID to None if its batch succeeded or to the error message if it failed.
+        Batches that fail with a server error are retried with a growing delay first.
+        """
+        return self._change_state_in_batches(
+            self.reopen, alert_ids, reason, max_workers
+        )
+
+    def _change_state_in_batches(self, change_state, alert_ids, reason, max_workers):
+        def change_batch_state(batch):
+            try:
+                call_with_backoff(
+                    lambda: change_state(batch, reason=reason),
+                    _is_retryable_error,
+                    max_retries=self.STATE_CHANGE_MAX_RETRIES,
+                )
+            except (Py42Error, RequestException) as err:
+                return u"{}".format(err)
+            return None
+
+        alert_ids = list(OrderedDict.fromkeys(alert_ids))
+        batches = split_into_batches(alert_ids, self.STATE_CHANGE_BATCH_SIZE)
+        errors = map_concurrently(change_batch_state, batches, max_workers=max_workers)
+        outcomes = OrderedDict()
+        for batch, error in zip(batches, errors):
+            for alert_id in batch:
+                outcomes[alert_id] = error
+        return outcomes
+
     def _add_tenant_id_if_missing(self, query):
         query_dict = json.loads(str(query))
         tenant_id = query_dict.get(u"tenantId", None)
@@ -110,12 +236,89 @@ class AlertClient(BaseClient):
         return next(results)
 
 
+def _is_retryable_error(error):
+    if isinstance(error, (Py42InternalServerError, RequestsConnectionError, Timeout)):
+        return True
+    response = getattr(error, u"response", None)
+    # too many requests
+    return response is not None and response.status_code == 429
+
+
+def _is_newest_first(query_dict):
+    return (
+        query_dict.get(u"srtKey", u"").lower() == u"createdat"
+        and query_dict.get(u"srtDirection", u"").lower() == u"desc"
+    )
+
+
+def _pin_to_created_at(query_dict, created_at):
+    groups = query_dict[u"groups"]
+    if len(groups) > 1 and query_dict[u"groupClause"] != u"AND":
+        # the cutoff cannot be combined with groups that are joined by OR
+        return query_dict
+    cutoff = create_on_or_before_filter_group(u"createdAt", created_at)
+    return dict(query_dict, groupClause=u"AND", groups=groups + [dict(cutoff)])
+
+
 def _convert_observation_json_strings_to_objects(results):
     for alert in results[u"alerts"]:
         if u"observations" in alert:
-            for observation in alert[u"observations"]:
-                try:
-                    observation[u"data"] = json.loads(observation[u"data"])
-                except Exception:
-                    continue
+            alert[u"observations"] = [
+                _LazyObservation(observation) for observation in alert[u"observations"]
+            ]
     return results
+
+
+class _LazyObservation(dict):
+    """An alert observation whose JSON ``data`` string is only decoded the first time it is
+    read, since callers often only look at the alerts themselves."""
+
+    def __init__(self, observation):
+        super(_LazyObservation, self).__init__(observation)
+        self._is_decoded = u"data" not in observation
+
+    def __getitem__(self, key):
+        if key == u"data":
+            self._decode()
+        return super(_LazyObservation, self).__getitem__(key)
+
+    def __iter__(self):
+        # makes dict() and update() copy through __getitem__ rather than the raw storage
+        return iter(list(super(_LazyObservation, self).keys()))
+
+    def __eq__(self, other):
+        self._decode()
+        return super(_LazyObservation, self).__eq__(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        self._decode()
+        return super(_LazyObservation, self).__repr__()
+
+    def get(self, key, default=None):
+        if key == u"data":
+            self._decode()
+        return super(_LazyObservation, self).get(key, default)
+
+    def copy(self):
+        return dict(self)
+
+    def items(self):
+        self._decode()
+        return super(_LazyObservation, self).items()
+
+    def values(self):
+        self._decode()
+        return super(_LazyObservation, self).values()
+
+    def _decode(self):
+        if self._is_decoded:
+            return
+        self._is_decoded = True
+        data = super(_LazyObservation, self).__getitem__(u"data")
+        try:
+            self[u"data"] = json.loads(data)
+        except Exception:
+            pass
@@ -1,7 +1,12 @@
 import json
+from collections import OrderedDict
 
+from requests.exceptions import RequestException
+
+from py42._internal.concurrency import map_concurrently
 from py42.clients import BaseClient
 from py42.exceptions import Py42BadRequestError
+from py42.exceptions import Py42Error
 from py42.exceptions import Py42NotFoundError
 
 
@@ -43,6 +48,33 @@ class DetectionListUserClient(BaseClient):
             self.create(user[u"username"])
         return True
 
+    def create_many_if_not_exists(self, user_ids, max_workers=None):
+        """Makes sure that each of the given users has a detection list profile, checking for
+        the profiles and creating the missing ones concurrently.
+
+        Args:
+            user_ids (iter[str]): Uids of users.
+            max_workers (int, optional): The most users to check or create at once.
+                Defaults to 10.
+
+        Returns:
+            OrderedDict: Maps each user ID to None if the user has a profile or to an error
+            message if one could not be created.
+        """
+
+        def create_if_not_exists(user_id):
+            try:
+                self.create_if_not_exists(user_id)
+            except (Py42Error, RequestException) as err:
+                return u"{}".format(err)
+            return None
+
+        user_ids = list(OrderedDict.fromkeys(user_ids))
+        errors = map_concurrently(
+            create_if_not_exists, user_ids, max_workers=max_workers
+        )
+        return OrderedDict(zip(user_ids, errors))
+
     def create(self, username):
         """Create a detection list profile for a user.
 
@@ -9,6 +9,10 @@ class StorageClient(BaseClient):
         self._archive_client = StorageArchiveClient(session)
         self._security_client = StorageSecurityClient(session)
 
+    @property
+    def host_address(self):
+        return self._session.host_address
+
     @property
     def archive(self):
         return self._archive_client
@@ -30,9 +34,9 @@ class StorageClientFactory(object):
         session = self._storage_session_manager.get_storage_session(token_provider)
         return StorageClient(session)
 
-    def from_plan_info(self, plan_uid, destination_guid):
+    def from_plan_info(self, plan_uid, destination_guid, timeout=None):
         token_provider = self._token_provider_factory.create_security_archive_locator(
-            plan_uid, destination_guid
+            plan_uid, destination_guid, timeout=timeout
         )
         session = self._storage_session_manager.get_storage_session(token_provider)
         return StorageClient(session)
@@ -90,3 +90,14 @@ class StorageSecurityClient(BaseClient):
             max_timestamp=max_timestamp,
             summarize=True,
         )
+
+    def get_plan_security_event_summary(
+        self, plan_uid, cursor=None, min_timestamp=None, max_timestamp=None
+    ):
+        return self._get_security_detection_events(
+            plan_uid=plan_uid,
+            cursor=cursor,
+            min_timestamp=min_timestamp,
+            max_timestamp=max_timestamp,
+            summarize=True,
+        )
@@ -18,8 +18,15 @@ if is_py2:
 
     import repr as reprlib
 
+    import Queue as queue
+
+    # not atomic on Windows when the target exists, which Python 2 cannot do
+    from os import rename as replace_file
+
     string_type = basestring
 
+    integer_types = (int, long)
+
 else:
     from urllib.parse import urljoin, urlparse, quote
 
@@ -27,4 +34,10 @@ else:
 
     import reprlib
 
+    import queue
+
+    from os import replace as replace_file
+
     string_type = str
+
+    integer_types = (int,)
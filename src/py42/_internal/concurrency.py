@@ -0,0 +1,176 @@
+"""
+Helpers for running independent API calls on a bounded pool of threads.
+"""
+import itertools
+import time
+from collections import deque
+from concurrent.futures import as_completed
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from threading import Lock
+
+from py42._internal.compat import queue
+
+# requests' connection pools (see Py42Session) hold 20 connections per host
+DEFAULT_MAX_WORKERS = 10
+
+# how many produced values may wait for the consumer of `iter_merged` before producers block
+DEFAULT_BUFFER_SIZE = 20
+
+_STOP_CHECK_INTERVAL_SECONDS = 0.1
+_DONE = object()
+
+
+def split_into_batches(items, batch_size):
+    """Returns `items` as a list of lists holding at most `batch_size` items each."""
+    items = list(items)
+    batches = []
+    for start in range(0, len(items), batch_size):
+        end = start + batch_size
+        batches.append(items[start:end])
+    return batches
+
+
+def map_concurrently(func, items, max_workers=None):
+    """Calls `func` once for each item using a pool of threads and returns the results in the
+    same order as `items`. The first exception raised by a call is re-raised.
+    """
+    items = list(items)
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers or DEFAULT_MAX_WORKERS) as executor:
+        return list(executor.map(func, items))
+
+
+def iter_completed(func, items, max_workers=None):
+    """Calls `func` once for each item using a pool of threads and yields `(item, future)` tuples
+    in the order the calls complete. Calling `future.result()` returns the value or re-raises the
+    exception of that call.
+
+    Calls that have not started yet are cancelled when the generator is closed, which makes it
+    suitable for racing several equivalent requests and keeping only the first useful answer.
+    """
+    items = list(items)
+    if not items:
+        return
+    executor = ThreadPoolExecutor(max_workers=max_workers or DEFAULT_MAX_WORKERS)
+    futures = {executor.submit(func, item): item for item in items}
+    try:
+        for future in as_completed(futures):
+            yield futures[future], future
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def iter_merged(func, items, max_workers=None, buffer_size=None):
+    """Calls `func`, which returns an iterable such as a generator of response pages, once for
+    each item using a pool of threads and yields `(item, value)` tuples as the values are
+    produced. Values produced for the same item keep their order.
+
+    The first exception raised while iterating is re-raised. When that happens, or when the
+    generator is closed, the remaining iterables are abandoned before their next value.
+    """
+    items = list(items)
+    if not items:
+        return
+    results = queue.Queue(maxsize=buffer_size or DEFAULT_BUFFER_SIZE)
+    stopped = Event()
+
+    def put(entry):
+        while not stopped.is_set():
+            try:
+                results.put(entry, timeout=_STOP_CHECK_INTERVAL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce(item):
+        if stopped.is_set():
+            return
+        try:
+            for value in func(item):
+                if not put((item, value, None)):
+                    return
+        except Exception as err:
+            put((item, None, err))
+            return
+        put((item, _DONE, None))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or DEFAULT_MAX_WORKERS)
+    for item in items:
+        executor.submit(produce, item)
+    remaining = len(items)
+    try:
+        while remaining:
+            item, value, error = results.get()
+            if error is not None:
+                raise error
+            if value is _DONE:
+                remaining -= 1
+                continue
+            yield item, value
+    finally:
+        stopped.set()
+        executor.shutdown(wait=False)
+
+
+class RateLimiter(object):
+    """Spaces out the calls to `wait` made from any number of threads so that at most `rate`
+    of them return per second.
+    """
+
+    def __init__(self, rate):
+        self._interval = 1.0 / rate
+        self._next_time = 0
+        self._lock = Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.time()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self._interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def iter_prefetched(func, items, max_workers=None):
+    """Calls `func` once for each item using a pool of threads and yields the results in the
+    same order as `items`, keeping up to `max_workers` calls running ahead of the consumer.
+    `items` may be endless; it is only read as far as needed. Calls that have not started are
+    cancelled when the generator is closed, and the first exception raised is re-raised.
+    """
+    max_workers = max_workers or DEFAULT_MAX_WORKERS
+    items = iter(items)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending = deque()
+    try:
+        for item in itertools.islice(items, max_workers):
+            pending.append(executor.submit(func, item))
+        while pending:
+            result = pending.popleft().result()
+            for item in itertools.islice(items, 1):
+                pending.append(executor.submit(func, item))
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def call_with_backoff(func, should_retry, max_retries=3, initial_delay=0.5):
+    """Calls `func` and returns its result. When it raises an exception for which
+    `should_retry(exception)` is True, it is called again after a delay that doubles each time,
+    up to `max_retries` more times, before the last exception is re-raised.
+    """
+    delay = initial_delay
+    for attempt in itertools.count():
+        try:
+            return func()
+        except Exception as err:
+            if attempt >= max_retries or not should_retry(err):
+                raise
+        time.sleep(delay)
+        delay *= 2
@@ -0,0 +1,247 @@
+"""
+Brings the detection lists and the detection list profiles of users in line with a desired
+state, sending only the changes.
+"""
+from collections import OrderedDict
+
+from requests.exceptions import RequestException
+
+from py42._internal.concurrency import map_concurrently
+from py42.exceptions import Py42Error
+
+ADD_DEPARTING_EMPLOYEE = u"add_departing_employee"
+REMOVE_DEPARTING_EMPLOYEE = u"remove_departing_employee"
+UPDATE_DEPARTURE_DATE = u"update_departure_date"
+ADD_HIGH_RISK_EMPLOYEE = u"add_high_risk_employee"
+REMOVE_HIGH_RISK_EMPLOYEE = u"remove_high_risk_employee"
+ADD_RISK_TAGS = u"add_risk_tags"
+REMOVE_RISK_TAGS = u"remove_risk_tags"
+ADD_CLOUD_ALIASES = u"add_cloud_aliases"
+REMOVE_CLOUD_ALIASES = u"remove_cloud_aliases"
+GET_PROFILE = u"get_profile"
+
+_ITEMS = u"items"
+_USER_NAME = u"userName"
+_RISK_FACTORS = u"riskFactors"
+_CLOUD_USERNAMES = u"cloudUsernames"
+
+# the errors of a single change that are reported instead of stopping the sync
+_CHANGE_ERRORS = (Py42Error, RequestException)
+
+
+class DetectionListSync(object):
+    """Compares the desired members of the detection lists and the desired risk tags and cloud
+    aliases of users with their current ones, read from the paginated list searches, and
+    applies the differences concurrently.
+
+    List memberships and departure dates are changed first, since adding a user to a list
+    creates the user's profile, and then the risk tags and cloud aliases are.
+    """
+
+    def __init__(
+        self,
+        departing_employee_client,
+        high_risk_employee_client,
+        detection_list_user_client,
+        max_workers=None,
+    ):
+        self._departing_employee_client = departing_employee_client
+        self._high_risk_employee_client = high_risk_employee_client
+        self._detection_list_user_client = detection_list_user_client
+        self._max_workers = max_workers
+
+    def sync(
+        self,
+        departing_employees=None,
+        high_risk_employees=None,
+        risk_tags=None,
+        cloud_aliases=None,
+    ):
+        """Returns an ordered dict mapping a `(user_id, change)` tuple for each change made to
+        None if it succeeded or to an error message if it did not."""
+        profiles = {}
+        outcomes = OrderedDict()
+        changes = []
+        if departing_employees is not None:
+            current = _get_members(self._departing_employee_client, profiles)
+            outcomes.update(
+                self._sync_departing_employees(departing_employees, current, changes)
+            )
+        if high_risk_employees is not None:
+            current = _get_members(self._high_risk_employee_client, profiles)
+            outcomes.update(
+                self._sync_high_risk_employees(high_risk_employees, current, changes)
+            )
+        outcomes.update(self._apply(changes))
+
+        users = list(
+            OrderedDict.fromkeys(list(risk_tags or {}) + list(cloud_aliases or {}))
+        )
+        self._get_missing_profiles(
+            [user_id for user_id in users if user_id not in profiles], profiles
+        )
+        changes = []
+        for user_id, tags in (risk_tags or {}).items():
+            self._add_risk_tag_changes(user_id, tags, profiles[user_id], changes)
+        for user_id, aliases in (cloud_aliases or {}).items():
+            self._add_cloud_alias_changes(user_id, aliases, profiles[user_id], changes)
+        for user_id in users:
+            if isinstance(profiles[user_id], _CHANGE_ERRORS):
+                outcomes[(user_id, GET_PROFILE)] = u"{}".format(profiles[user_id])
+        outcomes.update(self._apply(changes))
+        return outcomes
+
+    def _sync_departing_employees(self, departing_employees, current, changes):
+        client = self._departing_employee_client
+        to_add = OrderedDict()
+        for user_id, departure_date in departing_employees.items():
+            if user_id not in current:
+                to_add[user_id] = departure_date
+            elif current[user_id].get(u"departureDate") != departure_date:
+                changes.append(
+                    (
+                        (user_id, UPDATE_DEPARTURE_DATE),
+                        _bind(client.update_departure_date, user_id, departure_date),
+                    )
+                )
+        for user_id in current:
+            if user_id not in departing_employees:
+                changes.append(
+                    (
+                        (user_id, REMOVE_DEPARTING_EMPLOYEE),
+                        _bind(client.remove, user_id),
+                    )
+                )
+        return self._add_many(
+            ADD_DEPARTING_EMPLOYEE,
+            lambda user_ids: client.add_many(
+                user_ids, departure_dates=to_add, max_workers=self._max_workers
+            ),
+            list(to_add),
+        )
+
+    def _sync_high_risk_employees(self, high_risk_employees, current, changes):
+        client = self._high_risk_employee_client
+        high_risk_employees = list(OrderedDict.fromkeys(high_risk_employees))
+        wanted = set(high_risk_employees)
+        for user_id in current:
+            if user_id not in wanted:
+                changes.append(
+                    (
+                        (user_id, REMOVE_HIGH_RISK_EMPLOYEE),
+                        _bind(client.remove, user_id),
+                    )
+                )
+        return self._add_many(
+            ADD_HIGH_RISK_EMPLOYEE,
+            lambda user_ids: client.add_many(user_ids, max_workers=self._max_workers),
+            [user_id for user_id in high_risk_employees if user_id not in current],
+        )
+
+    def _add_many(self, change, add_many, user_ids):
+        if not user_ids:
+            return OrderedDict()
+        return OrderedDict(
+            ((user_id, change), error) for user_id, error in add_many(user_ids).items()
+        )
+
+    def _add_risk_tag_changes(self, user_id, tags, profile, changes):
+        if isinstance(profile, _CHANGE_ERRORS):
+            return
+        client = self._detection_list_user_client
+        current = profile.get(_RISK_FACTORS) or []
+        to_add = [tag for tag in tags if tag not in current]
+        to_remove = [tag for tag in current if tag not in tags]
+        if to_add:
+            changes.append(
+                ((user_id, ADD_RISK_TAGS), _bind(client.add_risk_tags, user_id, to_add))
+            )
+        if to_remove:
+            changes.append(
+                (
+                    (user_id, REMOVE_RISK_TAGS),
+                    _bind(client.remove_risk_tags, user_id, to_remove),
+                )
+            )
+
+    def _add_cloud_alias_changes(self, user_id, aliases, profile, changes):
+        if isinstance(profile, _CHANGE_ERRORS):
+            return
+        client = self._detection_list_user_client
+        current = profile.get(_CLOUD_USERNAMES) or []
+        to_add = [alias for alias in aliases if alias not in current]
+        # the username is always one of the user's aliases and cannot be removed
+        to_remove = [
+            alias
+            for alias in current
+            if alias not in aliases and alias != profile.get(_USER_NAME)
+        ]
+        if to_add:
+            changes.append(
+                (
+                    (user_id, ADD_CLOUD_ALIASES),
+                    _bind_each(client.add_cloud_alias, user_id, to_add),
+                )
+            )
+        if to_remove:
+            changes.append(
+                (
+                    (user_id, REMOVE_CLOUD_ALIASES),
+                    _bind_each(client.remove_cloud_alias, user_id, to_remove),
+                )
+            )
+
+    def _get_missing_profiles(self, user_ids, profiles):
+        def get_profile(user_id):
+            try:
+                response = self._detection_list_user_client.get_by_id(user_id)
+            except _CHANGE_ERRORS as err:
+                return err
+            return _to_profile(response)
+
+        results = map_concurrently(get_profile, user_ids, max_workers=self._max_workers)
+        profiles.update(zip(user_ids, results))
+
+    def _apply(self, changes):
+        def apply(change):
+            try:
+                change[1]()
+            except _CHANGE_ERRORS as err:
+                return u"{}".format(err)
+            return None
+
+        errors = map_concurrently(apply, changes, max_workers=self._max_workers)
+        return OrderedDict((change[0], error) for change, error in zip(changes, errors))
+
+
+def _get_members(list_client, profiles):
+    members = OrderedDict()
+    for page in list_client.get_all():
+        for item in page[_ITEMS]:
+            members[item[u"userId"]] = item
+            # list items carry the profile fields that a sync compares
+            if _RISK_FACTORS in item and _CLOUD_USERNAMES in item:
+                profiles.setdefault(item[u"userId"], item)
+    return members
+
+
+def _to_profile(response):
+    profile = {}
+    for key in (_USER_NAME, _RISK_FACTORS, _CLOUD_USERNAMES):
+        try:
+            profile[key] = response[key]
+        except KeyError:
+            pass
+    return profile
+
+
+def _bind(func, *args):
+    return lambda: func(*args)
+
+
+def _bind_each(func, user_id, values):
+    def call():
+        for value in values:
+            func(user_id, value)
+
+    return call
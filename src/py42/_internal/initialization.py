@@ -55,7 +55,7 @@ class SDKDependencies(object):
 
         # modules (feature sets that combine info from multiple clients)
         self.archive_module = archive_module.ArchiveModule(
-            archive_accessor_manager, self.archive_client
+            archive_accessor_manager, self.archive_client, self.device_client
         )
         self.security_module = sec_module.SecurityModule(
             self.security_client,
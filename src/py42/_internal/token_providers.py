@@ -81,16 +81,19 @@ class C42APILoginTokenProvider(C42APITmpAuthProvider):
 
 
 class C42APIStorageAuthTokenProvider(C42APITmpAuthProvider):
-    def __init__(self, auth_session, plan_uid, destination_guid):
+    def __init__(self, auth_session, plan_uid, destination_guid, timeout=None):
         super(C42APIStorageAuthTokenProvider, self).__init__()
         self._auth_session = auth_session
         self._plan_uid = plan_uid
         self._destination_guid = destination_guid
+        self._timeout = timeout
 
     def get_tmp_auth_token(self):
         uri = u"/api/StorageAuthToken"
         data = {u"planUid": self._plan_uid, u"destinationGuid": self._destination_guid}
-        response = self._auth_session.post(uri, data=json.dumps(data))
+        # without a timeout of its own, the request uses the session's default
+        kwargs = {u"timeout": self._timeout} if self._timeout else {}
+        response = self._auth_session.post(uri, data=json.dumps(data), **kwargs)
         return response
 
 
@@ -100,9 +103,9 @@ class StorageTokenProviderFactory(object):
         self._security_client = security_client
         self._device_client = device_client
 
-    def create_security_archive_locator(self, plan_uid, destination_guid):
+    def create_security_archive_locator(self, plan_uid, destination_guid, timeout=None):
         return C42APIStorageAuthTokenProvider(
-            self._auth_session, plan_uid, destination_guid
+            self._auth_session, plan_uid, destination_guid, timeout=timeout
         )
 
     def create_backup_archive_locator(self, device_guid, destination_guid=None):
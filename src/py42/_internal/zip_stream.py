@@ -0,0 +1,385 @@
+"""
+Reads the entries of a zip archive, such as a zipped web restore result, from a stream as its
+bytes arrive, without seeking and without writing the archive to disk first.
+"""
+import hashlib
+import os
+import struct
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+
+from py42._internal.compat import queue
+from py42._internal.concurrency import DEFAULT_BUFFER_SIZE
+from py42._internal.concurrency import DEFAULT_MAX_WORKERS
+from py42.exceptions import Py42Error
+
+_LOCAL_FILE_HEADER_SIGNATURE = b"PK\x03\x04"
+_DATA_DESCRIPTOR_SIGNATURE = b"PK\x07\x08"
+# either of these follows the last entry
+_END_OF_ENTRIES_SIGNATURES = (b"PK\x01\x02", b"PK\x05\x06", b"PK\x06\x06")
+# the signatures that may follow a data descriptor
+_NEXT_HEADER_SIGNATURES = (_LOCAL_FILE_HEADER_SIGNATURE,) + _END_OF_ENTRIES_SIGNATURES
+
+# the fields of a local file header after its signature
+_LOCAL_FILE_HEADER = struct.Struct(u"<HHHHHIIIHH")
+_ZIP64_EXTRA_FIELD_ID = 0x0001
+_ZIP64_SIZE_PLACEHOLDER = 0xFFFFFFFF
+
+_ENCRYPTED_FLAG = 0x1
+_DATA_DESCRIPTOR_FLAG = 0x8
+_UTF8_NAMES_FLAG = 0x800
+
+_STORED = 0
+_DEFLATED = 8
+
+_READ_SIZE = 64 * 1024
+_STOP_CHECK_INTERVAL_SECONDS = 0.1
+_DONE = object()
+
+
+class ZipStreamEntry(object):
+    """A file in a zip archive being read from a stream. Its content can only be read while it
+    is the current entry; moving on to the next entry skips whatever was not read.
+    """
+
+    def __init__(self, buffer, path, flags, method, crc, compressed_size, size, zip64):
+        self.path = path
+        self.size = None if flags & _DATA_DESCRIPTOR_FLAG else size
+        self._buffer = buffer
+        self._flags = flags
+        self._method = method
+        self._crc = crc
+        self._compressed_size = compressed_size
+        self._zip64 = zip64
+        self._chunks = self._iter_content()
+        self._pending = b""
+
+    @property
+    def is_directory(self):
+        return self.path.endswith(u"/")
+
+    def __iter__(self):
+        if self._pending:
+            pending = self._pending
+            self._pending = b""
+            yield pending
+        for chunk in self._chunks:
+            yield chunk
+
+    def read(self, size=-1):
+        """Reads up to `size` bytes of the entry's content, or all of it if `size` is negative.
+        Returns an empty bytes object at the end of the entry.
+        """
+        parts = [self._pending]
+        length = len(self._pending)
+        while size < 0 or length < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            parts.append(chunk)
+            length += len(chunk)
+        data = b"".join(parts)
+        if size < 0:
+            self._pending = b""
+            return data
+        self._pending = data[size:]
+        return data[:size]
+
+    def skip(self):
+        """Reads and discards the rest of the entry's content."""
+        self._pending = b""
+        for _ in self._chunks:
+            pass
+
+    def _iter_content(self):
+        crc = 0
+        if self._method == _STORED:
+            chunks = self._iter_stored()
+        else:
+            chunks = self._iter_deflated()
+        for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+            yield chunk
+
+        if self._flags & _DATA_DESCRIPTOR_FLAG:
+            self._crc = self._read_data_descriptor()
+        if crc & 0xFFFFFFFF != self._crc:
+            raise Py42Error(u"Zip entry {} is corrupt.".format(self.path))
+
+    def _iter_stored(self):
+        if self._flags & _DATA_DESCRIPTOR_FLAG:
+            # nothing marks the end of stored content whose size is not known up front
+            raise Py42Error(
+                u"Zip entry {} cannot be read from a stream.".format(self.path)
+            )
+        remaining = self._compressed_size
+        while remaining:
+            chunk = self._buffer.read_some(min(remaining, _READ_SIZE))
+            if not chunk:
+                raise Py42Error(u"Zip entry {} is truncated.".format(self.path))
+            remaining -= len(chunk)
+            yield chunk
+
+    def _iter_deflated(self):
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        is_size_known = not self._flags & _DATA_DESCRIPTOR_FLAG
+        remaining = self._compressed_size
+        while not (is_size_known and not remaining):
+            max_size = min(remaining, _READ_SIZE) if is_size_known else _READ_SIZE
+            compressed = self._buffer.read_some(max_size)
+            if not compressed:
+                raise Py42Error(u"Zip entry {} is truncated.".format(self.path))
+            remaining -= len(compressed)
+            chunk = decompressor.decompress(compressed)
+            if chunk:
+                yield chunk
+            if decompressor.unused_data or getattr(decompressor, u"eof", False):
+                # the bytes after the end of the compressed data belong to what follows it
+                self._buffer.unread(decompressor.unused_data)
+                break
+        chunk = decompressor.flush()
+        if chunk:
+            yield chunk
+
+    def _read_data_descriptor(self):
+        signature = self._buffer.read_exact(4)
+        if signature != _DATA_DESCRIPTOR_SIGNATURE:
+            # the signature is optional, so these bytes were the CRC
+            crc = signature
+        else:
+            crc = self._buffer.read_exact(4)
+        self._buffer.read_exact(8)
+        # streaming writers such as Java's write 8 byte sizes for large entries without a zip64
+        # extra field, so 4 byte sizes are only assumed when the next header follows them
+        following = self._buffer.peek(4)
+        if self._zip64 or (following and following not in _NEXT_HEADER_SIGNATURES):
+            self._buffer.read_exact(8)
+        return struct.unpack(u"<I", crc)[0]
+
+
+class ZipStreamReader(object):
+    """Reads the entries of a zip archive from an iterable of bytes chunks."""
+
+    def __init__(self, chunks):
+        self._buffer = _ChunkBuffer(chunks)
+
+    def iter_entries(self, entry_filter=None):
+        """Yields a `(path, entry)` tuple for each file in the archive as its header arrives,
+        skipping directories and the files for which `entry_filter(path)` is False. Each entry
+        is a file-like :class:`ZipStreamEntry` that has to be read before asking for the next
+        one.
+        """
+        while True:
+            entry = self._read_entry()
+            if entry is None:
+                return
+            if not entry.is_directory and (
+                entry_filter is None or entry_filter(entry.path)
+            ):
+                yield entry.path, entry
+            entry.skip()
+
+    def _read_entry(self):
+        signature = self._buffer.read_some(4)
+        if not signature:
+            return None
+        signature += self._buffer.read_exact(4 - len(signature))
+        if signature in _END_OF_ENTRIES_SIGNATURES:
+            return None
+        if signature != _LOCAL_FILE_HEADER_SIGNATURE:
+            raise Py42Error(u"The stream is not a zip archive.")
+
+        header = self._buffer.read_exact(_LOCAL_FILE_HEADER.size)
+        (
+            _,
+            flags,
+            method,
+            _,
+            _,
+            crc,
+            compressed_size,
+            size,
+            name_length,
+            extra_length,
+        ) = _LOCAL_FILE_HEADER.unpack(header)
+        name = self._buffer.read_exact(name_length)
+        extra = self._buffer.read_exact(extra_length)
+        path = name.decode(u"utf-8" if flags & _UTF8_NAMES_FLAG else u"cp437")
+
+        if flags & _ENCRYPTED_FLAG:
+            raise Py42Error(u"Zip entry {} is encrypted.".format(path))
+        if method not in (_STORED, _DEFLATED):
+            raise Py42Error(
+                u"Zip entry {} uses unsupported compression method {}.".format(
+                    path, method
+                )
+            )
+
+        zip64 = _get_zip64_extra_field(extra)
+        if zip64 is not None:
+            if size == _ZIP64_SIZE_PLACEHOLDER:
+                size, zip64 = _unpack_zip64_size(zip64)
+            if compressed_size == _ZIP64_SIZE_PLACEHOLDER:
+                compressed_size, zip64 = _unpack_zip64_size(zip64)
+        return ZipStreamEntry(
+            self._buffer,
+            path,
+            flags,
+            method,
+            crc,
+            compressed_size,
+            size,
+            zip64 is not None,
+        )
+
+
+class _ChunkBuffer(object):
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._pending = b""
+
+    def read_some(self, max_size):
+        # returns between 1 and `max_size` bytes, or no bytes at the end of the stream
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return b""
+            self._pending = bytes(chunk)
+        data = self._pending[:max_size]
+        self._pending = self._pending[max_size:]
+        return data
+
+    def read_exact(self, size):
+        parts = []
+        remaining = size
+        while remaining:
+            data = self.read_some(remaining)
+            if not data:
+                raise Py42Error(u"The zip archive is truncated.")
+            parts.append(data)
+            remaining -= len(data)
+        return b"".join(parts)
+
+    def unread(self, data):
+        self._pending = data + self._pending
+
+    def peek(self, size):
+        # returns up to `size` bytes without consuming them
+        parts = []
+        remaining = size
+        while remaining:
+            data = self.read_some(remaining)
+            if not data:
+                break
+            parts.append(data)
+            remaining -= len(data)
+        data = b"".join(parts)
+        self.unread(data)
+        return data
+
+
+def _get_zip64_extra_field(extra):
+    while len(extra) >= 4:
+        field_id, length = struct.unpack(u"<HH", extra[:4])
+        end = 4 + length
+        if field_id == _ZIP64_EXTRA_FIELD_ID:
+            return extra[4:end]
+        extra = extra[end:]
+    return None
+
+
+def _unpack_zip64_size(zip64):
+    return struct.unpack(u"<Q", zip64[:8])[0], zip64[8:]
+
+
+def extract_entries(entries, directory, max_workers=None, buffer_size=None):
+    """Writes the `(path, entry)` tuples yielded by :meth:`ZipStreamReader.iter_entries` to
+    files under `directory`. Entries are read one after the other from the stream while a pool
+    of threads writes and hashes them, so the stream does not wait for the disk. Returns an
+    ordered dict mapping each path to a `(size, md5, sha256)` tuple.
+    """
+    stopped = Event()
+    executor = ThreadPoolExecutor(max_workers=max_workers or DEFAULT_MAX_WORKERS)
+    futures = OrderedDict()
+    try:
+        for path, entry in entries:
+            target = get_extraction_path(directory, path)
+            chunks = queue.Queue(maxsize=buffer_size or DEFAULT_BUFFER_SIZE)
+            future = executor.submit(_write_entry, target, chunks, stopped)
+            futures[path] = future
+            for chunk in entry:
+                _put_chunk(chunks, chunk, future)
+            _put_chunk(chunks, _DONE, future)
+        return OrderedDict((path, future.result()) for path, future in futures.items())
+    finally:
+        stopped.set()
+        executor.shutdown(wait=False)
+
+
+def get_extraction_path(directory, path):
+    """Returns where the zip entry at `path` is extracted to under `directory`, refusing paths
+    that would escape it."""
+    # entries written on Windows may separate their components with backslashes
+    components = [
+        component for component in path.replace(u"\\", u"/").split(u"/") if component
+    ]
+    if components and components[0].endswith(u":"):
+        # Windows drive letters become directories
+        components[0] = components[0].rstrip(u":")
+    if not components or any(
+        _is_unsafe_component(component) for component in components
+    ):
+        raise Py42Error(u"Zip entry {} has an invalid path.".format(path))
+    return os.path.join(directory, *components)
+
+
+def _is_unsafe_component(component):
+    # a component with a drive, such as C:x on Windows, would replace `directory` when joined
+    return (
+        component in (u".", u"..")
+        or os.path.isabs(component)
+        or bool(os.path.splitdrive(component)[0])
+    )
+
+
+def _put_chunk(chunks, chunk, future):
+    while True:
+        try:
+            chunks.put(chunk, timeout=_STOP_CHECK_INTERVAL_SECONDS)
+            return
+        except queue.Full:
+            if future.done():
+                # the writer failed; this re-raises its error
+                future.result()
+
+
+def _write_entry(path, chunks, stopped):
+    parent = os.path.dirname(path)
+    if parent and not os.path.isdir(parent):
+        try:
+            os.makedirs(parent)
+        except OSError:
+            # another writer created it first
+            if not os.path.isdir(parent):
+                raise
+
+    md5 = hashlib.md5()
+    sha256 = hashlib.sha256()
+    size = 0
+    with open(path, u"wb") as file_obj:
+        while True:
+            try:
+                chunk = chunks.get(timeout=_STOP_CHECK_INTERVAL_SECONDS)
+            except queue.Empty:
+                if stopped.is_set():
+                    return None
+                continue
+            if chunk is _DONE:
+                break
+            file_obj.write(chunk)
+            md5.update(chunk)
+            sha256.update(chunk)
+            size += len(chunk)
+    return size, md5.hexdigest(), sha256.hexdigest()
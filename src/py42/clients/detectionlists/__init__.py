@@ -1,3 +1,7 @@
+from requests.exceptions import RequestException
+
+from py42._internal.concurrency import map_concurrently
+from py42.exceptions import Py42Error
 from py42.exceptions import Py42UserAlreadyAddedError
 
 _PAGE_SIZE = 100
@@ -10,6 +14,30 @@ def handle_user_already_added_error(bad_request_err, username_tried_adding, list
         )
 
 
+def add_many_to_list(detection_list_user_client, add_user, user_ids, max_workers=None):
+    """Creates the missing detection list profiles of the given users and then calls
+    `add_user(user_id)` for each user whose profile exists, both concurrently. Returns an
+    ordered dict mapping each user ID to None if the user is on the list, including when it
+    already was, or to an error message if it is not."""
+    outcomes = detection_list_user_client.create_many_if_not_exists(
+        user_ids, max_workers=max_workers
+    )
+
+    def add(user_id):
+        try:
+            add_user(user_id)
+        except Py42UserAlreadyAddedError:
+            return None
+        except (Py42Error, RequestException) as err:
+            return u"{}".format(err)
+        return None
+
+    user_ids = [user_id for user_id, error in outcomes.items() if error is None]
+    errors = map_concurrently(add, user_ids, max_workers=max_workers)
+    outcomes.update(zip(user_ids, errors))
+    return outcomes
+
+
 class _DetectionListFilters(object):
     OPEN = u"OPEN"
     EXFILTRATION_30_DAYS = u"EXFILTRATION_30_DAYS"
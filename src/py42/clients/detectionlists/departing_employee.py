@@ -3,6 +3,7 @@ import json
 from py42.clients import BaseClient
 from py42.clients.detectionlists import _DetectionListFilters
 from py42.clients.detectionlists import _PAGE_SIZE
+from py42.clients.detectionlists import add_many_to_list
 from py42.clients.detectionlists import handle_user_already_added_error
 from py42.clients.util import get_all_pages
 from py42.exceptions import Py42BadRequestError
@@ -48,20 +49,46 @@ class DepartingEmployeeClient(BaseClient):
             :class:`py42.response.Py42Response`
         """
         if self._detection_list_user_client.create_if_not_exists(user_id):
-            tenant_id = self._user_context.get_current_tenant_id()
-            data = {
-                u"tenantId": tenant_id,
-                u"userId": user_id,
-                u"departureDate": departure_date,
-            }
-            uri = self._uri_prefix.format(u"add")
-            try:
-                return self._session.post(uri, data=json.dumps(data))
-            except Py42BadRequestError as err:
-                handle_user_already_added_error(
-                    err, user_id, u"departing-employee list"
-                )
-                raise
+            return self._add(user_id, departure_date)
+
+    def add_many(self, user_ids, departure_dates=None, max_workers=None):
+        """Adds any number of users to the Departing Employees list. The users' detection list
+        profiles are checked for and the missing ones created concurrently, and the users are
+        then added concurrently. Users that are already on the list count as added.
+
+        Args:
+            user_ids (iter[str]): The Code42 userUids of the users you want to add to the
+                departing employees list.
+            departure_dates (dict, optional): Maps user IDs to departure dates in yyyy-MM-dd
+                format, treated as UTC. Users without one are added without a departure date.
+                Defaults to None.
+            max_workers (int, optional): The most requests to send at once. Defaults to 10.
+
+        Returns:
+            OrderedDict: Maps each user ID to None if the user is on the list or to an error
+            message if it is not.
+        """
+        departure_dates = departure_dates or {}
+        return add_many_to_list(
+            self._detection_list_user_client,
+            lambda user_id: self._add(user_id, departure_dates.get(user_id)),
+            user_ids,
+            max_workers=max_workers,
+        )
+
+    def _add(self, user_id, departure_date):
+        tenant_id = self._user_context.get_current_tenant_id()
+        data = {
+            u"tenantId": tenant_id,
+            u"userId": user_id,
+            u"departureDate": departure_date,
+        }
+        uri = self._uri_prefix.format(u"add")
+        try:
+            return self._session.post(uri, data=json.dumps(data))
+        except Py42BadRequestError as err:
+            handle_user_already_added_error(err, user_id, u"departing-employee list")
+            raise
 
     def get(self, user_id):
         """Gets departing employee data of a user.
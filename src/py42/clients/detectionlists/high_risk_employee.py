@@ -3,6 +3,7 @@ import json
 from py42.clients import BaseClient
 from py42.clients.detectionlists import _DetectionListFilters
 from py42.clients.detectionlists import _PAGE_SIZE
+from py42.clients.detectionlists import add_many_to_list
 from py42.clients.detectionlists import handle_user_already_added_error
 from py42.clients.util import get_all_pages
 from py42.exceptions import Py42BadRequestError
@@ -53,14 +54,37 @@ class HighRiskEmployeeClient(BaseClient):
             :class:`py42.response.Py42Response`
         """
         if self._detection_list_user_client.create_if_not_exists(user_id):
-            tenant_id = self._user_context.get_current_tenant_id()
-            try:
-                return self._add_high_risk_employee(tenant_id, user_id)
-            except Py42BadRequestError as err:
-                handle_user_already_added_error(
-                    err, user_id, u"high-risk-employee list"
-                )
-                raise
+            return self._add(user_id)
+
+    def add_many(self, user_ids, max_workers=None):
+        """Adds any number of users to the High Risk Employee detection list. The users'
+        detection list profiles are checked for and the missing ones created concurrently, and
+        the users are then added concurrently. Users that are already on the list count as
+        added.
+
+        Args:
+            user_ids (iter[str]): The Code42 userUids of the users you want to add to the High
+                Risk Employee detection list.
+            max_workers (int, optional): The most requests to send at once. Defaults to 10.
+
+        Returns:
+            OrderedDict: Maps each user ID to None if the user is on the list or to an error
+            message if it is not.
+        """
+        return add_many_to_list(
+            self._detection_list_user_client,
+            self._add,
+            user_ids,
+            max_workers=max_workers,
+        )
+
+    def _add(self, user_id):
+        tenant_id = self._user_context.get_current_tenant_id()
+        try:
+            return self._add_high_risk_employee(tenant_id, user_id)
+        except Py42BadRequestError as err:
+            handle_user_already_added_error(err, user_id, u"high-risk-employee list")
+            raise
 
     def set_alerts_enabled(self, enabled=True):
         """Enables alerts.
@@ -57,6 +57,18 @@ class Py42UserDoesNotExistError(Py42ResponseError):
         )
 
 
+class Py42RestoreTimeoutError(Py42Error):
+    """An exception raised when a web restore job does not finish in time. The job is canceled
+    before this is raised."""
+
+    def __init__(self, job_id, timeout):
+        message = u"Restore job {} did not finish within {} seconds.".format(
+            job_id, timeout
+        )
+        super(Py42RestoreTimeoutError, self).__init__(message)
+        self.job_id = job_id
+
+
 class Py42HTTPError(Py42ResponseError):
     """A base custom class to manage all HTTP errors raised by an API endpoint."""
 
@@ -1,11 +1,32 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from requests.exceptions import HTTPError
+
 from py42 import settings
+from py42._internal.alert_rule_index import AlertRuleIndex
+from py42._internal.concurrency import map_concurrently
 from py42.exceptions import Py42InternalServerError
 from py42.exceptions import Py42InvalidRuleOperationError
 
+# the rules client property that fetches the details of each type of rule
+_RULE_DETAIL_CLIENTS = {
+    u"FED_ENDPOINT_EXFILTRATION": u"exfiltration",
+    u"FED_CLOUD_SHARE_PERMISSIONS": u"cloudshare",
+    u"FED_FILE_TYPE_MISMATCH": u"filetypemismatch",
+}
+
 
 class AlertRulesModule(object):
+
+    RULE_CACHE_TTL_SECONDS = 300
+
     def __init__(self, microservice_client_factory):
         self.microservice_client_factory = microservice_client_factory
+        self._rule_index = AlertRuleIndex(self.get_all, self.RULE_CACHE_TTL_SECONDS)
+        self._rule_details_cache = {}
+        self._rule_details_cache_lock = Lock()
 
     @property
     def exfiltration(self):
@@ -51,8 +72,7 @@ class AlertRulesModule(object):
         try:
             return rules_client.add_user(rule_id, user_id)
         except Py42InternalServerError as err:
-            rules = self.get_by_observer_id(rule_id)[u"ruleMetadata"]
-            _check_if_system_rule(err, rules)
+            _check_if_system_rule(err, self._get_cached_rules(rule_id))
             raise
 
     def remove_user(self, rule_id, user_id):
@@ -69,10 +89,79 @@ class AlertRulesModule(object):
         try:
             return rules_client.remove_user(rule_id, user_id)
         except Py42InternalServerError as err:
-            rules = self.get_by_observer_id(rule_id)[u"ruleMetadata"]
-            _check_if_system_rule(err, rules)
+            _check_if_system_rule(err, self._get_cached_rules(rule_id))
             raise
 
+    def add_users(self, rule_id, user_ids, max_workers=None):
+        """Update alert rule to monitor the aliases of any number of users. The users' aliases
+        are fetched concurrently and the users are then added in concurrent batches of 100, so
+        a failing batch does not stop the others. Nothing is sent for a system rule.
+
+        Args:
+            rule_id (str): Observer Id of a rule to be updated.
+            user_ids (iter[str]): The Code42 userUids of the users to add to the alert.
+            max_workers (int, optional): The most requests to send at once. Defaults to 10.
+
+        Returns:
+            OrderedDict: Maps each user ID to None if the user was added or to an error message
+            if it was not.
+
+        Raises:
+            :class:`py42.exceptions.Py42InvalidRuleOperationError`: If the rule is a system
+            rule.
+        """
+        self._check_if_rule_accepts_users(rule_id)
+        rules_client = self.microservice_client_factory.get_alert_rules_client()
+        return rules_client.add_users(rule_id, user_ids, max_workers=max_workers)
+
+    def remove_users(self, rule_id, user_ids, max_workers=None):
+        """Update alert rule criteria to remove any number of users and all their aliases from
+        a rule. The users are removed in concurrent batches of 100. Nothing is sent for a
+        system rule.
+
+        Args:
+            rule_id (str): Observer rule Id of a rule to be updated.
+            user_ids (iter[str]): The Code42 userUids of the users to remove from the alert.
+            max_workers (int, optional): The most requests to send at once. Defaults to 10.
+
+        Returns:
+            OrderedDict: Maps each user ID to None if the user was removed or to the error
+            message of its batch if it was not.
+
+        Raises:
+            :class:`py42.exceptions.Py42InvalidRuleOperationError`: If the rule is a system
+            rule.
+        """
+        self._check_if_rule_accepts_users(rule_id)
+        rules_client = self.microservice_client_factory.get_alert_rules_client()
+        return rules_client.remove_users(rule_id, user_ids, max_workers=max_workers)
+
+    def sync_users(self, rule_id, user_ids, current_user_ids, max_workers=None):
+        """Update alert rule so that it monitors exactly the given users, only adding the
+        users that are not already on the rule and removing the ones that should no longer be.
+        Pass the users last synced as `current_user_ids`. Nothing is sent for a system rule.
+
+        Args:
+            rule_id (str): Observer rule Id of a rule to be updated.
+            user_ids (iter[str]): The Code42 userUids of the users the rule should monitor.
+            current_user_ids (iter[str]): The Code42 userUids of the users the rule monitors
+                now.
+            max_workers (int, optional): The most requests to send at once. Defaults to 10.
+
+        Returns:
+            OrderedDict: Maps each added or removed user ID to None if the change succeeded or
+            to an error message if it did not.
+
+        Raises:
+            :class:`py42.exceptions.Py42InvalidRuleOperationError`: If the rule is a system
+            rule.
+        """
+        self._check_if_rule_accepts_users(rule_id)
+        rules_client = self.microservice_client_factory.get_alert_rules_client()
+        return rules_client.sync_users(
+            rule_id, user_ids, current_user_ids, max_workers=max_workers
+        )
+
     def remove_all_users(self, rule_id):
         """Update alert rule criteria to remove all users the from the alert rule.
 
@@ -155,6 +244,110 @@ class AlertRulesModule(object):
         alerts_client = self.microservice_client_factory.get_alerts_client()
         return alerts_client.get_rule_by_observer_id(observer_id)
 
+    def get_cached_by_id(self, rule_id):
+        """Get the metadata of the rule with the matching rule ID from the local rule cache.
+        The cache holds all the rules and is loaded again when it is older than
+        `RULE_CACHE_TTL_SECONDS` (5 minutes) or after :meth:`refresh_cache` is called, so
+        repeated lookups do not make requests.
+
+        Args:
+            rule_id (str): The ID of the rule to return.
+
+        Returns:
+            dict: The rule's metadata, or None if there is no rule with that ID.
+        """
+        return self._rule_index.get_by_id(rule_id)
+
+    def get_cached_by_observer_id(self, observer_id):
+        """Get the metadata of the rule with the matching observer ID from the local rule cache.
+        See :meth:`get_cached_by_id`.
+
+        Args:
+            observer_id (str): The observer ID of the rule to return.
+
+        Returns:
+            dict: The rule's metadata, or None if there is no rule with that observer ID.
+        """
+        return self._rule_index.get_by_observer_id(observer_id)
+
+    def get_cached_by_name(self, rule_name):
+        """Get the metadata of the rules with the matching name from the local rule cache.
+        See :meth:`get_cached_by_id`.
+
+        Args:
+            rule_name (str): Rule name to search for, case insensitive search.
+
+        Returns:
+            list: The metadata of each rule with the given name.
+        """
+        return self._rule_index.get_all_by_name(rule_name)
+
+    def get_all_details(self, max_workers=None):
+        """Get the details of every exfiltration, cloud share and file type mismatch rule,
+        fetching them concurrently from the client for each rule's type. The rules come from
+        the local rule cache (see :meth:`get_cached_by_id`) and their details are cached for as
+        long, so calling this again only fetches the details of rules that are new or whose
+        details are older than `RULE_CACHE_TTL_SECONDS`. The first error is re-raised.
+
+        Args:
+            max_workers (int, optional): The most rules to fetch the details of at once.
+                Defaults to 10.
+
+        Returns:
+            OrderedDict: Maps each rule's observer ID to the
+            :class:`py42.response.Py42Response` with its details.
+        """
+        rules = [
+            rule
+            for rule in self._rule_index.get_all()
+            if rule.get(u"type") in _RULE_DETAIL_CLIENTS
+        ]
+        details = OrderedDict(
+            (rule[u"observerRuleId"], self._get_cached_details(rule[u"observerRuleId"]))
+            for rule in rules
+        )
+        missing = [rule for rule in rules if details[rule[u"observerRuleId"]] is None]
+        responses = map_concurrently(
+            self._get_details, missing, max_workers=max_workers
+        )
+        expiration = time.time() + self.RULE_CACHE_TTL_SECONDS
+        with self._rule_details_cache_lock:
+            for rule, response in zip(missing, responses):
+                observer_id = rule[u"observerRuleId"]
+                details[observer_id] = response
+                self._rule_details_cache[observer_id] = (response, expiration)
+        return details
+
+    def refresh_cache(self):
+        """Load all the rules into the local rule cache again and forget the cached rule
+        details, for example after rules were created or changed."""
+        with self._rule_details_cache_lock:
+            self._rule_details_cache.clear()
+        self._rule_index.refresh()
+
+    def _get_cached_details(self, observer_id):
+        with self._rule_details_cache_lock:
+            response, expiration = self._rule_details_cache.get(observer_id, (None, 0))
+        return response if time.time() < expiration else None
+
+    def _get_details(self, rule):
+        rules_client = self.microservice_client_factory.get_alert_rules_client()
+        typed_client = getattr(rules_client, _RULE_DETAIL_CLIENTS[rule[u"type"]])
+        return typed_client.get(rule[u"observerRuleId"])
+
+    def _check_if_rule_accepts_users(self, rule_id):
+        # bulk changes are checked before any batch is sent, so there is no failed response to
+        # attach to the error
+        _check_if_system_rule(HTTPError(), self._get_cached_rules(rule_id))
+
+    def _get_cached_rules(self, observer_id):
+        rule = self._rule_index.get_by_observer_id(observer_id)
+        if rule is None:
+            # the rule may have been created after the cache was loaded
+            self._rule_index.refresh()
+            rule = self._rule_index.get_by_observer_id(observer_id)
+        return [rule] if rule is not None else []
+
 
 def _check_if_system_rule(base_err, rules):
     """You cannot add or remove users from system rules this way; use the specific
@@ -1,3 +1,5 @@
+from py42._internal.alert_collector import AlertCollector
+from py42._internal.alert_correlation import AlertEventCorrelator
 from py42.modules.alertrules import AlertRulesModule
 
 
@@ -32,9 +34,101 @@ class AlertsModule(object):
         alert_client = self._microservice_client_factory.get_alerts_client()
         return alert_client.search(query)
 
+    def search_all(self, query, max_workers=None):
+        """Searches alerts using the given :class:`py42.sdk.queries.alerts.alert_query.AlertQuery`
+        and yields every matching alert, requesting the pages of results concurrently.
+
+        When the query is sorted by ``CreatedAt`` with the newest alerts first, which is the
+        default, the alerts are those that existed when the search started: alerts created
+        while paging are neither yielded nor make other alerts be skipped or yielded twice.
+
+        Args:
+            query (:class:`py42.sdk.queries.alerts.alert_query.AlertQuery`): An alert query.
+                See the :ref:`Executing Searches User Guide <anchor_search_alerts>` to learn more
+                about how to construct a query.
+            max_workers (int, optional): The most pages to request at once. Defaults to 10.
+
+        Returns:
+            generator: An object that iterates over the matching alerts as dicts.
+        """
+        alert_client = self._microservice_client_factory.get_alerts_client()
+        return alert_client.search_all(query, max_workers=max_workers)
+
+    def create_collector(
+        self, checkpoint_path=None, query=None, include_details=False, max_workers=None
+    ):
+        """Creates a collector whose ``collect()`` method yields the alerts created since it
+        last ran, oldest first. Where it left off is saved to a checkpoint file after each batch
+        of alerts is consumed, so a collector created again with the same file after a restart
+        does not fetch the alerts it already delivered.
+
+        Usage example::
+
+            collector = sdk.alerts.create_collector("alerts.checkpoint", include_details=True)
+            while True:
+                for alert in collector.collect():
+                    handle(alert)
+                time.sleep(30)
+
+        Args:
+            checkpoint_path (str, optional): The path of the file to keep the checkpoint in.
+                Defaults to None, which keeps it in memory.
+            query (:class:`py42.sdk.queries.alerts.alert_query.AlertQuery`, optional): An alert
+                query whose filter groups must all match. Its sort order is replaced. Defaults
+                to None, which collects all alerts.
+            include_details (bool, optional): Set to True to yield the details of the alerts
+                instead, as returned by :meth:`get_details`. Defaults to False.
+            max_workers (int, optional): The most pages or batches of details to request at
+                once. Defaults to 10.
+
+        Returns:
+            :class:`py42._internal.alert_collector.AlertCollector`
+        """
+        alert_client = self._microservice_client_factory.get_alerts_client()
+        return AlertCollector(
+            alert_client,
+            checkpoint_path=checkpoint_path,
+            query=query,
+            include_details=include_details,
+            max_workers=max_workers,
+        )
+
+    def get_file_events(self, alert_ids, max_workers=None):
+        """Finds the file events behind the alerts with the given IDs. The details of the alerts
+        are fetched in chunks of 100, and the observations in them are turned into file event
+        searches: observations that list event IDs are searched for by ID, and the others by
+        actor and activity period, combining the overlapping periods of each actor. The
+        searches run concurrently, and the next chunk is worked on while the results of the
+        current one are consumed. A search that fails, or that matches more than the 10,000
+        events the file event search can return, is reported against the alerts it was made
+        for and the other alerts are still worked on.
+
+        Usage example::
+
+            for alert_id, events, error in sdk.alerts.get_file_events(alert_ids):
+                print(alert_id, len(events), error)
+
+        Args:
+            alert_ids (iter[str]): The identification numbers of the alerts.
+            max_workers (int, optional): The most requests to send at once. Defaults to 10.
+
+        Returns:
+            generator: An object that yields an ``(alert_id, events, error)`` tuple for each
+            alert, in the order of `alert_ids`, where ``events`` is a list of file event dicts
+            and ``error`` is None, or a message if some of the alert's events may be missing.
+        """
+        alert_client = self._microservice_client_factory.get_alerts_client()
+        file_event_client = self._microservice_client_factory.get_file_event_client()
+        correlator = AlertEventCorrelator(
+            alert_client, file_event_client, max_workers=max_workers
+        )
+        return correlator.correlate(alert_ids)
+
     def get_details(self, alert_ids):
         """Gets the details for the alerts with the given IDs, including the file event query that,
         when passed into a search, would result in events that could have triggered the alerts.
+        Any number of IDs can be given; they are requested in batches of 100 at once. The JSON
+        ``data`` of each observation is decoded the first time it is read.
 
         Args:
             alert_ids (iter[str]): The identification numbers of the alerts for which you want to
@@ -71,3 +165,42 @@ class AlertsModule(object):
         """
         alert_client = self._microservice_client_factory.get_alerts_client()
         return alert_client.reopen(alert_ids, reason=reason)
+
+    def bulk_resolve(self, alert_ids, reason=None, max_workers=None):
+        """Resolves any number of alerts. The IDs are sent in batches of 100 at once, and
+        batches that fail because of a server error are retried after a growing delay. Failing
+        batches do not stop the others, so the IDs that failed can be passed in again later.
+
+        Args:
+            alert_ids (iter[str]): The identification numbers for the alerts to resolve.
+            reason (str, optional): The reason the alerts are now resolved. Defaults to None.
+            max_workers (int, optional): The most batches to send at once. Defaults to 10.
+
+        Returns:
+            OrderedDict: Maps each alert ID to None if it was resolved or to the error message
+            of its batch if it was not.
+        """
+        alert_client = self._microservice_client_factory.get_alerts_client()
+        return alert_client.bulk_resolve(
+            alert_ids, reason=reason, max_workers=max_workers
+        )
+
+    def bulk_reopen(self, alert_ids, reason=None, max_workers=None):
+        """Reopens any number of resolved alerts. The IDs are sent in batches of 100 at once,
+        and batches that fail because of a server error are retried after a growing delay.
+        Failing batches do not stop the others, so the IDs that failed can be passed in again
+        later.
+
+        Args:
+            alert_ids (iter[str]): The identification numbers for the alerts to reopen.
+            reason (str, optional): The reason the alerts are reopened. Defaults to None.
+            max_workers (int, optional): The most batches to send at once. Defaults to 10.
+
+        Returns:
+            OrderedDict: Maps each alert ID to None if it was reopened or to the error message
+            of its batch if it was not.
+        """
+        alert_client = self._microservice_client_factory.get_alerts_client()
+        return alert_client.bulk_reopen(
+            alert_ids, reason=reason, max_workers=max_workers
+        )
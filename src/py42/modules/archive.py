@@ -1,3 +1,8 @@
+from py42._internal.archive_access import BackupFileLocator
+from py42._internal.archive_access import BatchRestorer
+from py42._internal.archive_access import call_with_archive_accessor
+from py42._internal.archive_index import ArchiveIndex
+
 _FILE_SIZE_CALC_TIMEOUT = 10
 
 
@@ -6,9 +11,10 @@ class ArchiveModule(object):
     functionality for streaming a file from backup.
     """
 
-    def __init__(self, archive_accessor_manager, archive_client):
+    def __init__(self, archive_accessor_manager, archive_client, device_client=None):
         self._archive_accessor_manager = archive_accessor_manager
         self._archive_client = archive_client
+        self._device_client = device_client
 
     def stream_from_backup(
         self,
@@ -18,6 +24,8 @@ class ArchiveModule(object):
         archive_password=None,
         encryption_key=None,
         file_size_calc_timeout=_FILE_SIZE_CALC_TIMEOUT,
+        restore_timeout=None,
+        progress_callback=None,
     ):
         """Streams a file from a backup archive to memory. If streaming multiple files, the
         results will be zipped.
@@ -40,6 +48,13 @@ class ArchiveModule(object):
             file_size_calc_timeout (int, optional): Set to limit the amount of seconds spent calculating
                 file sizes when crafting the request. Set to 0 or None to ignore file sizes altogether.
                 Defaults to 10.
+            restore_timeout (int, optional): The most seconds to wait for the server to prepare
+                the files. When exceeded, the restore job is canceled and a
+                :class:`py42.exceptions.Py42RestoreTimeoutError` is raised. Defaults to None
+                (waits until the restore job is done).
+            progress_callback (callable, optional): A function called with a dict holding the
+                ``jobId``, ``status`` and ``percentComplete`` of the restore job each time its
+                status is checked. It is called from a background thread. Defaults to None.
 
         Returns:
             :class:`py42.response.Py42Response`: A response containing the streamed content.
@@ -47,10 +62,7 @@ class ArchiveModule(object):
         Usage example::
 
             stream_response = sdk.archive.stream_from_backup("/full/path/to/file.txt", "1234567890")
-            with open("/path/to/my/file", "wb") as f:
-                for chunk in stream_response.iter_content(chunk_size=128):
-                    if chunk:
-                        f.write(chunk)
+            stream_response.download_to("/path/to/my/file")
 
         If downloading multiple files, you will need to unzip the results::
 
@@ -58,16 +70,202 @@ class ArchiveModule(object):
             with zipfile.ZipFile("downloaded_directory.zip", "r") as zf:
                 zf.extractall(".")
         """
-        archive_accessor = self._archive_accessor_manager.get_archive_accessor(
+        return call_with_archive_accessor(
+            self._archive_accessor_manager,
+            lambda archive_accessor: archive_accessor.stream_from_backup(
+                file_paths,
+                file_size_calc_timeout=file_size_calc_timeout,
+                restore_timeout=restore_timeout,
+                progress_callback=progress_callback,
+            ),
             device_guid,
             destination_guid=destination_guid,
             private_password=archive_password,
             encryption_key=encryption_key,
         )
-        return archive_accessor.stream_from_backup(
-            file_paths, file_size_calc_timeout=file_size_calc_timeout
+
+    def restore_to_directory(
+        self,
+        files,
+        output_directory,
+        archive_password=None,
+        encryption_key=None,
+        file_size_calc_timeout=_FILE_SIZE_CALC_TIMEOUT,
+        restore_timeout=None,
+        max_workers=None,
+        max_jobs_per_storage_server=None,
+    ):
+        """Restores files from the backups of many devices to a directory. The files of each
+        device are restored with a single restore job, and the jobs of different devices run
+        concurrently. Each result is written to ``<output_directory>/<device_guid>/`` as soon
+        as it is ready: a single file keeps its name, and several files or a directory are
+        written to a zip file. Entries returned by :meth:`find_in_backups` are restored from the
+        destination they were found in, and their results are written to
+        ``<output_directory>/<device_guid>/<destination_guid>/``. A manifest describing every
+        device's result is written to ``<output_directory>/manifest.json``.
+
+        Args:
+            files (iterable): ``(device_guid, file_path)`` tuples of the files or directories to
+                restore, or entries returned by :meth:`find_in_backups`.
+            output_directory (str): The existing directory to write the results to.
+            archive_password (str or None, optional): The password for the archives, if
+                password-protected. Defaults to None.
+            encryption_key (str or None, optional): A custom encryption key for decrypting the
+                archives' file contents. Defaults to None.
+            file_size_calc_timeout (int, optional): Set to limit the amount of seconds spent
+                calculating file sizes for each device. Defaults to 10.
+            restore_timeout (int, optional): The most seconds to wait for each restore job.
+                Defaults to None.
+            max_workers (int, optional): The most devices to restore at once. Defaults to 10.
+            max_jobs_per_storage_server (int, optional): The most restore jobs to run at once on
+                any one storage server. Defaults to 4.
+
+        Returns:
+            list: A dict for each device and destination with its ``deviceGuid``,
+            ``destinationGuid``, the restored ``paths``, and either the ``file`` written with
+            its ``size``, ``md5`` and ``sha256``, or the ``error`` that kept the device's files
+            from being restored.
+        """
+        restorer = BatchRestorer(
+            self._archive_accessor_manager,
+            max_workers=max_workers,
+            max_jobs_per_storage_server=max_jobs_per_storage_server,
+        )
+        return restorer.restore_to_directory(
+            files,
+            output_directory,
+            archive_password=archive_password,
+            encryption_key=encryption_key,
+            file_size_calc_timeout=file_size_calc_timeout,
+            restore_timeout=restore_timeout,
+        )
+
+    def find_in_backups(
+        self,
+        user_uid,
+        path_or_pattern,
+        archive_password=None,
+        encryption_key=None,
+        file_size_calc_timeout=_FILE_SIZE_CALC_TIMEOUT,
+        max_workers=None,
+    ):
+        """Finds a file or directory in the backups of all of a user's devices. Every
+        destination of every device is searched at once, and restore sessions are reused.
+
+        Example:
+            To restore everything found::
+
+                found = sdk.archive.find_in_backups(user_uid, "/Users/*/Documents/*.pdf")
+                sdk.archive.restore_to_directory(found, "restored")
+
+        Args:
+            user_uid (str): The UID of the user whose devices to search.
+            path_or_pattern (str): The full path to find, or a pattern where ``*`` and ``?``
+                match within a path component and ``**`` matches across them. A name or pattern
+                without a ``/``, such as ``*.pdf``, matches file names at any depth.
+            archive_password (str or None, optional): The password for the archives, if
+                password-protected. Defaults to None.
+            encryption_key (str or None, optional): A custom encryption key for decrypting the
+                archives' file contents. Defaults to None.
+            file_size_calc_timeout (int, optional): Set to limit the amount of seconds spent
+                calculating the sizes of the matches in each archive. Defaults to 10.
+            max_workers (int, optional): The most archives to search at once. Defaults to 10.
+
+        Returns:
+            list: A dict for each match with its ``deviceGuid``, ``destinationGuid``, ``path``,
+            ``type``, ``id``, ``deleted`` flag, and the ``numFiles``, ``numDirs`` and ``size``
+            it holds, which are None if they could not be calculated in time. Archives that
+            cannot be searched are skipped.
+        """
+        locator = BackupFileLocator(
+            self._archive_accessor_manager,
+            self._device_client,
+            max_workers=max_workers,
+        )
+        return locator.find(
+            user_uid,
+            path_or_pattern,
+            archive_password=archive_password,
+            encryption_key=encryption_key,
+            file_size_calc_timeout=file_size_calc_timeout,
         )
 
+    def crawl_backup(
+        self,
+        device_guid,
+        index_path,
+        path=None,
+        destination_guid=None,
+        archive_password=None,
+        encryption_key=None,
+        max_depth=None,
+        max_workers=None,
+        max_requests_per_second=None,
+        incremental=True,
+    ):
+        """Walks the backup of a device and records its files and directories in a local
+        SQLite database that can then be searched without contacting the storage server. The
+        directories of each level of the tree are listed concurrently. When the database
+        already holds an earlier crawl, directories that have not changed since then and hold
+        no other directories are not listed again.
+
+        Args:
+            device_guid (str): The GUID of the device whose backup to crawl.
+            index_path (str): The path of the SQLite database file to write to. It is created
+                if it does not exist.
+            path (str or None, optional): The directory to crawl. Defaults to None, which
+                crawls the whole backup.
+            destination_guid (str or None, optional): The GUID of the destination to crawl.
+                Defaults to None.
+            archive_password (str or None, optional): The password for the archive, if
+                password-protected. Defaults to None.
+            encryption_key (str or None, optional): A custom encryption key for decrypting the
+                archive's file contents. Defaults to None.
+            max_depth (int or None, optional): The most levels of directories to descend into.
+                Defaults to None, which has no limit.
+            max_workers (int, optional): The most directories to list at once. Defaults to 10.
+            max_requests_per_second (float or None, optional): The most directory listings to
+                request per second. Defaults to None, which has no limit.
+            incremental (bool, optional): Set to False to list every directory again, even if
+                it has not changed since the last crawl. Defaults to True.
+
+        Returns:
+            :class:`py42._internal.archive_index.ArchiveIndex`: The open index, which can be
+            searched with ``find_by_prefix``, ``find_by_glob`` and ``find_by_name``.
+        """
+        index = ArchiveIndex(index_path)
+        try:
+            call_with_archive_accessor(
+                self._archive_accessor_manager,
+                lambda archive_accessor: archive_accessor.crawl(
+                    index,
+                    path=path,
+                    max_depth=max_depth,
+                    max_workers=max_workers,
+                    max_requests_per_second=max_requests_per_second,
+                    incremental=incremental,
+                ),
+                device_guid,
+                destination_guid=destination_guid,
+                private_password=archive_password,
+                encryption_key=encryption_key,
+            )
+        except Exception:
+            index.close()
+            raise
+        return index
+
+    def open_archive_index(self, index_path):
+        """Opens a local index of backup files written by :meth:`crawl_backup`.
+
+        Args:
+            index_path (str): The path of the SQLite database file.
+
+        Returns:
+            :class:`py42._internal.archive_index.ArchiveIndex`
+        """
+        return ArchiveIndex(index_path)
+
     def get_backup_sets(self, device_guid, destination_guid):
         """Gets all backup set names/identifiers referring to a single destination for a specific
         device.
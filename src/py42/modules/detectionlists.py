@@ -1,3 +1,4 @@
+from py42._internal.detection_list_sync import DetectionListSync
 from py42.sdk.queries.query_filter import filter_attributes
 
 
@@ -157,3 +158,60 @@ class DetectionListsModule(object):
         factory = self._microservice_client_factory
         self._detection_list_user_client = factory.get_detection_list_user_client()
         return self._detection_list_user_client.refresh(user_id)
+
+    def sync(
+        self,
+        departing_employees=None,
+        high_risk_employees=None,
+        risk_tags=None,
+        cloud_aliases=None,
+        max_workers=None,
+    ):
+        """Makes the detection lists and the risk tags and cloud aliases of users match the
+        given desired state, such as one read from an HR system. The current members of the
+        lists are read with their paginated searches and compared locally, and only the users
+        to add or remove and the departure dates, risk tags and cloud aliases that differ are
+        sent, concurrently. Changes that fail do not stop the others.
+
+        Usage example::
+
+            outcomes = sdk.detectionlists.sync(
+                departing_employees={"user-uid-1": "2020-12-20"},
+                high_risk_employees=["user-uid-2"],
+                risk_tags={"user-uid-2": [RiskTags.FLIGHT_RISK]},
+            )
+            failed = {change: error for change, error in outcomes.items() if error}
+
+        Args:
+            departing_employees (dict, optional): Maps the userUid of every user who should be
+                on the Departing Employees list to their departure date in yyyy-MM-dd format,
+                or to None. Users on the list who are not in it are removed. Defaults to None,
+                which leaves the list as it is.
+            high_risk_employees (iter[str], optional): The userUids of every user who should be
+                on the High Risk Employee list. Users on the list who are not in it are removed.
+                Defaults to None, which leaves the list as it is.
+            risk_tags (dict, optional): Maps userUids to the complete list of risk factor tags
+                each of those users should have. Defaults to None.
+            cloud_aliases (dict, optional): Maps userUids to the complete list of cloud aliases
+                each of those users should have, apart from their username. Defaults to None.
+            max_workers (int, optional): The most requests to send at once. Defaults to 10.
+
+        Returns:
+            OrderedDict: Maps a ``(user_id, change)`` tuple for each change made, such as
+            ``("user-uid-1", "add_departing_employee")``, to None if it succeeded or to an error
+            message if it did not.
+        """
+        factory = self._microservice_client_factory
+        self._detection_list_user_client = factory.get_detection_list_user_client()
+        detection_list_sync = DetectionListSync(
+            self.departing_employee,
+            self.high_risk_employee,
+            self._detection_list_user_client,
+            max_workers=max_workers,
+        )
+        return detection_list_sync.sync(
+            departing_employees=departing_employees,
+            high_risk_employees=high_risk_employees,
+            risk_tags=risk_tags,
+            cloud_aliases=cloud_aliases,
+        )
@@ -1,8 +1,17 @@
 import json
+import time
+from collections import OrderedDict
+from contextlib import closing
 from threading import Lock
 
 from requests.exceptions import HTTPError
+from requests.exceptions import RequestException
 
+from py42._internal.compat import integer_types
+from py42._internal.compat import str
+from py42._internal.concurrency import iter_completed
+from py42._internal.concurrency import iter_merged
+from py42._internal.concurrency import map_concurrently
 from py42.exceptions import Py42ChecksumNotFoundError
 from py42.exceptions import Py42Error
 from py42.exceptions import Py42HTTPError
@@ -16,6 +25,10 @@ from py42.settings import debug
 
 
 class SecurityModule(object):
+
+    STORAGE_NODE_PROBE_TIMEOUT_SECONDS = 30
+    STORAGE_INFO_CACHE_TTL_SECONDS = 600
+
     def __init__(
         self, security_client, storage_client_factory, microservices_client_factory
     ):
@@ -24,6 +37,8 @@ class SecurityModule(object):
         self._microservices_client_factory = microservices_client_factory
         self._client_cache = {}
         self._client_cache_lock = Lock()
+        self._storage_info_cache = {}
+        self._node_locks = {}
 
     @property
     def savedsearches(self):
@@ -45,6 +60,9 @@ class SecurityModule(object):
         Returns:
             list[:class:`py42.modules.securitydata.PlanStorageInfo`]
         """
+        return self._get_security_plan_storage_info_list(user_uid, concurrent=True)
+
+    def _get_security_plan_storage_info_list(self, user_uid, concurrent):
         response = None
         locations = None
         try:
@@ -58,10 +76,14 @@ class SecurityModule(object):
 
         if response and locations:
             plan_destination_map = _get_plan_destination_map(locations)
-            selected_plan_infos = self._get_plan_storage_infos(plan_destination_map)
+            selected_plan_infos = self._get_plan_storage_infos(
+                plan_destination_map, concurrent
+            )
             if not selected_plan_infos:
+                # the error is built from an HTTP error, so the response of the locations
+                # request, which did not fail itself, is wrapped in one
                 raise Py42SecurityPlanConnectionError(
-                    response,
+                    HTTPError(response=response),
                     u"Could not establish a connection to retrieve "
                     u"security events for user {}".format(user_uid),
                 )
@@ -172,6 +194,200 @@ class SecurityModule(object):
             max_timestamp,
         )
 
+    def get_all_plans_security_events(
+        self,
+        plan_storage_infos,
+        cursors=None,
+        include_files=True,
+        event_types=None,
+        min_timestamp=None,
+        max_timestamp=None,
+    ):
+        """Gets legacy Endpoint Monitoring file activity events for several plans at once. The
+        events of each plan are paged through concurrently and every page is returned along with
+        the UID of the plan it belongs to and the cursor for that plan.
+
+        Args:
+            plan_storage_infos (list[:class:`py42.modules.securitydata.PlanStorageInfo`]):
+                Information about storage nodes for the plans to get file event activity for.
+            cursors (dict, optional): A dict mapping plan UIDs to cursor positions for only
+                getting file events you did not previously get, such as one built from the
+                plan UIDs and cursors returned by a previous call. Plans that are not in the dict
+                start from the beginning. Defaults to None.
+            include_files (bool, optional): Whether to include the files related to the file
+                events. Defaults to True.
+            event_types: (str, optional): A comma-separated list of event types to filter by.
+                See :meth:`get_all_plan_security_events` for the available options. Defaults to
+                None.
+            min_timestamp (float, optional): A POSIX timestamp representing the beginning of the
+                date range of events to get. Defaults to None.
+            max_timestamp (float, optional): A POSIX timestamp representing the end of the date
+                range of events to get. Defaults to None.
+
+        Returns:
+            generator: An object that iterates over `(plan_uid, response, cursor)` tuples, where
+            `response` is a :class:`py42.response.Py42Response` containing a page of events.
+            Pages of the same plan are returned in order.
+
+        Usage example::
+
+            cursors = {}
+            for plan_uid, page, cursor in sdk.securitydata.get_all_plans_security_events(
+                plan_storage_infos, cursors=cursors
+            ):
+                process(page)
+                cursors[plan_uid] = cursor
+            # persist `cursors` to continue from here on the next run
+        """
+        return self._get_security_detection_events_by_plan(
+            plan_storage_infos,
+            cursors,
+            include_files,
+            event_types,
+            min_timestamp,
+            max_timestamp,
+        )
+
+    def get_all_user_plans_security_events(
+        self,
+        user_uid,
+        cursors=None,
+        include_files=True,
+        event_types=None,
+        min_timestamp=None,
+        max_timestamp=None,
+    ):
+        """Gets legacy Endpoint Monitoring file activity events for the user with the given UID,
+        paging through the events of each of the user's plans concurrently. See
+        :meth:`get_all_plans_security_events` for details.
+
+        Args:
+            user_uid (str): The UID of the user to get security events for.
+            cursors (dict, optional): A dict mapping plan UIDs to cursor positions for only
+                getting events you did not previously get. Defaults to None.
+            include_files (bool, optional): Whether to include the files related to the file
+                activity events. Defaults to True.
+            event_types: (str, optional): A comma-separated list of event types to filter by.
+                See :meth:`get_all_plan_security_events` for the available options. Defaults to
+                None.
+            min_timestamp (float, optional): A POSIX timestamp representing the beginning of the
+                date range of events to get. Defaults to None.
+            max_timestamp (float, optional): A POSIX timestamp representing the end of the date
+                range of events to get. Defaults to None.
+
+        Returns:
+            generator: An object that iterates over `(plan_uid, response, cursor)` tuples, where
+            `response` is a :class:`py42.response.Py42Response` containing a page of events.
+        """
+        security_plan_storage_infos = (
+            self.get_security_plan_storage_info_list(user_uid) or []
+        )
+        return self._get_security_detection_events_by_plan(
+            security_plan_storage_infos,
+            cursors,
+            include_files,
+            event_types,
+            min_timestamp,
+            max_timestamp,
+        )
+
+    def get_all_users_security_events(
+        self,
+        user_uids,
+        include_files=True,
+        event_types=None,
+        min_timestamp=None,
+        max_timestamp=None,
+        max_workers=None,
+    ):
+        """Gets legacy Endpoint Monitoring file activity events for many users at once. Users are
+        processed concurrently by a bounded pool of workers that share one storage node
+        connection per node. Each worker finds the storage nodes of its user one request at a
+        time, so no more than `max_workers` requests are sent at once.
+
+        Args:
+            user_uids (iter[str]): The UIDs of the users to get security events for.
+            include_files (bool, optional): Whether to include the files related to the file
+                activity events. Defaults to True.
+            event_types: (str, optional): A comma-separated list of event types to filter by.
+                See :meth:`get_all_user_security_events` for the available options. Defaults to
+                None.
+            min_timestamp (float, optional): A POSIX timestamp representing the beginning of the
+                date range of events to get. Defaults to None.
+            max_timestamp (float, optional): A POSIX timestamp representing the end of the date
+                range of events to get. Defaults to None.
+            max_workers (int, optional): The number of users to get events for at the same
+                time. Defaults to 10.
+
+        Returns:
+            generator: An object that iterates over `(user_uid, response, cursor)` tuples, where
+            `response` is a :class:`py42.response.Py42Response` containing a page of events.
+            Pages of the same user are returned in order. When an error occurs for a user, such
+            as when the user's storage nodes cannot be connected to, a warning is logged and no
+            more pages are returned for that user.
+        """
+
+        def get_user_events(user_uid):
+            # one failing user should not stop the collection for everyone else
+            try:
+                plan_storage_infos = self._get_security_plan_storage_info_list(
+                    user_uid, concurrent=False
+                )
+                if not plan_storage_infos:
+                    return
+                pages = self._get_security_detection_events(
+                    plan_storage_infos,
+                    None,
+                    include_files,
+                    event_types,
+                    min_timestamp,
+                    max_timestamp,
+                )
+                for page in pages:
+                    yield page
+            except (Py42Error, RequestException) as err:
+                debug.logger.warning(
+                    u"Failed to get security events for user {}: {}".format(
+                        user_uid, err
+                    )
+                )
+
+        # remove duplicates while keeping the order of the users
+        user_uids = OrderedDict.fromkeys(user_uids)
+        pages = iter_merged(get_user_events, user_uids, max_workers=max_workers)
+        for user_uid, (response, cursor) in pages:
+            yield user_uid, response, cursor
+
+    def get_user_security_event_summary(
+        self, user_uid, min_timestamp=None, max_timestamp=None
+    ):
+        """Gets the number of legacy Endpoint Monitoring file activity events of each event type
+        for the user with the given UID, without transferring the events themselves. The
+        summaries of all of the user's plans are requested concurrently and added together.
+
+        Args:
+            user_uid (str): The UID of the user to get the event summary for.
+            min_timestamp (float, optional): A POSIX timestamp representing the beginning of the
+                date range of events to count. Defaults to None.
+            max_timestamp (float, optional): A POSIX timestamp representing the end of the date
+                range of events to count. Defaults to None.
+
+        Returns:
+            dict: A dict mapping event types, such as ``DEVICE_FILE_ACTIVITY``, to event counts.
+        """
+        plan_storage_infos = self.get_security_plan_storage_info_list(user_uid) or []
+
+        def get_summary(plan_storage_info):
+            return self._get_plan_security_event_summary(
+                plan_storage_info, min_timestamp, max_timestamp
+            )
+
+        event_counts = {}
+        for plan_event_counts in map_concurrently(get_summary, plan_storage_infos):
+            for event_type, count in plan_event_counts.items():
+                event_counts[event_type] = event_counts.get(event_type, 0) + count
+        return event_counts
+
     def search_file_events(self, query):
         """Searches for file events.
         `REST Documentation <https://support.code42.com/Administrator/Cloud/Monitoring_and_managing/Forensic_File_Search_API>`__
@@ -194,9 +410,6 @@ class SecurityModule(object):
 
     def _find_file_versions(self, md5_hash, sha256_hash):
         file_event_client = self._microservices_client_factory.get_file_event_client()
-        pds_client = (
-            self._microservices_client_factory.get_preservation_data_service_client()
-        )
         response = file_event_client.get_file_location_detail_by_sha256(sha256_hash)
 
         if u"locations" not in response and not len(response[u"locations"]):
@@ -206,44 +419,58 @@ class SecurityModule(object):
                 u"with md5 hash {} and sha256 hash {}.".format(md5_hash, sha256_hash),
             )
 
-        for device_id, paths in _parse_file_location_response(response):
-            try:
-                yield pds_client.find_file_versions(
-                    md5_hash, sha256_hash, device_id, paths
-                )
-            except Py42HTTPError as err:
-                # API searches multiple paths to find the file to be streamed, as returned by
-                # 'get_file_location_detail_by_sha256', hence we keep looking until we find a stream
-                # to return
-                debug.logger.warning(
-                    u"Failed to find any file version for md5 hash {} / sha256 hash {}. "
-                    u"Error: ".format(md5_hash, sha256_hash),
-                    err,
-                )
+        pds_client = (
+            self._microservices_client_factory.get_preservation_data_service_client()
+        )
 
-    def _stream_file(self, file_generator, checksum):
-        for response in file_generator:
-            if response.status_code == 204:
-                continue
-            try:
-                storage_node_client = self._microservices_client_factory.create_storage_preservation_client(
-                    response[u"storageNodeURL"]
-                )
-                token = storage_node_client.get_download_token(
-                    response[u"archiveGuid"],
-                    response[u"fileId"],
-                    response[u"versionTimestamp"],
-                )
-                return storage_node_client.get_file(str(token))
-            except Py42HTTPError:
-                # API searches multiple paths to find the file to be streamed, as returned by
-                # 'get_file_location_detail_by_sha256', hence we keep looking until we find a stream
-                # to return
-                debug.logger.warning(
-                    u"Failed to stream file with hash {}, info: {}.".format(
-                        checksum, response.text
+        def get_download_token(location):
+            device_id, paths = location
+            return self._get_file_version_download_token(
+                pds_client, md5_hash, sha256_hash, device_id, paths
+            )
+
+        # API searches multiple paths to find the file to be streamed, as returned by
+        # 'get_file_location_detail_by_sha256', so every location is queried at once and
+        # the file versions are yielded in the order their storage nodes answer.
+        return iter_completed(
+            get_download_token, _parse_file_location_response(response)
+        )
+
+    def _get_file_version_download_token(
+        self, pds_client, md5_hash, sha256_hash, device_id, paths
+    ):
+        response = pds_client.find_file_versions(
+            md5_hash, sha256_hash, device_id, paths
+        )
+        if response.status_code == 204:
+            return None
+        storage_node_client = self._microservices_client_factory.create_storage_preservation_client(
+            response[u"storageNodeURL"]
+        )
+        token = storage_node_client.get_download_token(
+            response[u"archiveGuid"],
+            response[u"fileId"],
+            response[u"versionTimestamp"],
+        )
+        return storage_node_client, token
+
+    def _stream_file(self, file_versions, checksum):
+        with closing(file_versions):
+            # closing the generator cancels the lookups that are still pending
+            for location, future in file_versions:
+                try:
+                    file_version = future.result()
+                    if file_version is None:
+                        continue
+                    storage_node_client, token = file_version
+                    return storage_node_client.get_file(str(token))
+                except Py42HTTPError as err:
+                    # keep looking until we find a stream to return
+                    device_id, paths = location
+                    debug.logger.warning(
+                        u"Failed to stream file with hash {} from device {} at {}. "
+                        u"Error: {}".format(checksum, device_id, paths, str(err))
                     )
-                )
         raise Py42Error(
             u"No file with hash {} available for download on any storage node.".format(
                 checksum
@@ -285,24 +512,40 @@ class SecurityModule(object):
             self._find_file_versions(checksum, sha256_hash), checksum
         )
 
-    def _get_plan_storage_infos(self, plan_destination_map):
-        plan_infos = []
-        for plan_uid in plan_destination_map:
+    def _get_plan_storage_infos(self, plan_destination_map, concurrent):
+        def get_storage_info(plan_uid):
             destinations = plan_destination_map[plan_uid]
-            storage_info = self._get_storage_info_for_plan(plan_uid, destinations)
-            if storage_info:
-                plan_infos.append(storage_info)
+            return self._get_storage_info_for_plan(plan_uid, destinations, concurrent)
+
+        # callers that already run on a pool of workers look the plans up one at a time
+        if concurrent:
+            plan_infos = map_concurrently(get_storage_info, plan_destination_map)
+        else:
+            plan_infos = [
+                get_storage_info(plan_uid) for plan_uid in plan_destination_map
+            ]
+        return [storage_info for storage_info in plan_infos if storage_info]
+
+    def _get_storage_info_for_plan(self, plan_uid, destinations, concurrent):
+        plan_storage_info = self._get_cached_storage_info(plan_uid)
+        if plan_storage_info:
+            return plan_storage_info
 
-        return plan_infos
+        def get_storage_info(destination):
+            return self._get_storage_info_for_plan_destination(plan_uid, destination)
 
-    def _get_storage_info_for_plan(self, plan_uid, destinations):
-        for destination in destinations:
-            # try to connect to every storage node for this plan until one works
-            plan_storage_info = self._get_storage_info_for_plan_destination(
-                plan_uid, destination
-            )
-            if plan_storage_info:
-                return plan_storage_info
+        # try to connect to every storage node for this plan, at once when concurrent, and use
+        # the first one that works
+        results = _iter_probe_results(get_storage_info, destinations, concurrent)
+        with closing(results):
+            for plan_storage_info in results:
+                if plan_storage_info:
+                    self._cache_storage_info(plan_storage_info)
+                    return plan_storage_info
+
+        debug.logger.warning(
+            u"Could not connect to any storage node of plan {}".format(plan_uid)
+        )
 
     def _get_storage_info_for_plan_destination(self, plan_uid, destination):
         try:
@@ -311,28 +554,58 @@ class SecurityModule(object):
             plan_storage_info = PlanStorageInfo(plan_uid, destination_guid, node_guid)
             self._try_get_security_detection_event_client(plan_storage_info)
             return plan_storage_info
-        except HTTPError:
-            #  This function is called in a loop until we get a result that is not None.
-            #  If all return None, then the calling function raises Py42SecurityPlanConnectionError.
+        except (RequestException, Py42HTTPError):
+            #  Unreachable storage nodes raise connection errors and time out after
+            #  STORAGE_NODE_PROBE_TIMEOUT_SECONDS.
+            #  This function is called for every destination of a plan until one returns a
+            #  result that is not None. If all return None, then the calling function raises
+            #  Py42SecurityPlanConnectionError.
             pass
 
+    def _get_cached_storage_info(self, plan_uid):
+        plan_storage_info, expiration = self._storage_info_cache.get(
+            plan_uid, (None, 0)
+        )
+        if time.time() < expiration:
+            return plan_storage_info
+
+    def _cache_storage_info(self, plan_storage_info):
+        # remember which storage node works for the plan so that other calls for the same
+        # user do not have to probe every destination again
+        expiration = time.time() + self.STORAGE_INFO_CACHE_TTL_SECONDS
+        with self._client_cache_lock:
+            self._storage_info_cache.update(
+                {plan_storage_info.plan_uid: (plan_storage_info, expiration)}
+            )
+
     def _try_get_security_detection_event_client(self, plan_storage_info):
+        node_guid = plan_storage_info.node_guid
         # check if we have already created and stored this client
-        client = self._client_cache.get(plan_storage_info.node_guid)
+        client = self._client_cache.get(node_guid)
 
-        # otherwise, create it
+        # otherwise, create it. Only one thread creates the client for a node, the rest wait
+        # for it so that concurrent calls share a single storage session per node.
         if client is None:
-            client = self._storage_client_factory.from_plan_info(
-                plan_storage_info.plan_uid, plan_storage_info.destination_guid
-            ).securitydata
-
-            # store this client via its guid so that we don't have to call StorageAuthToken
-            # just to determine what storage client to use
-            with self._client_cache_lock:
-                self._client_cache.update({plan_storage_info.node_guid: client})
+            with self._get_node_lock(node_guid):
+                client = self._client_cache.get(node_guid)
+                if client is None:
+                    client = self._storage_client_factory.from_plan_info(
+                        plan_storage_info.plan_uid,
+                        plan_storage_info.destination_guid,
+                        timeout=self.STORAGE_NODE_PROBE_TIMEOUT_SECONDS,
+                    ).securitydata
+
+                    # store this client via its guid so that we don't have to call
+                    # StorageAuthToken just to determine what storage client to use
+                    with self._client_cache_lock:
+                        self._client_cache.update({node_guid: client})
 
         return client
 
+    def _get_node_lock(self, node_guid):
+        with self._client_cache_lock:
+            return self._node_locks.setdefault(node_guid, Lock())
+
     def _get_security_detection_events(
         self,
         plan_storage_infos,
@@ -342,40 +615,127 @@ class SecurityModule(object):
         min_timestamp,
         max_timestamp,
     ):
-        if not isinstance(plan_storage_infos, (list, tuple)):
-            plan_storage_infos = [plan_storage_infos]
+        plan_storage_infos = _to_plan_storage_info_list(plan_storage_infos)
 
-        # get the storage node client for each plan
+        # get all pages of events for each plan
         for plan_storage_info in plan_storage_infos:
-            client = self._try_get_security_detection_event_client(plan_storage_info)
-            started = False
-
-            # get all pages of events for this plan
-            while cursor or not started:
-                started = True
-                response = client.get_plan_security_events(
-                    plan_storage_info.plan_uid,
-                    cursor=cursor,
-                    include_files=include_files,
-                    event_types=event_types,
-                    min_timestamp=min_timestamp,
-                    max_timestamp=max_timestamp,
-                )
+            pages = self._get_plan_security_event_pages(
+                plan_storage_info,
+                cursor,
+                include_files,
+                event_types,
+                min_timestamp,
+                max_timestamp,
+            )
+            # a cursor is only valid for the plan it was returned for
+            cursor = None
+            for response, page_cursor in pages:
+                yield response, page_cursor
+
+    def _get_security_detection_events_by_plan(
+        self,
+        plan_storage_infos,
+        cursors,
+        include_files,
+        event_types,
+        min_timestamp,
+        max_timestamp,
+    ):
+        plan_storage_infos = _to_plan_storage_info_list(plan_storage_infos)
+        cursors = cursors or {}
+
+        def get_pages(plan_storage_info):
+            return self._get_plan_security_event_pages(
+                plan_storage_info,
+                cursors.get(plan_storage_info.plan_uid),
+                include_files,
+                event_types,
+                min_timestamp,
+                max_timestamp,
+            )
+
+        pages = iter_merged(get_pages, plan_storage_infos)
+        for plan_storage_info, (response, cursor) in pages:
+            yield plan_storage_info.plan_uid, response, cursor
 
-                if response.text:
-                    # we use json.loads here because the cursor prop doesn't appear
-                    # on responses that have no results
-                    cursor = json.loads(response.text).get(u"cursor")
-                    # if there are no results, we don't get a cursor and have reached the end
-                    if cursor:
-                        yield response, cursor
+    def _get_plan_security_event_pages(
+        self,
+        plan_storage_info,
+        cursor,
+        include_files,
+        event_types,
+        min_timestamp,
+        max_timestamp,
+    ):
+        # get the storage node client for the plan
+        client = self._try_get_security_detection_event_client(plan_storage_info)
+        started = False
+
+        # get all pages of events for this plan
+        while cursor or not started:
+            started = True
+            response = client.get_plan_security_events(
+                plan_storage_info.plan_uid,
+                cursor=cursor,
+                include_files=include_files,
+                event_types=event_types,
+                min_timestamp=min_timestamp,
+                max_timestamp=max_timestamp,
+            )
+
+            # we use json.loads here because the cursor prop doesn't appear
+            # on responses that have no results
+            cursor = json.loads(response.text).get(u"cursor") if response.text else None
+            # if there are no results, we don't get a cursor and have reached the end
+            if cursor:
+                yield response, cursor
+
+    def _get_plan_security_event_summary(
+        self, plan_storage_info, min_timestamp, max_timestamp
+    ):
+        # a summary looks like {"cursor": ..., "summary": [{"eventType": ..., "count": ...}]}
+        # and is paged like the events themselves
+        client = self._try_get_security_detection_event_client(plan_storage_info)
+        event_counts = {}
+        cursor = None
+        while True:
+            response = client.get_plan_security_event_summary(
+                plan_storage_info.plan_uid,
+                cursor=cursor,
+                min_timestamp=min_timestamp,
+                max_timestamp=max_timestamp,
+            )
+            summary = json.loads(response.text) if response.text else {}
+            _add_event_type_counts(event_counts, summary.get(u"summary") or [])
+            next_cursor = summary.get(u"cursor")
+            # without a new cursor, there are no more pages
+            if not next_cursor or next_cursor == cursor:
+                return event_counts
+            cursor = next_cursor
+
+
+def _to_plan_storage_info_list(plan_storage_infos):
+    if not isinstance(plan_storage_infos, (list, tuple)):
+        return [plan_storage_infos]
+    return plan_storage_infos
+
+
+def _iter_probe_results(probe, destinations, concurrent):
+    if not concurrent:
+        for destination in destinations:
+            yield probe(destination)
+        return
+    probes = iter_completed(probe, destinations)
+    with closing(probes):
+        for _, future in probes:
+            yield future.result()
 
 
 def _get_plan_destination_map(locations_list):
     plan_destination_map = {}
     for plans in _get_destinations_in_locations_list(locations_list):
         for plan_uid in plans:
-            plan_destination_map[plan_uid] = plans[plan_uid]
+            plan_destination_map.setdefault(plan_uid, []).extend(plans[plan_uid])
     return plan_destination_map
 
 
@@ -397,6 +757,14 @@ def _get_plans_in_node(destination, node):
     }
 
 
+def _add_event_type_counts(event_counts, summary_items):
+    for item in summary_items:
+        count = item.get(u"count")
+        if isinstance(count, integer_types) and not isinstance(count, bool):
+            event_type = item[u"eventType"]
+            event_counts[event_type] = event_counts.get(event_type, 0) + count
+
+
 def _parse_file_location_response(response):
 
     for location in response[u"locations"]:
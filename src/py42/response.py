@@ -1,14 +1,40 @@
+import hashlib
 import json
+import os
+from collections import OrderedDict
 
+from requests import HTTPError
+from requests.exceptions import ChunkedEncodingError
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.packages.urllib3.exceptions import ProtocolError
+from requests.packages.urllib3.exceptions import ReadTimeoutError
+
+import py42.settings as settings
 from py42._internal.compat import reprlib
 from py42._internal.compat import str
+from py42._internal.compat import string_type
+from py42._internal.zip_stream import extract_entries
+from py42._internal.zip_stream import ZipStreamReader
 from py42.exceptions import Py42Error
+from py42.exceptions import raise_py42_error
+from py42.settings import debug
+
+DEFAULT_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# errors raised when a streamed download is cut off before all of its bytes arrive
+_INTERRUPTED_DOWNLOAD_ERRORS = (
+    ChunkedEncodingError,
+    RequestsConnectionError,
+    ProtocolError,
+    ReadTimeoutError,
+)
 
 
 class Py42Response(object):
     def __init__(self, requests_response):
         self._response = requests_response
         self._data = None
+        self._range_validator = None
 
     def __getitem__(self, key):
         try:
@@ -61,6 +87,218 @@ class Py42Response(object):
             chunk_size=chunk_size, decode_unicode=decode_unicode
         )
 
+    def download_to(
+        self,
+        destination,
+        chunk_size=DEFAULT_DOWNLOAD_CHUNK_SIZE,
+        progress_callback=None,
+        resume=False,
+        max_resumes=3,
+    ):
+        """Writes the streamed content of the response to a file. Data is read in large blocks
+        into a reusable buffer and its MD5 and SHA256 hashes are computed as it is written. Only
+        useful when ``stream=True`` is set on the request, such as for the responses returned by
+        ``sdk.archive.stream_from_backup()`` and ``sdk.securitydata.stream_file_by_sha256()``.
+
+        If the server supports range requests, a download that is interrupted by a dropped
+        connection is continued from the last byte written. The remaining bytes are only
+        appended when the server confirms, with the ``ETag`` or ``Last-Modified`` header of the
+        original response, that the content has not changed and sends them from the right
+        offset.
+
+        Args:
+            destination (str or file): The path of the file to write to or a writable binary
+                file object.
+            chunk_size (int, optional): The number of bytes to read into memory at once.
+                Defaults to 1 MiB.
+            progress_callback (callable, optional): A function called after each chunk is
+                written with the number of bytes downloaded so far and the total number of bytes
+                to download, or None if the server did not report a size. Defaults to None.
+            resume (bool, optional): If `destination` is a path to a file partially downloaded
+                from the same content, such as by an earlier interrupted call, only download the
+                remaining bytes, when the server allows it. The existing bytes are not checked,
+                so only set this when the file is known to hold the start of this content.
+                Defaults to False, which overwrites the file.
+            max_resumes (int, optional): The number of times to reconnect after the download is
+                interrupted. Defaults to 3.
+
+        Returns:
+            :class:`py42.response.DownloadResult`: The size and hashes of the downloaded file.
+        """
+        if not isinstance(destination, string_type):
+            return self._download(
+                destination, 0, chunk_size, progress_callback, max_resumes
+            )
+
+        offset = os.path.getsize(destination) if os.path.isfile(destination) else 0
+        if offset and not (resume and 0 < offset < (self._total_size or 0)):
+            offset = 0
+        with open(destination, u"ab" if offset else u"wb") as file_obj:
+            return self._download(
+                file_obj, offset, chunk_size, progress_callback, max_resumes
+            )
+
+    def _download(self, file_obj, offset, chunk_size, progress_callback, max_resumes):
+        md5 = hashlib.md5()
+        sha256 = hashlib.sha256()
+        total_size = self._total_size
+        if offset:
+            offset = self._resume_download(offset)
+            if offset:
+                _hash_existing_file(file_obj.name, offset, chunk_size, (md5, sha256))
+            else:
+                file_obj.seek(0)
+                file_obj.truncate()
+
+        downloaded = offset
+        buffer = bytearray(chunk_size)
+        resumes = 0
+        while True:
+            try:
+                for chunk in self._iter_chunks(buffer):
+                    file_obj.write(chunk)
+                    md5.update(chunk)
+                    sha256.update(chunk)
+                    downloaded += len(chunk)
+                    if progress_callback:
+                        progress_callback(downloaded, total_size)
+                break
+            except _INTERRUPTED_DOWNLOAD_ERRORS as err:
+                if resumes >= max_resumes or not self._resume_download(downloaded):
+                    raise
+                resumes += 1
+                debug.logger.info(
+                    u"Download interrupted after {} bytes, resuming. Error: {}".format(
+                        downloaded, str(err)
+                    )
+                )
+        return DownloadResult(downloaded, md5.hexdigest(), sha256.hexdigest())
+
+    def iter_zip_entries(
+        self, entry_filter=None, chunk_size=DEFAULT_DOWNLOAD_CHUNK_SIZE
+    ):
+        """Reads a streamed zip archive, such as the result of restoring several files with
+        ``sdk.archive.stream_from_backup()``, as it arrives and yields a ``(path, file)`` tuple
+        for each file in it. Each file is a read-only file-like object that also yields its
+        content in chunks when iterated over. It has to be read before moving on to the next
+        file; whatever is left of it is skipped.
+
+        Args:
+            entry_filter (callable, optional): A function that takes the path of a file in the
+                archive and returns False to skip it. Defaults to None.
+            chunk_size (int, optional): The number of bytes to read from the response at once.
+                Defaults to 1 MiB.
+
+        Usage example::
+
+            stream_response = sdk.archive.stream_from_backup(["/path/a.txt", "/path/b.txt"], "1234")
+            for path, file in stream_response.iter_zip_entries():
+                print(path, len(file.read()))
+        """
+        chunks = self._response.iter_content(chunk_size=chunk_size)
+        return ZipStreamReader(chunks).iter_entries(entry_filter=entry_filter)
+
+    def extract_zip_to(
+        self,
+        directory,
+        entry_filter=None,
+        max_workers=None,
+        chunk_size=DEFAULT_DOWNLOAD_CHUNK_SIZE,
+    ):
+        """Extracts a streamed zip archive to a directory as it arrives, without writing the
+        archive itself to disk. While the response is being read, a pool of threads writes and
+        hashes the files already received.
+
+        Args:
+            directory (str): The directory to extract the files to.
+            entry_filter (callable, optional): A function that takes the path of a file in the
+                archive and returns False to skip it. Defaults to None.
+            max_workers (int, optional): The most files to write at once. Defaults to 10.
+            chunk_size (int, optional): The number of bytes to read from the response at once.
+                Defaults to 1 MiB.
+
+        Returns:
+            dict: The :class:`py42.response.DownloadResult` of each extracted file, keyed by its
+            path in the archive.
+        """
+        entries = self.iter_zip_entries(
+            entry_filter=entry_filter, chunk_size=chunk_size
+        )
+        results = extract_entries(entries, directory, max_workers=max_workers)
+        return OrderedDict(
+            (path, DownloadResult(*result)) for path, result in results.items()
+        )
+
+    @property
+    def _total_size(self):
+        content_length = self._response.headers.get(u"Content-Length")
+        if content_length is None or self._is_content_encoded:
+            return None
+        return int(content_length)
+
+    @property
+    def _is_content_encoded(self):
+        encoding = self._response.headers.get(u"Content-Encoding", u"identity")
+        return encoding.lower() != u"identity"
+
+    def _iter_chunks(self, buffer):
+        if self._is_content_encoded:
+            # compressed bodies have to be decoded by requests
+            for chunk in self._response.iter_content(chunk_size=len(buffer)):
+                yield chunk
+            return
+
+        view = memoryview(buffer)
+        while True:
+            size = self._response.raw.readinto(buffer)
+            if not size:
+                return
+            yield view[:size]
+
+    def _resume_download(self, offset):
+        # replaces the underlying response with one starting at `offset`, returns the new offset
+        # or 0 when the new response holds the whole content instead
+        accept_ranges = self._response.headers.get(u"Accept-Ranges", u"none")
+        if accept_ranges.lower() != u"bytes" or self._is_content_encoded:
+            return 0
+
+        if self._range_validator is None:
+            self._range_validator = _get_range_validator(self._response)
+        request = self._response.request.copy()
+        request.headers[u"Range"] = u"bytes={}-".format(offset)
+        if self._range_validator:
+            # the server sends the whole content instead if it changed since the first response
+            request.headers[u"If-Range"] = self._range_validator
+        response = self._send(request)
+        if response.status_code == 206 and _starts_at(response, offset):
+            self._response = response
+            return offset
+
+        if response.status_code != 206:
+            # the server sent the whole content again
+            self._response = response
+        else:
+            response.close()
+            request.headers.pop(u"Range")
+            request.headers.pop(u"If-Range", None)
+            self._response = self._send(request)
+        return 0
+
+    def _send(self, request):
+        self._response.close()
+        try:
+            response = self._response.connection.send(
+                request,
+                stream=True,
+                timeout=60,
+                verify=settings.verify_ssl_certs,
+                proxies=settings.proxies,
+            )
+            response.raise_for_status()
+        except HTTPError as err:
+            raise_py42_error(err)
+        return response
+
     @property
     def raw_text(self):
         """The ``response.Response.text`` property. It contains raw metadata that is not included in
@@ -119,3 +357,55 @@ class Py42Response(object):
             self._data = self._response.text or u""
 
         return self._data
+
+
+class DownloadResult(object):
+    """The outcome of :meth:`py42.response.Py42Response.download_to`."""
+
+    def __init__(self, size, md5, sha256):
+        self._size = size
+        self._md5 = md5
+        self._sha256 = sha256
+
+    @property
+    def size(self):
+        """The number of bytes in the downloaded file."""
+        return self._size
+
+    @property
+    def md5(self):
+        """The MD5 hash of the downloaded file as a hex str."""
+        return self._md5
+
+    @property
+    def sha256(self):
+        """The SHA256 hash of the downloaded file as a hex str."""
+        return self._sha256
+
+
+def _hash_existing_file(path, size, chunk_size, hashes):
+    with open(path, u"rb") as file_obj:
+        remaining = size
+        while remaining:
+            chunk = file_obj.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            for hash_obj in hashes:
+                hash_obj.update(chunk)
+
+
+def _get_range_validator(response):
+    # weak entity tags cannot be used in an If-Range header
+    etag = response.headers.get(u"ETag")
+    if etag and not etag.startswith(u"W/"):
+        return etag
+    return response.headers.get(u"Last-Modified") or u""
+
+
+def _starts_at(response, offset):
+    # a Content-Range header looks like "bytes 300-999/1000"
+    content_range = response.headers.get(u"Content-Range", u"")
+    unit, _, byte_range = content_range.partition(u" ")
+    start = byte_range.partition(u"-")[0]
+    return unit.lower() == u"bytes" and start.isdigit() and int(start) == offset
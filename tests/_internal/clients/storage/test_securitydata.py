@@ -74,6 +74,14 @@ def security_detection_event_summary_params(security_detection_events_params):
     return params
 
 
+@pytest.fixture
+def plan_security_detection_event_summary_params(security_detection_events_params):
+    params = security_detection_events_params
+    params[u"planUid"] = "PlanUid"
+    params[u"summarize"] = True
+    return params
+
+
 class TestStorageSecurityClient(object):
     def test_get_plan_security_events_calls_get_with_correct_params(
         self,
@@ -123,3 +131,18 @@ class TestStorageSecurityClient(object):
             max_timestamp=mock_max_ts,
         )
         py42session.get.assert_called_once_with(uri, params=params)
+
+    def test_get_plan_security_event_summary_calls_get_with_correct_params(
+        self,
+        storage_security_client,
+        py42session,
+        plan_security_detection_event_summary_params,
+    ):
+        params = plan_security_detection_event_summary_params
+        storage_security_client.get_plan_security_event_summary(
+            plan_uid=params[u"planUid"],
+            cursor=params[u"cursor"],
+            min_timestamp=mock_min_ts,
+            max_timestamp=mock_max_ts,
+        )
+        py42session.get.assert_called_once_with(uri, params=params)
@@ -1,9 +1,14 @@
 import json
 
 import pytest
+from requests import ConnectionError
+from requests import HTTPError
+from requests import Response
 
 from py42._internal.clients.alertrules import AlertRulesClient
 from py42._internal.clients.detection_list_user import DetectionListUserClient
+from py42.exceptions import Py42BadRequestError
+from py42.exceptions import Py42NotFoundError
 
 MOCK_DETECTION_LIST_GET_RESPONSE = """
 {"type$": "USER_V2", "tenantId": "1d71796f-af5b-4231-9d8e-df6434da4663",
@@ -26,6 +31,29 @@ def mock_detection_list_user_client(mocker, py42_response):
     return detection_list_user_client
 
 
+def create_http_error(mocker, error_class, status_code):
+    http_error = HTTPError()
+    http_error.response = mocker.MagicMock(spec=Response)
+    http_error.response.status_code = status_code
+    return error_class(http_error)
+
+
+@pytest.fixture
+def mock_detection_list_user_client_with_aliases(mocker):
+    def get_by_id(user_id):
+        if user_id == u"missing-user-id":
+            raise create_http_error(mocker, Py42NotFoundError, 404)
+        return {u"cloudUsernames": [u"{}@example.com".format(user_id)]}
+
+    detection_list_user_client = mocker.MagicMock(spec=DetectionListUserClient)
+    detection_list_user_client.get_by_id.side_effect = get_by_id
+    return detection_list_user_client
+
+
+def get_posted_data(mock_session):
+    return [json.loads(call[1]["data"]) for call in mock_session.post.call_args_list]
+
+
 class TestAlertRulesClient(object):
     def test_add_user_posts_expected_data(
         self, mock_session, user_context, mock_detection_list_user_client
@@ -78,3 +106,124 @@ class TestAlertRulesClient(object):
             posted_data["tenantId"] == user_context.get_current_tenant_id()
             and posted_data["ruleId"] == u"rule-id"
         )
+
+    def test_add_users_posts_users_with_aliases_in_batches(
+        self, mock_session, user_context, mock_detection_list_user_client_with_aliases
+    ):
+        alert_rule_client = AlertRulesClient(
+            mock_session, user_context, mock_detection_list_user_client_with_aliases
+        )
+        alert_rule_client.USERS_BATCH_SIZE = 2
+        user_ids = [u"user-1", u"user-2", u"user-3", u"user-1"]
+        outcomes = alert_rule_client.add_users(u"rule-id", user_ids)
+
+        assert outcomes == {u"user-1": None, u"user-2": None, u"user-3": None}
+        assert mock_detection_list_user_client_with_aliases.get_by_id.call_count == 3
+        assert mock_session.post.call_count == 2
+        posted_data = sorted(
+            get_posted_data(mock_session), key=lambda data: len(data["userList"])
+        )
+        assert posted_data[0]["ruleId"] == u"rule-id"
+        assert posted_data[0]["userList"] == [
+            {
+                u"userIdFromAuthority": u"user-3",
+                u"userAliasList": [u"user-3@example.com"],
+            }
+        ]
+        assert [user["userIdFromAuthority"] for user in posted_data[1]["userList"]] == [
+            u"user-1",
+            u"user-2",
+        ]
+
+    def test_add_users_when_user_profile_missing_adds_other_users(
+        self, mock_session, user_context, mock_detection_list_user_client_with_aliases
+    ):
+        alert_rule_client = AlertRulesClient(
+            mock_session, user_context, mock_detection_list_user_client_with_aliases
+        )
+        outcomes = alert_rule_client.add_users(
+            u"rule-id", [u"missing-user-id", u"user-1"]
+        )
+
+        assert list(outcomes) == [u"missing-user-id", u"user-1"]
+        assert outcomes[u"missing-user-id"] is not None
+        assert outcomes[u"user-1"] is None
+        posted_data = get_posted_data(mock_session)
+        assert [user["userIdFromAuthority"] for user in posted_data[0]["userList"]] == [
+            u"user-1"
+        ]
+
+    def test_remove_users_when_batch_fails_returns_error_for_its_users(
+        self, mocker, mock_session, user_context, mock_detection_list_user_client
+    ):
+        def post(uri, data=None):
+            if u"user-3" in json.loads(data)["userIdList"]:
+                raise create_http_error(mocker, Py42BadRequestError, 400)
+
+        mock_session.post.side_effect = post
+        alert_rule_client = AlertRulesClient(
+            mock_session, user_context, mock_detection_list_user_client
+        )
+        alert_rule_client.USERS_BATCH_SIZE = 2
+        outcomes = alert_rule_client.remove_users(
+            u"rule-id", [u"user-1", u"user-2", u"user-3"]
+        )
+
+        assert list(outcomes) == [u"user-1", u"user-2", u"user-3"]
+        assert outcomes[u"user-1"] is None and outcomes[u"user-2"] is None
+        assert outcomes[u"user-3"] is not None
+        assert mock_session.post.call_count == 2
+
+    def test_remove_users_when_batch_connection_fails_returns_error_for_its_users(
+        self, mock_session, user_context, mock_detection_list_user_client
+    ):
+        def post(uri, data=None):
+            if u"user-3" in json.loads(data)["userIdList"]:
+                raise ConnectionError("Connection reset")
+
+        mock_session.post.side_effect = post
+        alert_rule_client = AlertRulesClient(
+            mock_session, user_context, mock_detection_list_user_client
+        )
+        alert_rule_client.USERS_BATCH_SIZE = 2
+        outcomes = alert_rule_client.remove_users(
+            u"rule-id", [u"user-1", u"user-2", u"user-3"]
+        )
+
+        assert outcomes == {
+            u"user-1": None,
+            u"user-2": None,
+            u"user-3": u"Connection reset",
+        }
+
+    def test_sync_users_adds_and_removes_only_changed_users(
+        self, mock_session, user_context, mock_detection_list_user_client_with_aliases
+    ):
+        alert_rule_client = AlertRulesClient(
+            mock_session, user_context, mock_detection_list_user_client_with_aliases
+        )
+        outcomes = alert_rule_client.sync_users(
+            u"rule-id", [u"user-1", u"user-2"], [u"user-2", u"user-3"]
+        )
+
+        assert outcomes == {u"user-1": None, u"user-3": None}
+        uris = [call[0][0] for call in mock_session.post.call_args_list]
+        assert uris == [
+            "/svc/api/v1/Rules/add-users",
+            "/svc/api/v1/Rules/remove-users",
+        ]
+        posted_data = get_posted_data(mock_session)
+        assert posted_data[0]["userList"][0]["userIdFromAuthority"] == u"user-1"
+        assert posted_data[1]["userIdList"] == [u"user-3"]
+
+    def test_sync_users_when_nothing_changed_posts_nothing(
+        self, mock_session, user_context, mock_detection_list_user_client
+    ):
+        alert_rule_client = AlertRulesClient(
+            mock_session, user_context, mock_detection_list_user_client
+        )
+        outcomes = alert_rule_client.sync_users(u"rule-id", [u"user-1"], [u"user-1"])
+
+        assert outcomes == {}
+        assert not mock_session.post.called
+        assert not mock_detection_list_user_client.get_by_id.called
@@ -2,11 +2,14 @@ import json
 
 import pytest
 from requests import Response
+from requests.exceptions import ConnectionError
 from requests.exceptions import HTTPError
 
 from py42._internal.clients.detection_list_user import DetectionListUserClient
 from py42.clients.users import UserClient
 from py42.exceptions import Py42BadRequestError
+from py42.exceptions import Py42InternalServerError
+from py42.exceptions import Py42NotFoundError
 
 
 class TestDetectionListUserClient(object):
@@ -223,6 +226,74 @@ class TestDetectionListUserClient(object):
             == "/api/User/942897397520289999"
         )
 
+    def test_create_many_if_not_exists_creates_only_missing_profiles(
+        self, mocker, mock_session, user_context, mock_user_client
+    ):
+        def post(uri, data=None):
+            user_id = json.loads(data).get("userId")
+            if uri.endswith("getbyid") and user_id == "missing-user-id":
+                response = mocker.MagicMock(spec=Response)
+                response.status_code = 404
+                exception = mocker.MagicMock(spec=HTTPError)
+                exception.response = response
+                raise Py42NotFoundError(exception)
+
+        mock_session.post.side_effect = post
+        detection_list_user_client = DetectionListUserClient(
+            mock_session, user_context, mock_user_client
+        )
+        outcomes = detection_list_user_client.create_many_if_not_exists(
+            ["user-id", "missing-user-id", "user-id"]
+        )
+
+        assert outcomes == {"user-id": None, "missing-user-id": None}
+        uris = sorted(call[0][0] for call in mock_session.post.call_args_list)
+        assert uris == [
+            "/svc/api/v2/user/create",
+            "/svc/api/v2/user/getbyid",
+            "/svc/api/v2/user/getbyid",
+        ]
+
+    def test_create_many_if_not_exists_returns_error_of_user_that_failed(
+        self, mocker, mock_session, user_context, mock_user_client
+    ):
+        def post(uri, data=None):
+            if json.loads(data).get("userId") == "bad-user-id":
+                response = mocker.MagicMock(spec=Response)
+                response.status_code = 500
+                exception = mocker.MagicMock(spec=HTTPError)
+                exception.response = response
+                raise Py42InternalServerError(exception)
+
+        mock_session.post.side_effect = post
+        detection_list_user_client = DetectionListUserClient(
+            mock_session, user_context, mock_user_client
+        )
+        outcomes = detection_list_user_client.create_many_if_not_exists(
+            ["bad-user-id", "user-id"]
+        )
+
+        assert list(outcomes) == ["bad-user-id", "user-id"]
+        assert outcomes["bad-user-id"] is not None
+        assert outcomes["user-id"] is None
+
+    def test_create_many_if_not_exists_when_connection_fails_returns_error_of_that_user(
+        self, mock_session, user_context, mock_user_client
+    ):
+        def post(uri, data=None):
+            if json.loads(data).get("userId") == "unreachable-user-id":
+                raise ConnectionError("Connection reset")
+
+        mock_session.post.side_effect = post
+        detection_list_user_client = DetectionListUserClient(
+            mock_session, user_context, mock_user_client
+        )
+        outcomes = detection_list_user_client.create_many_if_not_exists(
+            ["unreachable-user-id", "user-id"]
+        )
+
+        assert outcomes == {"unreachable-user-id": "Connection reset", "user-id": None}
+
     def test_refresh_posts_expected_data(
         self, mock_session, user_context, mock_user_client
     ):
@@ -0,0 +1,132 @@
+import json
+
+import pytest
+
+from py42._internal.alert_collector import AlertCheckpoint
+from py42._internal.alert_collector import AlertCollector
+from py42.exceptions import Py42Error
+from py42.sdk.queries.alerts.alert_query import AlertQuery
+from py42.sdk.queries.alerts.filters import AlertState
+
+
+def create_alert(number, created_at=None):
+    return {
+        "id": "alert-{}".format(number),
+        "createdAt": created_at or "2020-01-01T00:00:{:02d}.0000000Z".format(number),
+    }
+
+
+class StandInAlertClient(object):
+    def __init__(self, alerts):
+        self.alerts = alerts
+        self.queries = []
+        self.details_requests = []
+
+    def search_all(self, query, max_workers=None):
+        query = json.loads(query)
+        self.queries.append(query)
+        alerts = sorted(self.alerts, key=lambda alert: alert["createdAt"])
+        for group in query["groups"]:
+            for query_filter in group["filters"]:
+                if query_filter["operator"] == "ON_OR_AFTER":
+                    alerts = [
+                        alert
+                        for alert in alerts
+                        if alert["createdAt"] >= query_filter["value"]
+                    ]
+        return iter([dict(alert) for alert in alerts])
+
+    def get_details(self, alert_ids, max_workers=None):
+        self.details_requests.append(alert_ids)
+        return {
+            "alerts": [
+                {"id": alert_id, "observations": []} for alert_id in reversed(alert_ids)
+            ]
+        }
+
+
+def get_ids(alerts):
+    return [alert["id"] for alert in alerts]
+
+
+class TestAlertCollector(object):
+    def test_collect_yields_all_alerts_oldest_first_the_first_time(self):
+        client = StandInAlertClient([create_alert(2), create_alert(1)])
+        collector = AlertCollector(client)
+        assert get_ids(collector.collect()) == ["alert-1", "alert-2"]
+        assert client.queries[0]["srtKey"] == "CreatedAt"
+        assert client.queries[0]["srtDirection"] == "asc"
+
+    def test_collect_again_yields_only_new_alerts(self):
+        client = StandInAlertClient([create_alert(1), create_alert(2)])
+        collector = AlertCollector(client)
+        list(collector.collect())
+        client.alerts.append(create_alert(3))
+        assert get_ids(collector.collect()) == ["alert-3"]
+        since = client.queries[1]["groups"][-1]["filters"][0]
+        assert since["operator"] == "ON_OR_AFTER"
+        assert since["value"] == create_alert(2)["createdAt"]
+
+    def test_collect_again_yields_new_alerts_created_at_same_time_as_newest(self):
+        created_at = create_alert(2)["createdAt"]
+        client = StandInAlertClient([create_alert(1), create_alert(2)])
+        collector = AlertCollector(client)
+        list(collector.collect())
+        client.alerts.append(create_alert(3, created_at=created_at))
+        assert get_ids(collector.collect()) == ["alert-3"]
+        client.alerts.append(create_alert(4, created_at=created_at))
+        assert get_ids(collector.collect()) == ["alert-4"]
+
+    def test_collect_with_checkpoint_path_resumes_after_restart(self, tmpdir):
+        checkpoint_path = str(tmpdir.join("alerts.checkpoint"))
+        client = StandInAlertClient([create_alert(1), create_alert(2)])
+        list(AlertCollector(client, checkpoint_path=checkpoint_path).collect())
+        client.alerts.append(create_alert(3))
+        collector = AlertCollector(client, checkpoint_path=checkpoint_path)
+        assert get_ids(collector.collect()) == ["alert-3"]
+
+    def test_collect_when_stopped_mid_batch_delivers_batch_again(self, tmpdir):
+        checkpoint_path = str(tmpdir.join("alerts.checkpoint"))
+        client = StandInAlertClient([create_alert(i) for i in range(1, 6)])
+        collector = AlertCollector(client, checkpoint_path=checkpoint_path)
+        collector.BATCH_SIZE = 2
+        alerts = collector.collect()
+        assert get_ids([next(alerts) for _ in range(3)]) == [
+            "alert-1",
+            "alert-2",
+            "alert-3",
+        ]
+        alerts.close()
+        collector = AlertCollector(client, checkpoint_path=checkpoint_path)
+        assert get_ids(collector.collect()) == ["alert-3", "alert-4", "alert-5"]
+
+    def test_collect_with_include_details_yields_details_in_alert_order(self):
+        client = StandInAlertClient([create_alert(1), create_alert(2)])
+        collector = AlertCollector(client, include_details=True)
+        details = list(collector.collect())
+        assert get_ids(details) == ["alert-1", "alert-2"]
+        assert details[0]["observations"] == []
+        assert client.details_requests == [["alert-1", "alert-2"]]
+
+    def test_collect_keeps_query_filters(self):
+        client = StandInAlertClient([])
+        query = AlertQuery(AlertState.eq("OPEN"))
+        list(AlertCollector(client, query=query).collect())
+        assert client.queries[0]["groups"][0]["filters"][0]["value"] == "OPEN"
+
+    def test_collector_with_any_query_raises_error(self):
+        query = AlertQuery.any(AlertState.eq("OPEN"), AlertState.eq("PENDING"))
+        with pytest.raises(Py42Error):
+            AlertCollector(StandInAlertClient([]), query=query)
+
+
+class TestAlertCheckpoint(object):
+    def test_load_when_file_does_not_exist_returns_empty_checkpoint(self, tmpdir):
+        checkpoint = AlertCheckpoint(str(tmpdir.join("missing")))
+        assert checkpoint.load() == (None, set())
+
+    def test_save_writes_file_that_is_loaded_by_new_checkpoint(self, tmpdir):
+        path = str(tmpdir.join("alerts.checkpoint"))
+        AlertCheckpoint(path).save("2020-01-01", {"b", "a"})
+        assert AlertCheckpoint(path).load() == ("2020-01-01", {"a", "b"})
+        assert not tmpdir.join("alerts.checkpoint.tmp").check()
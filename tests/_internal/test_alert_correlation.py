@@ -0,0 +1,212 @@
+import json
+
+from requests import ConnectionError
+
+from py42._internal.alert_correlation import AlertEventCorrelator
+
+
+def create_event(event_id, timestamp, user="qa@example.com"):
+    return {
+        "eventId": event_id,
+        "eventTimestamp": "2020-01-01T00:00:{:02d}.000Z".format(timestamp),
+        "deviceUserName": user,
+    }
+
+
+def create_alert(alert_id, event_ids=None, period=None, actor="qa@example.com"):
+    if event_ids is not None:
+        data = {"files": [{"eventId": event_id} for event_id in event_ids]}
+    else:
+        data = {
+            "firstActivityAt": "2020-01-01T00:00:{:02d}.0000000Z".format(period[0]),
+            "lastActivityAt": "2020-01-01T00:00:{:02d}.0000000Z".format(period[1]),
+        }
+    return {"id": alert_id, "actor": actor, "observations": [{"data": data}]}
+
+
+class StandInAlertClient(object):
+    def __init__(self, alerts):
+        self.alerts = {alert["id"]: alert for alert in alerts}
+        self.details_requests = []
+
+    def get_details(self, alert_ids, max_workers=None):
+        self.details_requests.append(alert_ids)
+        return {"alerts": [self.alerts[alert_id] for alert_id in alert_ids]}
+
+
+class StandInFileEventClient(object):
+    def __init__(self, events):
+        self.events = events
+        self.queries = []
+
+    def search(self, query):
+        query = json.loads(str(query))
+        self.queries.append(query)
+        events = [event for event in self.events if _matches(query, event)]
+        start = (query["pgNum"] - 1) * query["pgSize"]
+        end = start + query["pgSize"]
+        return {"fileEvents": events[start:end]}
+
+
+def _matches(query, event):
+    return all(_matches_group(group, event) for group in query["groups"])
+
+
+def _matches_group(group, event):
+    matches = [
+        _matches_filter(query_filter, event) for query_filter in group["filters"]
+    ]
+    return any(matches) if group["filterClause"] == "OR" else all(matches)
+
+
+def _matches_filter(query_filter, event):
+    value = event.get(query_filter["term"])
+    if query_filter["operator"] == "IS":
+        return value == query_filter["value"]
+    if query_filter["operator"] == "ON_OR_AFTER":
+        return value >= query_filter["value"]
+    return value <= query_filter["value"]
+
+
+def correlate(alerts, events, alert_ids=None, **kwargs):
+    alert_client = StandInAlertClient(alerts)
+    file_event_client = StandInFileEventClient(events)
+    correlator = AlertEventCorrelator(alert_client, file_event_client)
+    for name, value in kwargs.items():
+        setattr(correlator, name, value)
+    if alert_ids is None:
+        alert_ids = [alert["id"] for alert in alerts]
+    results = [
+        (alert_id, [event["eventId"] for event in alert_events], error)
+        for alert_id, alert_events, error in correlator.correlate(alert_ids)
+    ]
+    return results, alert_client, file_event_client
+
+
+class TestAlertEventCorrelator(object):
+    def test_correlate_yields_events_of_observation_event_ids_in_alert_order(self):
+        alerts = [
+            create_alert("alert-1", event_ids=["event-1", "event-2"]),
+            create_alert("alert-2", event_ids=["event-2", "event-3"]),
+            create_alert("alert-3", event_ids=[]),
+        ]
+        events = [create_event("event-{}".format(i), i) for i in range(1, 5)]
+        results, _, file_event_client = correlate(alerts, events)
+        assert results == [
+            ("alert-1", ["event-1", "event-2"], None),
+            ("alert-2", ["event-2", "event-3"], None),
+            ("alert-3", [], None),
+        ]
+        assert len(file_event_client.queries) == 1
+
+    def test_correlate_splits_event_ids_into_queries_of_expected_size(self):
+        alerts = [create_alert("alert-1", event_ids=["event-1", "event-2", "event-3"])]
+        events = [create_event("event-{}".format(i), i) for i in range(1, 4)]
+        results, _, file_event_client = correlate(alerts, events, EVENT_IDS_PER_QUERY=2)
+        assert results == [("alert-1", ["event-1", "event-2", "event-3"], None)]
+        assert len(file_event_client.queries) == 2
+
+    def test_correlate_merges_overlapping_activity_periods_of_same_actor(self):
+        alerts = [
+            create_alert("alert-1", period=(1, 5)),
+            create_alert("alert-2", period=(4, 8)),
+            create_alert("alert-3", period=(20, 30)),
+        ]
+        events = [
+            create_event("event-3", 3),
+            create_event("event-4", 4),
+            create_event("event-7", 7),
+            create_event("event-9", 9),
+            create_event("event-25", 25),
+            create_event("event-other", 4, user="other@example.com"),
+        ]
+        results, _, file_event_client = correlate(alerts, events)
+        assert results == [
+            ("alert-1", ["event-3", "event-4"], None),
+            ("alert-2", ["event-4", "event-7"], None),
+            ("alert-3", ["event-25"], None),
+        ]
+        assert len(file_event_client.queries) == 2
+
+    def test_correlate_fetches_details_in_chunks(self):
+        alerts = [create_alert("alert-{}".format(i), event_ids=[]) for i in range(5)]
+        results, alert_client, _ = correlate(alerts, [], CHUNK_SIZE=2)
+        assert [result[0] for result in results] == [alert["id"] for alert in alerts]
+        assert alert_client.details_requests == [
+            ["alert-0", "alert-1"],
+            ["alert-2", "alert-3"],
+            ["alert-4"],
+        ]
+
+    def test_correlate_requests_each_alert_once(self):
+        alerts = [create_alert("alert-1", event_ids=[])]
+        results, alert_client, _ = correlate(
+            alerts, [], alert_ids=["alert-1", "alert-1"]
+        )
+        assert results == [("alert-1", [], None)]
+        assert alert_client.details_requests == [["alert-1"]]
+
+    def test_correlate_gets_every_page_of_events(self):
+        alerts = [create_alert("alert-1", period=(0, 59))]
+        events = [create_event("event-{}".format(i), i) for i in range(5)]
+        alert_client = StandInAlertClient(alerts)
+        file_event_client = StandInFileEventClient(events)
+        correlator = AlertEventCorrelator(alert_client, file_event_client)
+        original_search = file_event_client.search
+
+        def search(query):
+            query.page_size = 2
+            return original_search(query)
+
+        file_event_client.search = search
+        results = list(correlator.correlate(["alert-1"]))
+        assert len(results[0][1]) == 5
+        assert [query["pgNum"] for query in file_event_client.queries] == [1, 2, 3]
+        assert results[0][2] is None
+
+    def test_correlate_stops_paging_at_result_limit_and_reports_it(self):
+        alerts = [create_alert("alert-1", period=(0, 59))]
+        events = [create_event("event-{}".format(i), i) for i in range(5)]
+        alert_client = StandInAlertClient(alerts)
+        file_event_client = StandInFileEventClient(events)
+        correlator = AlertEventCorrelator(alert_client, file_event_client)
+        correlator.MAX_RESULTS_PER_SEARCH = 4
+        original_search = file_event_client.search
+
+        def search(query):
+            query.page_size = 2
+            return original_search(query)
+
+        file_event_client.search = search
+        results = list(correlator.correlate(["alert-1"]))
+        assert len(results[0][1]) == 4
+        assert results[0][2] is not None
+        assert [query["pgNum"] for query in file_event_client.queries] == [1, 2]
+
+    def test_correlate_when_search_fails_reports_error_and_yields_other_alerts(self):
+        alerts = [
+            create_alert("alert-1", event_ids=["event-1"]),
+            create_alert("alert-2", period=(1, 5)),
+        ]
+        events = [create_event("event-1", 1), create_event("event-3", 3)]
+        alert_client = StandInAlertClient(alerts)
+        file_event_client = StandInFileEventClient(events)
+        correlator = AlertEventCorrelator(alert_client, file_event_client)
+        original_search = file_event_client.search
+
+        def search(query):
+            if "eventTimestamp" in str(query):
+                raise ConnectionError("Connection reset")
+            return original_search(query)
+
+        file_event_client.search = search
+        results = [
+            (alert_id, [event["eventId"] for event in alert_events], error)
+            for alert_id, alert_events, error in correlator.correlate(
+                ["alert-1", "alert-2"]
+            )
+        ]
+        assert results == [
+            ("alert-1", ["event-1"], None),
+            ("alert-2", [], "Connection reset"),
+        ]
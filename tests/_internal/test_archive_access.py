@@ -1,22 +1,37 @@
 # -*- coding: utf-8 -*-
+import hashlib
+import io
 import json
+import threading
 import time
+import zipfile
 
 import pytest
+from requests import ConnectionError
+from requests import HTTPError
 from requests import Response
 
 import py42.util
 from py42._internal.archive_access import ArchiveAccessor
 from py42._internal.archive_access import ArchiveAccessorManager
+from py42._internal.archive_access import BackupFileLocator
+from py42._internal.archive_access import BatchRestorer
+from py42._internal.archive_access import call_with_archive_accessor
 from py42._internal.archive_access import FileSelection
 from py42._internal.archive_access import FileSizePoller
 from py42._internal.archive_access import FileType
 from py42._internal.archive_access import RestoreJobManager
+from py42._internal.archive_access import RestoreJobScheduler
+from py42._internal.archive_access import WatchedRestoreJob
+from py42._internal.archive_index import ArchiveIndex
 from py42._internal.clients.archive import ArchiveClient
 from py42._internal.clients.storage import StorageArchiveClient
 from py42._internal.clients.storage import StorageClient
 from py42._internal.clients.storage import StorageClientFactory
+from py42.clients.devices import DeviceClient
 from py42.exceptions import Py42ArchiveFileNotFoundError
+from py42.exceptions import Py42HTTPError
+from py42.exceptions import Py42RestoreTimeoutError
 from py42.response import Py42Response
 
 DEVICE_GUID = "device-guid"
@@ -481,6 +496,13 @@ def mock_walking_tree_for_windows_path(mocker, storage_archive_client):
     mock_get_file_path_metadata_responses(mocker, storage_archive_client, responses)
 
 
+def mock_search_results(mocker, storage_archive_client, results):
+    mock_response = mocker.MagicMock(spec=Response)
+    mock_response.status_code = 200
+    mock_response.text = json.dumps(results)
+    storage_archive_client.search_paths.return_value = Py42Response(mock_response)
+
+
 def get_response_job_id(response_str):
     return json.loads(response_str)["jobId"]
 
@@ -633,6 +655,173 @@ class TestArchiveAccessManager(object):
         with pytest.raises(Exception):
             accessor_manager.get_archive_accessor(INVALID_DEVICE_GUID)
 
+    def test_get_archive_accessor_when_called_again_reuses_restore_session(
+        self,
+        archive_client,
+        storage_client_factory,
+        storage_client,
+        storage_archive_client,
+    ):
+        storage_client.archive = storage_archive_client
+        storage_client_factory.from_device_guid.return_value = storage_client
+        accessor_manager = ArchiveAccessorManager(
+            archive_client, storage_client_factory
+        )
+        first = accessor_manager.get_archive_accessor(DEVICE_GUID, DESTINATION_GUID)
+        second = accessor_manager.get_archive_accessor(DEVICE_GUID, DESTINATION_GUID)
+        assert first is second
+        assert storage_archive_client.create_restore_session.call_count == 1
+        assert archive_client.get_data_key_token.call_count == 1
+
+    def test_get_archive_accessor_with_different_key_material_creates_new_restore_session(
+        self,
+        archive_client,
+        storage_client_factory,
+        storage_client,
+        storage_archive_client,
+    ):
+        storage_client.archive = storage_archive_client
+        storage_client_factory.from_device_guid.return_value = storage_client
+        accessor_manager = ArchiveAccessorManager(
+            archive_client, storage_client_factory
+        )
+        first = accessor_manager.get_archive_accessor(
+            DEVICE_GUID, private_password="password"
+        )
+        second = accessor_manager.get_archive_accessor(
+            DEVICE_GUID, private_password="other-password"
+        )
+        assert first is not second
+        assert storage_archive_client.create_restore_session.call_count == 2
+
+    def test_get_archive_accessor_after_idle_timeout_creates_new_restore_session(
+        self,
+        mocker,
+        archive_client,
+        storage_client_factory,
+        storage_client,
+        storage_archive_client,
+    ):
+        mock_time = mocker.patch("py42._internal.archive_access.time")
+        idle_timeout = ArchiveAccessorManager.ACCESSOR_IDLE_TIMEOUT_SECONDS
+        mock_time.time.side_effect = [0, 0, idle_timeout + 1, idle_timeout + 1]
+        storage_client.archive = storage_archive_client
+        storage_client_factory.from_device_guid.return_value = storage_client
+        accessor_manager = ArchiveAccessorManager(
+            archive_client, storage_client_factory
+        )
+        first = accessor_manager.get_archive_accessor(DEVICE_GUID)
+        second = accessor_manager.get_archive_accessor(DEVICE_GUID)
+        assert first is not second
+        assert storage_archive_client.create_restore_session.call_count == 2
+
+    def test_get_archive_accessor_after_max_age_creates_new_restore_session(
+        self,
+        mocker,
+        archive_client,
+        storage_client_factory,
+        storage_client,
+        storage_archive_client,
+    ):
+        mock_time = mocker.patch("py42._internal.archive_access.time")
+        idle_timeout = ArchiveAccessorManager.ACCESSOR_IDLE_TIMEOUT_SECONDS
+        max_age = ArchiveAccessorManager.ACCESSOR_MAX_AGE_SECONDS
+        mock_time.time.return_value = 0
+        storage_client.archive = storage_archive_client
+        storage_client_factory.from_device_guid.return_value = storage_client
+        accessor_manager = ArchiveAccessorManager(
+            archive_client, storage_client_factory
+        )
+        first = accessor_manager.get_archive_accessor(DEVICE_GUID)
+        # used often enough never to go idle
+        now = 0
+        while now <= max_age:
+            now += idle_timeout - 1
+            mock_time.time.return_value = now
+            last = accessor_manager.get_archive_accessor(DEVICE_GUID)
+        assert first is not last
+        assert storage_archive_client.create_restore_session.call_count == 2
+
+    def test_discard_archive_accessor_creates_new_restore_session_next_time(
+        self,
+        archive_client,
+        storage_client_factory,
+        storage_client,
+        storage_archive_client,
+    ):
+        storage_client.archive = storage_archive_client
+        storage_client_factory.from_device_guid.return_value = storage_client
+        accessor_manager = ArchiveAccessorManager(
+            archive_client, storage_client_factory
+        )
+        first = accessor_manager.get_archive_accessor(DEVICE_GUID)
+        accessor_manager.discard_archive_accessor(first)
+        second = accessor_manager.get_archive_accessor(DEVICE_GUID)
+        assert first is not second
+        assert storage_archive_client.create_restore_session.call_count == 2
+
+
+def create_http_error(status_code):
+    response = Response()
+    response.status_code = status_code
+    return Py42HTTPError(HTTPError(response=response))
+
+
+class TestCallWithArchiveAccessor(object):
+    @pytest.fixture
+    def accessor_manager(self, mocker):
+        manager = mocker.MagicMock(spec=ArchiveAccessorManager)
+        manager.get_archive_accessor.side_effect = ["expired", "fresh"]
+        return manager
+
+    def test_call_with_archive_accessor_returns_result_of_call(self, accessor_manager):
+        result = call_with_archive_accessor(
+            accessor_manager, lambda accessor: accessor, DEVICE_GUID
+        )
+        assert result == "expired"
+        accessor_manager.get_archive_accessor.assert_called_once_with(DEVICE_GUID)
+
+    def test_call_with_archive_accessor_when_client_error_retries_with_new_accessor(
+        self, accessor_manager
+    ):
+        def func(accessor):
+            if accessor == "expired":
+                raise create_http_error(401)
+            return accessor
+
+        result = call_with_archive_accessor(
+            accessor_manager, func, DEVICE_GUID, destination_guid=DESTINATION_GUID
+        )
+        assert result == "fresh"
+        accessor_manager.discard_archive_accessor.assert_called_once_with("expired")
+        accessor_manager.get_archive_accessor.assert_called_with(
+            DEVICE_GUID, destination_guid=DESTINATION_GUID
+        )
+
+    def test_call_with_archive_accessor_when_forbidden_retries_with_new_accessor(
+        self, accessor_manager
+    ):
+        def func(accessor):
+            if accessor == "expired":
+                raise create_http_error(403)
+            return accessor
+
+        result = call_with_archive_accessor(accessor_manager, func, DEVICE_GUID)
+        assert result == "fresh"
+        accessor_manager.discard_archive_accessor.assert_called_once_with("expired")
+
+    @pytest.mark.parametrize("status_code", [400, 404, 429, 500])
+    def test_call_with_archive_accessor_when_other_error_raises_without_retrying(
+        self, accessor_manager, status_code
+    ):
+        def func(accessor):
+            raise create_http_error(status_code)
+
+        with pytest.raises(Py42HTTPError):
+            call_with_archive_accessor(accessor_manager, func, DEVICE_GUID)
+        assert not accessor_manager.discard_archive_accessor.call_count
+        assert accessor_manager.get_archive_accessor.call_count == 1
+
 
 class TestArchiveAccessor(object):
     def test_archive_accessor_constructor_constructs_successfully(
@@ -661,7 +850,9 @@ class TestArchiveAccessor(object):
         )
         archive_accessor.stream_from_backup("/", file_size_calc_timeout=0)
         expected_file_selection = [get_file_selection(FileType.DIRECTORY, "/")]
-        restore_job_manager.get_stream.assert_called_once_with(expected_file_selection)
+        restore_job_manager.get_stream.assert_called_once_with(
+            expected_file_selection, timeout=None, progress_callback=None
+        )
 
     def test_stream_from_backup_with_root_level_folder_calls_get_stream(
         self, mocker, storage_archive_client, restore_job_manager, file_size_poller
@@ -680,7 +871,9 @@ class TestArchiveAccessor(object):
         )
         archive_accessor.stream_from_backup(USERS_DIR)
         expected_file_selection = [get_file_selection(FileType.DIRECTORY, USERS_DIR)]
-        restore_job_manager.get_stream.assert_called_once_with(expected_file_selection)
+        restore_job_manager.get_stream.assert_called_once_with(
+            expected_file_selection, timeout=None, progress_callback=None
+        )
 
     def test_stream_from_backup_with_file_path_calls_get_stream(
         self, mocker, storage_archive_client, restore_job_manager, file_size_poller
@@ -699,7 +892,9 @@ class TestArchiveAccessor(object):
         expected_file_selection = [
             get_file_selection(FileType.FILE, PATH_TO_FILE_IN_DOWNLOADS_FOLDER)
         ]
-        restore_job_manager.get_stream.assert_called_once_with(expected_file_selection)
+        restore_job_manager.get_stream.assert_called_once_with(
+            expected_file_selection, timeout=None, progress_callback=None
+        )
 
     def test_stream_from_backup_normalizes_windows_paths(
         self, mocker, storage_archive_client, restore_job_manager, file_size_poller,
@@ -714,7 +909,9 @@ class TestArchiveAccessor(object):
         )
         archive_accessor.stream_from_backup("C:\\", file_size_calc_timeout=0)
         expected_file_selection = [get_file_selection(FileType.DIRECTORY, "C:/")]
-        restore_job_manager.get_stream.assert_called_once_with(expected_file_selection)
+        restore_job_manager.get_stream.assert_called_once_with(
+            expected_file_selection, timeout=None, progress_callback=None
+        )
 
     def test_stream_from_backup_calls_get_file_size_with_expected_params(
         self, mocker, storage_archive_client, restore_job_manager, file_size_poller,
@@ -762,7 +959,9 @@ class TestArchiveAccessor(object):
             ),
             get_file_selection(FileType.DIRECTORY, PATH_TO_DESKTOP_FOLDER, 4, 5, 6,),
         ]
-        restore_job_manager.get_stream.assert_called_once_with(expected_file_selection)
+        restore_job_manager.get_stream.assert_called_once_with(
+            expected_file_selection, timeout=None, progress_callback=None
+        )
 
     def test_stream_from_backup_with_file_not_in_archive_raises_exception(
         self, mocker, storage_archive_client, restore_job_manager, file_size_poller,
@@ -867,6 +1066,352 @@ class TestArchiveAccessor(object):
             WEB_RESTORE_SESSION_ID, DEVICE_GUID, file_id=mocker.ANY, show_deleted=True
         )
 
+    def test_stream_from_backup_with_paths_sharing_directories_lists_each_directory_once(
+        self, mocker, storage_archive_client, restore_job_manager, file_size_poller,
+    ):
+        mock_walking_to_downloads_folder(mocker, storage_archive_client)
+        archive_accessor = ArchiveAccessor(
+            DEVICE_GUID,
+            WEB_RESTORE_SESSION_ID,
+            storage_archive_client,
+            restore_job_manager,
+            file_size_poller,
+        )
+        file_size_poller.get_file_sizes.return_value = [
+            {u"numFiles": 1, u"numDirs": 1, u"size": 1},
+            {u"numFiles": 1, u"numDirs": 1, u"size": 1},
+        ]
+        archive_accessor.stream_from_backup(
+            [PATH_TO_FILE_IN_DOWNLOADS_FOLDER, PATH_TO_DESKTOP_FOLDER],
+        )
+        # once each for "/", "/Users", "/Users/qa" and "/Users/qa/Downloads"
+        assert storage_archive_client.get_file_path_metadata.call_count == 5
+
+    def test_stream_from_backup_when_called_again_reuses_listed_directories(
+        self, mocker, storage_archive_client, restore_job_manager, file_size_poller,
+    ):
+        mock_walking_to_downloads_folder(mocker, storage_archive_client)
+        archive_accessor = ArchiveAccessor(
+            DEVICE_GUID,
+            WEB_RESTORE_SESSION_ID,
+            storage_archive_client,
+            restore_job_manager,
+            file_size_poller,
+        )
+        archive_accessor.stream_from_backup(
+            PATH_TO_FILE_IN_DOWNLOADS_FOLDER, file_size_calc_timeout=0
+        )
+        call_count = storage_archive_client.get_file_path_metadata.call_count
+        archive_accessor.stream_from_backup(
+            PATH_TO_DOWNLOADS_FOLDER, file_size_calc_timeout=0
+        )
+        assert storage_archive_client.get_file_path_metadata.call_count == call_count
+
+    def test_stream_from_backup_matches_path_components_ignoring_case(
+        self, mocker, storage_archive_client, restore_job_manager, file_size_poller,
+    ):
+        mock_walking_to_downloads_folder(mocker, storage_archive_client)
+        archive_accessor = ArchiveAccessor(
+            DEVICE_GUID,
+            WEB_RESTORE_SESSION_ID,
+            storage_archive_client,
+            restore_job_manager,
+            file_size_poller,
+        )
+        archive_accessor.stream_from_backup(
+            PATH_TO_FILE_IN_DOWNLOADS_FOLDER.upper(), file_size_calc_timeout=0
+        )
+        expected_file_selection = [
+            get_file_selection(FileType.FILE, PATH_TO_FILE_IN_DOWNLOADS_FOLDER)
+        ]
+        restore_job_manager.get_stream.assert_called_once_with(
+            expected_file_selection, timeout=None, progress_callback=None
+        )
+
+    def test_stream_from_backup_with_deep_path_found_by_search_does_not_walk_tree(
+        self, mocker, storage_archive_client, restore_job_manager, file_size_poller,
+    ):
+        mock_walking_to_downloads_folder(mocker, storage_archive_client)
+        mock_search_results(
+            mocker,
+            storage_archive_client,
+            [
+                {
+                    "id": DOWNLOADS_ID,
+                    "path": PATH_TO_FILE_IN_DOWNLOADS_FOLDER,
+                    "type": "file",
+                    "deleted": False,
+                }
+            ],
+        )
+        archive_accessor = ArchiveAccessor(
+            DEVICE_GUID,
+            WEB_RESTORE_SESSION_ID,
+            storage_archive_client,
+            restore_job_manager,
+            file_size_poller,
+        )
+        archive_accessor.stream_from_backup(
+            PATH_TO_FILE_IN_DOWNLOADS_FOLDER, file_size_calc_timeout=0
+        )
+        storage_archive_client.search_paths.assert_called_once_with(
+            WEB_RESTORE_SESSION_ID,
+            DEVICE_GUID,
+            regex=r"(?i)(?:^|/)(?:terminator-genisys\.jpg)$",
+            max_results=ArchiveAccessor.SEARCH_MAX_RESULTS,
+            show_deleted=True,
+        )
+        assert storage_archive_client.get_file_path_metadata.call_count == 0
+        expected_file_selection = [
+            get_file_selection(FileType.FILE, PATH_TO_FILE_IN_DOWNLOADS_FOLDER)
+        ]
+        restore_job_manager.get_stream.assert_called_once_with(
+            expected_file_selection, timeout=None, progress_callback=None
+        )
+
+    def test_stream_from_backup_with_many_deep_paths_searches_for_them_together(
+        self, mocker, storage_archive_client, restore_job_manager, file_size_poller,
+    ):
+        mock_walking_to_downloads_folder(mocker, storage_archive_client)
+        other_path = "/Users/qa/Downloads/other.txt"
+        mock_search_results(
+            mocker,
+            storage_archive_client,
+            [
+                {"id": "1", "path": PATH_TO_FILE_IN_DOWNLOADS_FOLDER, "type": "file"},
+                {"id": "2", "path": "/Users/qa/Desktop/other.txt", "type": "file"},
+                {"id": "3", "path": other_path, "type": "file"},
+            ],
+        )
+        file_size_poller.get_file_sizes.return_value = None
+        archive_accessor = ArchiveAccessor(
+            DEVICE_GUID,
+            WEB_RESTORE_SESSION_ID,
+            storage_archive_client,
+            restore_job_manager,
+            file_size_poller,
+        )
+        archive_accessor.stream_from_backup(
+            [PATH_TO_FILE_IN_DOWNLOADS_FOLDER, other_path], file_size_calc_timeout=0
+        )
+        assert storage_archive_client.search_paths.call_count == 1
+        assert storage_archive_client.get_file_path_metadata.call_count == 0
+        file_size_poller.get_file_sizes.assert_called_once_with(["1", "3"], timeout=0)
+
+    def test_stream_from_backup_when_search_misses_path_walks_tree(
+        self, mocker, storage_archive_client, restore_job_manager, file_size_poller,
+    ):
+        mock_walking_to_downloads_folder(mocker, storage_archive_client)
+        mock_search_results(mocker, storage_archive_client, [])
+        archive_accessor = ArchiveAccessor(
+            DEVICE_GUID,
+            WEB_RESTORE_SESSION_ID,
+            storage_archive_client,
+            restore_job_manager,
+            file_size_poller,
+        )
+        archive_accessor.stream_from_backup(
+            PATH_TO_FILE_IN_DOWNLOADS_FOLDER, file_size_calc_timeout=0
+        )
+        assert storage_archive_client.get_file_path_metadata.call_count == 5
+        expected_file_selection = [
+            get_file_selection(FileType.FILE, PATH_TO_FILE_IN_DOWNLOADS_FOLDER)
+        ]
+        restore_job_manager.get_stream.assert_called_once_with(
+            expected_file_selection, timeout=None, progress_callback=None
+        )
+
+    def test_stream_from_backup_when_search_fails_walks_tree(
+        self, mocker, storage_archive_client, restore_job_manager, file_size_poller,
+    ):
+        mock_walking_to_downloads_folder(mocker, storage_archive_client)
+        storage_archive_client.search_paths.side_effect = Py42HTTPError(HTTPError())
+        archive_accessor = ArchiveAccessor(
+            DEVICE_GUID,
+            WEB_RESTORE_SESSION_ID,
+            storage_archive_client,
+            restore_job_manager,
+            file_size_poller,
+        )
+        archive_accessor.stream_from_backup(
+            PATH_TO_FILE_IN_DOWNLOADS_FOLDER, file_size_calc_timeout=0
+        )
+        expected_file_selection = [
+            get_file_selection(FileType.FILE, PATH_TO_FILE_IN_DOWNLOADS_FOLDER)
+        ]
+        restore_job_manager.get_stream.assert_called_once_with(
+            expected_file_selection, timeout=None, progress_callback=None
+        )
+
+    def test_stream_from_backup_with_shallow_path_does_not_search(
+        self, mocker, storage_archive_client, restore_job_manager, file_size_poller,
+    ):
+        mock_walking_to_downloads_folder(mocker, storage_archive_client)
+        archive_accessor = ArchiveAccessor(
+            DEVICE_GUID,
+            WEB_RESTORE_SESSION_ID,
+            storage_archive_client,
+            restore_job_manager,
+            file_size_poller,
+        )
+        archive_accessor.stream_from_backup(
+            PATH_TO_DOWNLOADS_FOLDER, file_size_calc_timeout=0
+        )
+        storage_archive_client.search_paths.assert_not_called()
+
+    def test_crawl_indexes_tree_down_to_max_depth(
+        self, mocker, storage_archive_client, restore_job_manager, file_size_poller
+    ):
+        mock_walking_to_downloads_folder(mocker, storage_archive_client)
+        archive_accessor = ArchiveAccessor(
+            DEVICE_GUID,
+            WEB_RESTORE_SESSION_ID,
+            storage_archive_client,
+            restore_job_manager,
+            file_size_poller,
+        )
+        index = ArchiveIndex(":memory:")
+        assert archive_accessor.crawl(index, max_depth=3) == 3
+        nodes = index.find_by_name("downloads")
+        assert [node["path"] for node in nodes] == [PATH_TO_DOWNLOADS_FOLDER]
+        assert nodes[0]["deviceGuid"] == DEVICE_GUID
+        index.close()
+
+    def test_crawl_with_path_indexes_only_that_directory(
+        self, mocker, storage_archive_client, restore_job_manager, file_size_poller
+    ):
+        mock_walking_to_downloads_folder(mocker, storage_archive_client)
+        archive_accessor = ArchiveAccessor(
+            DEVICE_GUID,
+            WEB_RESTORE_SESSION_ID,
+            storage_archive_client,
+            restore_job_manager,
+            file_size_poller,
+        )
+        index = ArchiveIndex(":memory:")
+        assert archive_accessor.crawl(index, path=PATH_TO_DOWNLOADS_FOLDER) == 1
+        assert [node["path"] for node in index.find_by_prefix("/")] == [
+            PATH_TO_DOWNLOADS_FOLDER,
+            "/Users/qa/Downloads/Terminator II Screenplay.pdf",
+            PATH_TO_FILE_IN_DOWNLOADS_FOLDER,
+        ]
+        index.close()
+
+    def test_find_files_with_path_returns_entry_with_size(
+        self, mocker, storage_archive_client, restore_job_manager, file_size_poller
+    ):
+        mock_walking_to_downloads_folder(mocker, storage_archive_client)
+        archive_accessor = ArchiveAccessor(
+            DEVICE_GUID,
+            WEB_RESTORE_SESSION_ID,
+            storage_archive_client,
+            restore_job_manager,
+            file_size_poller,
+        )
+        entries = archive_accessor.find_files(PATH_TO_DOWNLOADS_FOLDER)
+        assert entries == [
+            {
+                "path": PATH_TO_DOWNLOADS_FOLDER,
+                "type": "directory",
+                "id": "f939cfc4d476ec5535ccb0f6c0377ef4",
+                "deleted": False,
+                "numFiles": 1,
+                "numDirs": 1,
+                "size": 1,
+            }
+        ]
+
+    def test_find_files_with_path_not_in_archive_returns_empty_list(
+        self, mocker, storage_archive_client, restore_job_manager, file_size_poller
+    ):
+        mock_walking_to_downloads_folder(mocker, storage_archive_client)
+        archive_accessor = ArchiveAccessor(
+            DEVICE_GUID,
+            WEB_RESTORE_SESSION_ID,
+            storage_archive_client,
+            restore_job_manager,
+            file_size_poller,
+        )
+        assert archive_accessor.find_files("/Users/qa/missing") == []
+        file_size_poller.get_file_sizes.assert_not_called()
+
+    def test_find_files_with_pattern_returns_search_results_matching_whole_path(
+        self, mocker, storage_archive_client, restore_job_manager, file_size_poller
+    ):
+        mock_search_results(
+            mocker,
+            storage_archive_client,
+            [
+                {"id": "1", "path": "/Users/qa/Documents/a.pdf", "type": "file"},
+                {"id": "2", "path": "/Users/qa/Desktop/b.pdf", "type": "file"},
+            ],
+        )
+        file_size_poller.get_file_sizes.return_value = None
+        archive_accessor = ArchiveAccessor(
+            DEVICE_GUID,
+            WEB_RESTORE_SESSION_ID,
+            storage_archive_client,
+            restore_job_manager,
+            file_size_poller,
+        )
+        entries = archive_accessor.find_files("/Users/*/documents/*.PDF")
+        storage_archive_client.search_paths.assert_called_once_with(
+            WEB_RESTORE_SESSION_ID,
+            DEVICE_GUID,
+            regex="(?i)(?:^|/)[^/]*\\.PDF$",
+            max_results=ArchiveAccessor.SEARCH_MAX_RESULTS,
+            show_deleted=True,
+        )
+        assert [entry["path"] for entry in entries] == ["/Users/qa/Documents/a.pdf"]
+        assert entries[0]["size"] is None
+
+    def test_find_files_with_path_of_deleted_file_returns_deleted_entry(
+        self, mocker, storage_archive_client, restore_job_manager, file_size_poller
+    ):
+        path = "/Users/qa/Documents/old/report.pdf"
+        mock_search_results(
+            mocker,
+            storage_archive_client,
+            [{"id": "1", "path": path, "type": "file", "deleted": True}],
+        )
+        file_size_poller.get_file_sizes.return_value = None
+        archive_accessor = ArchiveAccessor(
+            DEVICE_GUID,
+            WEB_RESTORE_SESSION_ID,
+            storage_archive_client,
+            restore_job_manager,
+            file_size_poller,
+        )
+        entries = archive_accessor.find_files(path)
+        assert [entry["path"] for entry in entries] == [path]
+        assert entries[0]["deleted"] is True
+
+    def test_find_files_with_name_matches_names_at_any_depth(
+        self, mocker, storage_archive_client, restore_job_manager, file_size_poller
+    ):
+        mock_search_results(
+            mocker,
+            storage_archive_client,
+            [
+                {"id": "1", "path": "/a/notes.txt", "type": "file"},
+                {"id": "2", "path": "/b/c/Notes.txt", "type": "file"},
+                {"id": "3", "path": "/b/c/other-notes.txt", "type": "file"},
+            ],
+        )
+        file_size_poller.get_file_sizes.return_value = None
+        archive_accessor = ArchiveAccessor(
+            DEVICE_GUID,
+            WEB_RESTORE_SESSION_ID,
+            storage_archive_client,
+            restore_job_manager,
+            file_size_poller,
+        )
+        entries = archive_accessor.find_files("notes.txt")
+        assert [entry["path"] for entry in entries] == [
+            "/a/notes.txt",
+            "/b/c/Notes.txt",
+        ]
+
 
 class TestFileSizePoller(object):
     DESKTOP_SIZE_JOB = "DESKTOP_SIZE_JOB"
@@ -946,8 +1491,8 @@ class TestFileSizePoller(object):
                 resp.text = json.dumps(self.DESKTOP_SIZES)
 
             elif job_id == self.DOWNLOADS_SIZE_JOB:
-                self.DESKTOP_SIZES["status"] = "DONE"
-                resp.text = json.dumps(self.DESKTOP_SIZES)
+                self.DOWNLOADS_SIZES["status"] = "DONE"
+                resp.text = json.dumps(self.DOWNLOADS_SIZES)
             return Py42Response(resp)
 
         storage_archive_client.get_file_size_job.side_effect = get_file_sizes
@@ -973,6 +1518,50 @@ class TestFileSizePoller(object):
         actual = poller.get_file_sizes([DESKTOP_ID, DOWNLOADS_ID], timeout=0.01)
         assert actual is None
 
+    def test_get_file_sizes_returns_sizes_in_order_of_file_ids(
+        self, mocker, storage_archive_client
+    ):
+        storage_archive_client.create_file_size_job.side_effect = self.get_create_job_side_effect(
+            mocker
+        )
+        desktop_statuses = ["DONE", "WORKING"]
+
+        def get_file_sizes(job_id, device_id):
+            resp = mocker.MagicMock(spec=Response)
+            is_desktop = job_id == self.DESKTOP_SIZE_JOB
+            status = desktop_statuses.pop() if is_desktop else "DONE"
+            resp.text = json.dumps({"status": status})
+            return Py42Response(resp)
+
+        storage_archive_client.get_file_size_job.side_effect = get_file_sizes
+        poller = FileSizePoller(storage_archive_client, DEVICE_GUID)
+        actual = poller.get_file_sizes([DESKTOP_ID, DOWNLOADS_ID], timeout=500)
+        assert [size["jobId"] for size in actual] == [
+            self.DESKTOP_SIZE_JOB,
+            self.DOWNLOADS_SIZE_JOB,
+        ]
+
+    def test_get_file_sizes_backs_off_between_polls(
+        self, mocker, storage_archive_client
+    ):
+        storage_archive_client.create_file_size_job.side_effect = self.get_create_job_side_effect(
+            mocker
+        )
+        statuses = ["DONE", "WORKING", "WORKING", "WORKING"]
+
+        def get_file_sizes(job_id, device_id):
+            resp = mocker.MagicMock(spec=Response)
+            resp.text = json.dumps({"status": statuses.pop()})
+            return Py42Response(resp)
+
+        storage_archive_client.get_file_size_job.side_effect = get_file_sizes
+        sleep = mocker.patch("py42._internal.archive_access.time.sleep")
+        poller = FileSizePoller(
+            storage_archive_client, DEVICE_GUID, job_polling_interval=0.3
+        )
+        poller.get_file_sizes([DESKTOP_ID], timeout=500)
+        assert [c[0][0] for c in sleep.call_args_list] == [0.1, 0.2, 0.3]
+
 
 class TestRestoreJobManager(object):
     def test_restore_job_manager_constructs_successfully(self, storage_archive_client):
@@ -1117,3 +1706,496 @@ class TestRestoreJobManager(object):
         restore_job_manager.get_stream(single_dir_selection)
         actual = storage_archive_client.start_restore.call_args[1]["zip_result"]
         assert actual is True
+
+    def test_get_stream_calls_progress_callback_after_each_poll(
+        self, mocker, storage_archive_client, single_file_selection
+    ):
+        mock_start_restore_response(
+            mocker, storage_archive_client, GetWebRestoreJobResponses.NOT_DONE
+        )
+        mock_get_restore_status_responses(
+            mocker,
+            storage_archive_client,
+            [GetWebRestoreJobResponses.NOT_DONE, GetWebRestoreJobResponses.DONE],
+        )
+        restore_job_manager = RestoreJobManager(
+            storage_archive_client,
+            DEVICE_GUID,
+            WEB_RESTORE_SESSION_ID,
+            job_polling_interval=0.000001,
+        )
+        progress = []
+        restore_job_manager.get_stream(
+            single_file_selection, progress_callback=progress.append
+        )
+        job_id = get_response_job_id(GetWebRestoreJobResponses.DONE)
+        assert progress == [
+            {"jobId": job_id, "status": "preparing", "percentComplete": 0},
+            {"jobId": job_id, "status": "done", "percentComplete": 100},
+        ]
+
+    def test_get_stream_when_job_takes_too_long_cancels_restore_and_raises(
+        self, mocker, storage_archive_client, single_file_selection
+    ):
+        mock_start_restore_response(
+            mocker, storage_archive_client, GetWebRestoreJobResponses.NOT_DONE
+        )
+        mock_get_restore_status_responses(
+            mocker, storage_archive_client, [GetWebRestoreJobResponses.NOT_DONE] * 10
+        )
+        restore_job_manager = RestoreJobManager(
+            storage_archive_client,
+            DEVICE_GUID,
+            WEB_RESTORE_SESSION_ID,
+            job_polling_interval=0.001,
+        )
+        job_id = get_response_job_id(GetWebRestoreJobResponses.DONE)
+        with pytest.raises(Py42RestoreTimeoutError) as err:
+            restore_job_manager.get_stream(single_file_selection, timeout=0.01)
+        assert err.value.job_id == job_id
+        storage_archive_client.cancel_restore.assert_called_once_with(job_id)
+        storage_archive_client.stream_restore_result.assert_not_called()
+
+    def test_get_stream_when_polling_fails_raises_error(
+        self, mocker, storage_archive_client, single_file_selection
+    ):
+        mock_start_restore_response(
+            mocker, storage_archive_client, GetWebRestoreJobResponses.NOT_DONE
+        )
+        storage_archive_client.get_restore_status.side_effect = Py42HTTPError(
+            HTTPError()
+        )
+        restore_job_manager = RestoreJobManager(
+            storage_archive_client, DEVICE_GUID, WEB_RESTORE_SESSION_ID
+        )
+        with pytest.raises(Py42HTTPError):
+            restore_job_manager.get_stream(single_file_selection)
+
+
+class TestRestoreJobScheduler(object):
+    def test_watch_polls_all_jobs_from_one_thread(self, mocker, storage_archive_client):
+        def get_restore_status(job_id):
+            resp = mocker.MagicMock(spec=Response)
+            resp.text = json.dumps({"status": "done", "done": True})
+            return Py42Response(resp)
+
+        storage_archive_client.get_restore_status.side_effect = get_restore_status
+        polling_threads = set()
+
+        def record_thread(status):
+            polling_threads.add(threading.current_thread())
+
+        scheduler = RestoreJobScheduler()
+        jobs = [
+            scheduler.watch(
+                storage_archive_client,
+                job_id,
+                0.001,
+                1,
+                progress_callback=record_thread,
+            )
+            for job_id in ["job-1", "job-2", "job-3"]
+        ]
+        assert all(job.wait(timeout=5) for job in jobs)
+        assert len(polling_threads) == 1
+        assert threading.current_thread() not in polling_threads
+
+
+class TestWatchedRestoreJob(object):
+    def get_status_response(self, mocker, percent_complete):
+        resp = mocker.MagicMock(spec=Response)
+        resp.text = json.dumps(
+            {"status": "working", "done": False, "percentComplete": percent_complete}
+        )
+        return Py42Response(resp)
+
+    def test_poll_schedules_next_poll_from_estimated_time_remaining(
+        self, mocker, storage_archive_client
+    ):
+        mock_time = mocker.patch("py42._internal.archive_access.time")
+        mock_time.time.side_effect = [0, 8]
+        storage_archive_client.get_restore_status.return_value = self.get_status_response(
+            mocker, 80
+        )
+        job = WatchedRestoreJob(storage_archive_client, "job-id", 0.25, 10)
+        job.poll()
+        # 8 seconds for 80% leaves about 2 seconds, half of which is the next interval
+        assert job.interval == 1
+
+    def test_poll_when_job_has_not_progressed_backs_off(
+        self, mocker, storage_archive_client
+    ):
+        storage_archive_client.get_restore_status.return_value = self.get_status_response(
+            mocker, 0
+        )
+        job = WatchedRestoreJob(storage_archive_client, "job-id", 0.25, 1)
+        intervals = []
+        for _ in range(4):
+            job.poll()
+            intervals.append(job.interval)
+        assert intervals == [0.5, 1, 1, 1]
+        assert not job.is_finished
+
+
+def create_json_response(data):
+    response = Response()
+    response.status_code = 200
+    response._content = json.dumps(data).encode("utf-8")
+    return Py42Response(response)
+
+
+def create_stream_response(content):
+    response = Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(content)
+    response.headers["Content-Length"] = str(len(content))
+    return Py42Response(response)
+
+
+class StandInStorageArchiveClient(object):
+    """An in-memory stand-in for the web restore API of a storage server."""
+
+    def __init__(self, files, restore_delay=0):
+        self.files = files
+        self.restore_delay = restore_delay
+        self.active_restores = 0
+        self.max_active_restores = 0
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def get_file_path_metadata(self, session_id, device_guid, file_id=None, **kwargs):
+        if file_id is None:
+            return create_json_response([{"id": "/", "path": "/", "type": "directory"}])
+        prefix = file_id.rstrip("/") + "/"
+        children = {}
+        for path in self.files:
+            if path.startswith(prefix):
+                name, _, rest = path.replace(prefix, "", 1).partition("/")
+                child_type = "directory" if rest else "file"
+                children[prefix + name] = child_type
+        return create_json_response(
+            [
+                {"id": path, "path": path, "type": child_type}
+                for path, child_type in sorted(children.items())
+            ]
+        )
+
+    def search_paths(self, *args, **kwargs):
+        return create_json_response([])
+
+    def start_restore(self, guid, web_restore_session_id, path_set, **kwargs):
+        with self._lock:
+            job_id = "job-{}".format(len(self._jobs))
+            self._jobs[job_id] = (path_set, kwargs["zip_result"])
+            self.active_restores += 1
+            self.max_active_restores = max(
+                self.max_active_restores, self.active_restores
+            )
+        return create_json_response({"jobId": job_id})
+
+    def get_restore_status(self, job_id):
+        time.sleep(self.restore_delay)
+        return create_json_response({"done": True, "status": "done"})
+
+    def stream_restore_result(self, job_id):
+        path_set, zip_result = self._jobs[job_id]
+        with self._lock:
+            self.active_restores -= 1
+        selected = [
+            path
+            for path in sorted(self.files)
+            if any(
+                path == selection["path"] or path.startswith(selection["path"] + "/")
+                for selection in path_set
+            )
+        ]
+        if not zip_result:
+            return create_stream_response(self.files[selected[0]])
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as zip_file:
+            for path in selected:
+                zip_file.writestr(path.lstrip("/"), self.files[path])
+        return create_stream_response(buffer.getvalue())
+
+
+class TestBatchRestorer(object):
+    def create_accessor_manager(self, mocker, storage_servers):
+        def get_archive_accessor(device_guid, destination_guid=None, **kwargs):
+            archive = (device_guid, destination_guid)
+            host_address, client = storage_servers.get(
+                archive, storage_servers.get(device_guid)
+            )
+            return ArchiveAccessor(
+                device_guid,
+                WEB_RESTORE_SESSION_ID,
+                client,
+                RestoreJobManager(
+                    client,
+                    device_guid,
+                    WEB_RESTORE_SESSION_ID,
+                    job_polling_interval=0.001,
+                ),
+                FileSizePoller(client, device_guid),
+                storage_host_address=host_address,
+            )
+
+        manager = mocker.MagicMock(spec=ArchiveAccessorManager)
+        manager.get_archive_accessor.side_effect = get_archive_accessor
+        return manager
+
+    def test_restore_to_directory_writes_results_and_manifest(self, mocker, tmpdir):
+        laptop = StandInStorageArchiveClient(
+            {"/Users/qa/a.txt": b"a", "/Users/qa/b.txt": b"bb"}
+        )
+        desktop = StandInStorageArchiveClient({"/Users/qa/c.txt": b"ccc"})
+        manager = self.create_accessor_manager(
+            mocker,
+            {
+                "laptop": ("https://node1", laptop),
+                "desktop": ("https://node2", desktop),
+            },
+        )
+        restorer = BatchRestorer(manager)
+        manifest = restorer.restore_to_directory(
+            [
+                ("laptop", "/Users/qa/a.txt"),
+                ("desktop", "/Users/qa/c.txt"),
+                ("laptop", "/Users/qa/b.txt"),
+            ],
+            str(tmpdir),
+        )
+
+        assert [entry["deviceGuid"] for entry in manifest] == ["laptop", "desktop"]
+        assert manifest[0]["paths"] == ["/Users/qa/a.txt", "/Users/qa/b.txt"]
+        with zipfile.ZipFile(manifest[0]["file"]) as zip_file:
+            assert sorted(zip_file.namelist()) == ["Users/qa/a.txt", "Users/qa/b.txt"]
+        assert manifest[0]["file"] == str(tmpdir.join("laptop", "download.zip"))
+        assert manifest[1]["file"] == str(tmpdir.join("desktop", "c.txt"))
+        assert tmpdir.join("desktop", "c.txt").read_binary() == b"ccc"
+        assert manifest[1]["size"] == 3
+        assert manifest[1]["sha256"] == hashlib.sha256(b"ccc").hexdigest()
+        assert json.loads(tmpdir.join("manifest.json").read()) == manifest
+
+    def test_restore_to_directory_when_directory_selected_writes_zip(
+        self, mocker, tmpdir
+    ):
+        laptop = StandInStorageArchiveClient(
+            {"/Users/qa/a.txt": b"a", "/Users/qa/b.txt": b"bb"}
+        )
+        manager = self.create_accessor_manager(
+            mocker, {"laptop": ("https://node1", laptop)}
+        )
+        manifest = BatchRestorer(manager).restore_to_directory(
+            [("laptop", "/Users/qa")], str(tmpdir)
+        )
+        assert manifest[0]["file"] == str(tmpdir.join("laptop", "qa.zip"))
+
+    def test_restore_to_directory_when_device_fails_records_error_and_restores_others(
+        self, mocker, tmpdir
+    ):
+        laptop = StandInStorageArchiveClient({"/Users/qa/a.txt": b"a"})
+        desktop = StandInStorageArchiveClient({"/Users/qa/c.txt": b"ccc"})
+        manager = self.create_accessor_manager(
+            mocker,
+            {
+                "laptop": ("https://node1", laptop),
+                "desktop": ("https://node1", desktop),
+            },
+        )
+        manifest = BatchRestorer(manager).restore_to_directory(
+            [("laptop", "/Users/qa/missing.txt"), ("desktop", "/Users/qa/c.txt")],
+            str(tmpdir),
+        )
+        assert manifest[0]["error"].startswith("File not found in archive")
+        assert manifest[0]["file"] is None
+        assert manifest[1]["error"] is None
+        assert tmpdir.join("desktop", "c.txt").read_binary() == b"ccc"
+
+    def test_restore_to_directory_when_device_connection_fails_records_error_and_writes_manifest(
+        self, mocker, tmpdir
+    ):
+        desktop = StandInStorageArchiveClient({"/Users/qa/c.txt": b"ccc"})
+        manager = self.create_accessor_manager(
+            mocker, {"desktop": ("https://node1", desktop)}
+        )
+        get_archive_accessor = manager.get_archive_accessor.side_effect
+
+        def get_unreachable_archive_accessor(device_guid, **kwargs):
+            if device_guid == "laptop":
+                raise ConnectionError("Connection refused")
+            return get_archive_accessor(device_guid, **kwargs)
+
+        manager.get_archive_accessor.side_effect = get_unreachable_archive_accessor
+        manifest = BatchRestorer(manager).restore_to_directory(
+            [("laptop", "/Users/qa/a.txt"), ("desktop", "/Users/qa/c.txt")],
+            str(tmpdir),
+        )
+        assert manifest[0]["error"] == "Connection refused"
+        assert manifest[1]["error"] is None
+        assert json.loads(tmpdir.join("manifest.json").read()) == manifest
+
+    def test_restore_to_directory_when_device_directory_cannot_be_created_records_error(
+        self, mocker, tmpdir
+    ):
+        laptop = StandInStorageArchiveClient({"/Users/qa/a.txt": b"a"})
+        manager = self.create_accessor_manager(
+            mocker, {"laptop": ("https://node1", laptop)}
+        )
+        tmpdir.join("laptop").write("not a directory")
+        manifest = BatchRestorer(manager).restore_to_directory(
+            [("laptop", "/Users/qa/a.txt")], str(tmpdir)
+        )
+        assert manifest[0]["error"] is not None
+        assert manifest[0]["file"] is None
+        assert tmpdir.join("manifest.json").check()
+
+    def test_restore_to_directory_restores_found_entries_from_their_destination(
+        self, mocker, tmpdir
+    ):
+        cloud = StandInStorageArchiveClient({"/Users/qa/a.txt": b"cloud"})
+        local = StandInStorageArchiveClient({"/Users/qa/b.txt": b"local"})
+        manager = self.create_accessor_manager(
+            mocker,
+            {
+                ("laptop", "cloud"): ("https://node1", cloud),
+                ("laptop", "local"): ("https://node2", local),
+            },
+        )
+        manifest = BatchRestorer(manager).restore_to_directory(
+            [
+                {
+                    "deviceGuid": "laptop",
+                    "destinationGuid": "cloud",
+                    "path": "/Users/qa/a.txt",
+                },
+                {
+                    "deviceGuid": "laptop",
+                    "destinationGuid": "local",
+                    "path": "/Users/qa/b.txt",
+                },
+            ],
+            str(tmpdir),
+        )
+        assert [entry["destinationGuid"] for entry in manifest] == ["cloud", "local"]
+        assert all(entry["error"] is None for entry in manifest)
+        assert tmpdir.join("laptop", "cloud", "a.txt").read_binary() == b"cloud"
+        assert tmpdir.join("laptop", "local", "b.txt").read_binary() == b"local"
+        manager.get_archive_accessor.assert_any_call(
+            "laptop",
+            destination_guid="local",
+            private_password=None,
+            encryption_key=None,
+        )
+
+    def test_restore_to_directory_limits_jobs_per_storage_server(self, mocker, tmpdir):
+        server = StandInStorageArchiveClient(
+            {"/Users/qa/a.txt": b"a"}, restore_delay=0.05
+        )
+        devices = ["device-{}".format(i) for i in range(4)]
+        manager = self.create_accessor_manager(
+            mocker, {device: ("https://node1", server) for device in devices}
+        )
+        restorer = BatchRestorer(manager, max_jobs_per_storage_server=2)
+        manifest = restorer.restore_to_directory(
+            [(device, "/Users/qa/a.txt") for device in devices], str(tmpdir)
+        )
+        assert all(entry["error"] is None for entry in manifest)
+        assert server.max_active_restores == 2
+
+
+class TestBackupFileLocator(object):
+    @pytest.fixture
+    def device_client(self, mocker):
+        client = mocker.MagicMock(spec=DeviceClient)
+        client.get_all.return_value = iter(
+            [
+                {
+                    "computers": [
+                        {
+                            "guid": "laptop",
+                            "backupUsage": [
+                                {"targetComputerGuid": "cloud"},
+                                {"targetComputerGuid": "local"},
+                            ],
+                        },
+                        {"guid": "phone", "backupUsage": []},
+                    ]
+                },
+                {
+                    "computers": [
+                        {
+                            "guid": "desktop",
+                            "backupUsage": [{"targetComputerGuid": "cloud"}],
+                        }
+                    ]
+                },
+            ]
+        )
+        return client
+
+    def create_accessor_manager(self, mocker, entries_by_archive):
+        def get_archive_accessor(device_guid, destination_guid=None, **kwargs):
+            entries = entries_by_archive[(device_guid, destination_guid)]
+            accessor = mocker.MagicMock(spec=ArchiveAccessor)
+            if isinstance(entries, Exception):
+                accessor.find_files.side_effect = entries
+            else:
+                accessor.find_files.return_value = [dict(e) for e in entries]
+            return accessor
+
+        manager = mocker.MagicMock(spec=ArchiveAccessorManager)
+        manager.get_archive_accessor.side_effect = get_archive_accessor
+        return manager
+
+    def test_find_searches_every_destination_of_every_device(
+        self, mocker, device_client
+    ):
+        manager = self.create_accessor_manager(
+            mocker,
+            {
+                ("laptop", "cloud"): [{"path": "/a.txt"}],
+                ("laptop", "local"): [],
+                ("desktop", "cloud"): [{"path": "/a.txt"}, {"path": "/b/a.txt"}],
+            },
+        )
+        locator = BackupFileLocator(manager, device_client)
+        entries = locator.find("user-uid", "a.txt", archive_password="password")
+        device_client.get_all.assert_called_once_with(
+            user_uid="user-uid", include_backup_usage=True
+        )
+        manager.get_archive_accessor.assert_any_call(
+            "laptop",
+            destination_guid="local",
+            private_password="password",
+            encryption_key=None,
+        )
+        assert [
+            (entry["deviceGuid"], entry["destinationGuid"], entry["path"])
+            for entry in entries
+        ] == [
+            ("laptop", "cloud", "/a.txt"),
+            ("desktop", "cloud", "/a.txt"),
+            ("desktop", "cloud", "/b/a.txt"),
+        ]
+
+    def test_find_skips_archives_that_cannot_be_searched(self, mocker, device_client):
+        manager = self.create_accessor_manager(
+            mocker,
+            {
+                ("laptop", "cloud"): Py42HTTPError(HTTPError()),
+                ("laptop", "local"): [{"path": "/a.txt"}],
+                ("desktop", "cloud"): [],
+            },
+        )
+        entries = BackupFileLocator(manager, device_client).find("user-uid", "a.txt")
+        assert [entry["destinationGuid"] for entry in entries] == ["local"]
+
+    def test_found_entries_can_be_restored(self, mocker, tmpdir):
+        server = StandInStorageArchiveClient({"/Users/qa/a.txt": b"a"})
+        manager = TestBatchRestorer().create_accessor_manager(
+            mocker, {"laptop": ("https://node1", server)}
+        )
+        found = [{"deviceGuid": "laptop", "path": "/Users/qa/a.txt"}]
+        manifest = BatchRestorer(manager).restore_to_directory(found, str(tmpdir))
+        assert manifest[0]["paths"] == ["/Users/qa/a.txt"]
+        assert tmpdir.join("laptop", "a.txt").read_binary() == b"a"
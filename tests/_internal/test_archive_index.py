@@ -0,0 +1,190 @@
+import pytest
+
+from py42._internal.archive_index import ArchiveCrawler
+from py42._internal.archive_index import ArchiveIndex
+from py42._internal.archive_index import get_node_version
+
+DEVICE_GUID = "device-guid"
+
+
+def create_node(path, node_type="file", node_id=None, modified=1, size=None):
+    return {
+        "path": path,
+        "type": node_type,
+        "id": node_id or path,
+        "size": size,
+        "deleted": False,
+        "lastModifiedMs": modified,
+        "lastBackupMs": modified,
+    }
+
+
+class StandInTree(object):
+    def __init__(self, children):
+        self.children = children
+        self.listed_ids = []
+
+    def get_children(self, node_id=None):
+        self.listed_ids.append(node_id)
+        return self.children[node_id]
+
+
+@pytest.fixture
+def index():
+    archive_index = ArchiveIndex(":memory:")
+    yield archive_index
+    archive_index.close()
+
+
+@pytest.fixture
+def tree():
+    return StandInTree(
+        {
+            "/": [create_node("/Users", "directory"), create_node("/tmp", "directory")],
+            "/Users": [create_node("/Users/qa", "directory")],
+            "/Users/qa": [
+                create_node("/Users/qa/Report.PDF", size=10),
+                create_node("/Users/qa/notes.txt", size=20),
+                create_node("/Users/qa/Desktop", "directory"),
+            ],
+            "/Users/qa/Desktop": [create_node("/Users/qa/Desktop/report.pdf", size=30)],
+            "/tmp": [],
+        }
+    )
+
+
+def crawl(tree, index, root_modified=1, **kwargs):
+    crawler = ArchiveCrawler(DEVICE_GUID, tree.get_children, index, **kwargs)
+    return crawler.crawl([create_node("/", "directory", modified=root_modified)])
+
+
+def get_paths(nodes):
+    return [node["path"] for node in nodes]
+
+
+class TestArchiveIndex(object):
+    def test_find_by_prefix_ignores_case(self, tree, index):
+        crawl(tree, index)
+        assert get_paths(index.find_by_prefix("/users/QA/d")) == [
+            "/Users/qa/Desktop",
+            "/Users/qa/Desktop/report.pdf",
+        ]
+
+    def test_find_by_prefix_matches_glob_characters_literally(self, index):
+        index.add_nodes(
+            DEVICE_GUID,
+            "/",
+            [create_node("/a[1]*.txt"), create_node("/a1.txt")],
+        )
+        assert get_paths(index.find_by_prefix("/a[1]*")) == ["/a[1]*.txt"]
+
+    def test_find_by_glob_returns_matching_paths(self, tree, index):
+        crawl(tree, index)
+        assert get_paths(index.find_by_glob("/Users/*/*.txt")) == [
+            "/Users/qa/notes.txt"
+        ]
+
+    def test_find_by_glob_does_not_match_across_directories_with_single_star(
+        self, index
+    ):
+        index.add_nodes(
+            DEVICE_GUID,
+            "/",
+            [
+                create_node("/Users/a/Documents/x.pdf"),
+                create_node("/Users/a/b/Documents/x/y.pdf"),
+            ],
+        )
+        assert get_paths(index.find_by_glob("/Users/*/Documents/*.pdf")) == [
+            "/Users/a/Documents/x.pdf"
+        ]
+        assert index.find_by_glob("/Users/a?b/Documents/*/*.pdf") == []
+        assert get_paths(index.find_by_glob("/Users/**/*.pdf")) == [
+            "/Users/a/Documents/x.pdf",
+            "/Users/a/b/Documents/x/y.pdf",
+        ]
+
+    def test_find_by_name_ignores_case(self, tree, index):
+        crawl(tree, index)
+        nodes = index.find_by_name("report.pdf")
+        assert get_paths(nodes) == [
+            "/Users/qa/Desktop/report.pdf",
+            "/Users/qa/Report.PDF",
+        ]
+        assert [node["size"] for node in nodes] == [30, 10]
+        assert nodes[0]["deviceGuid"] == DEVICE_GUID
+        assert nodes[0]["deleted"] is False
+
+    def test_find_with_device_guid_returns_only_that_devices_nodes(self, index):
+        index.add_nodes(DEVICE_GUID, "/", [create_node("/a.txt")])
+        index.add_nodes("other-device-guid", "/", [create_node("/a.txt")])
+        nodes = index.find_by_name("a.txt", device_guid="other-device-guid")
+        assert [node["deviceGuid"] for node in nodes] == ["other-device-guid"]
+
+    def test_replace_children_removes_missing_children_and_their_descendants(
+        self, tree, index
+    ):
+        crawl(tree, index)
+        index.replace_children(
+            DEVICE_GUID, "/Users/qa", [create_node("/Users/qa/notes.txt")], "2:2"
+        )
+        assert get_paths(index.find_by_prefix("/Users/qa/")) == ["/Users/qa/notes.txt"]
+        assert index.get_directory_version(DEVICE_GUID, "/Users/qa/Desktop") is None
+        assert index.get_directory_version(DEVICE_GUID, "/Users/qa") == "2:2"
+
+
+class TestArchiveCrawler(object):
+    def test_crawl_lists_every_directory_once(self, tree, index):
+        assert crawl(tree, index) == 5
+        assert sorted(tree.listed_ids) == sorted(tree.children)
+        assert len(index.find_by_prefix("/")) == 8
+
+    def test_crawl_with_max_depth_stops_descending_at_that_depth(self, tree, index):
+        assert crawl(tree, index, max_depth=2) == 3
+        assert get_paths(index.find_by_prefix("/Users/")) == ["/Users/qa"]
+
+    def test_crawl_again_lists_only_changed_directories(self, tree, index):
+        crawl(tree, index)
+        tree.listed_ids = []
+        tree.children["/"][0] = create_node("/Users", "directory", modified=2)
+        tree.children["/Users"] = [create_node("/Users/qa", "directory", modified=2)]
+        tree.children["/Users/qa"] = [create_node("/Users/qa/notes.txt")]
+        assert crawl(tree, index, root_modified=2) == 3
+        assert tree.listed_ids == ["/", "/Users", "/Users/qa"]
+        assert get_paths(index.find_by_prefix("/Users/")) == [
+            "/Users/qa",
+            "/Users/qa/notes.txt",
+        ]
+
+    def test_crawl_again_finds_changes_below_unchanged_directories(self, index):
+        tree = StandInTree(
+            {
+                "/": [create_node("/a", "directory")],
+                "/a": [create_node("/a/b", "directory")],
+                "/a/b": [create_node("/a/b/f1")],
+            }
+        )
+        crawl(tree, index)
+        tree.listed_ids = []
+        tree.children["/a"] = [create_node("/a/b", "directory", modified=2)]
+        tree.children["/a/b"].append(create_node("/a/b/f2"))
+        assert crawl(tree, index) == 3
+        assert tree.listed_ids == ["/", "/a", "/a/b"]
+        assert get_paths(index.find_by_prefix("/a/b/")) == ["/a/b/f1", "/a/b/f2"]
+
+    def test_crawl_again_when_not_incremental_lists_every_directory(self, tree, index):
+        crawl(tree, index)
+        tree.listed_ids = []
+        assert crawl(tree, index, incremental=False) == 5
+
+    def test_crawl_with_max_requests_per_second_waits_for_rate_limiter(
+        self, mocker, tree, index
+    ):
+        limiter = mocker.patch("py42._internal.archive_index.RateLimiter")
+        crawl(tree, index, max_requests_per_second=100)
+        limiter.assert_called_once_with(100)
+        assert limiter.return_value.wait.call_count == 5
+
+
+def test_get_node_version_when_node_has_no_times_returns_none():
+    assert get_node_version({"path": "/", "type": "directory"}) is None
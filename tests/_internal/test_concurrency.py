@@ -0,0 +1,130 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+from py42._internal.concurrency import call_with_backoff
+from py42._internal.concurrency import iter_completed
+from py42._internal.concurrency import iter_merged
+from py42._internal.concurrency import iter_prefetched
+from py42._internal.concurrency import map_concurrently
+from py42._internal.concurrency import RateLimiter
+from py42._internal.concurrency import split_into_batches
+
+
+def test_split_into_batches_returns_lists_of_at_most_batch_size_items():
+    assert split_into_batches(range(5), 2) == [[0, 1], [2, 3], [4]]
+
+
+def test_map_concurrently_returns_results_in_input_order():
+    assert map_concurrently(lambda x: x * 2, [3, 1, 2]) == [6, 2, 4]
+
+
+def test_map_concurrently_when_no_items_returns_empty_list():
+    assert map_concurrently(lambda x: x, []) == []
+
+
+def test_map_concurrently_raises_exception_from_call():
+    def fail(item):
+        raise ValueError(item)
+
+    with pytest.raises(ValueError):
+        map_concurrently(fail, [1, 2])
+
+
+def test_iter_completed_yields_each_item_with_its_future():
+    results = {item: future.result() for item, future in iter_completed(str, [1, 2])}
+    assert results == {1: "1", 2: "2"}
+
+
+def test_iter_completed_when_closed_cancels_pending_calls():
+    release = threading.Event()
+    called = []
+
+    def call(item):
+        called.append(item)
+        if item != 0:
+            release.wait(5)
+        return item
+
+    completed = iter_completed(call, range(10), max_workers=2)
+    item, future = next(completed)
+    completed.close()
+    release.set()
+    assert item == 0
+    assert len(called) < 10
+
+
+def test_iter_merged_yields_values_of_each_item_in_order():
+    results = list(iter_merged(lambda item: range(item), [3, 2]))
+    assert [value for item, value in results if item == 3] == [0, 1, 2]
+    assert [value for item, value in results if item == 2] == [0, 1]
+    assert len(results) == 5
+
+
+def test_iter_merged_raises_exception_from_iterable():
+    def generate(item):
+        yield item
+        raise ValueError(item)
+
+    with pytest.raises(ValueError):
+        list(iter_merged(generate, [1, 2]))
+
+
+def test_iter_merged_when_closed_stops_producing_values():
+    produced = []
+
+    def generate(item):
+        for value in range(1000):
+            produced.append(value)
+            yield value
+
+    merged = iter_merged(generate, [1], buffer_size=1)
+    next(merged)
+    merged.close()
+    assert len(produced) < 1000
+
+
+def test_rate_limiter_spaces_out_calls_to_wait(mocker):
+    now = [100.0]
+    mocker.patch("time.time", side_effect=lambda: now[0])
+    sleep = mocker.patch("time.sleep")
+    limiter = RateLimiter(4)
+    limiter.wait()
+    limiter.wait()
+    now[0] = 100.1
+    limiter.wait()
+    assert [call[0][0] for call in sleep.call_args_list] == pytest.approx([0.25, 0.4])
+
+
+def test_iter_prefetched_yields_results_in_input_order():
+    def slow_first(x):
+        if x == 0:
+            time.sleep(0.05)
+        return x * 2
+
+    assert list(iter_prefetched(slow_first, range(5), max_workers=3)) == [0, 2, 4, 6, 8]
+
+
+def test_iter_prefetched_reads_only_as_many_items_as_needed():
+    read = []
+
+    def items():
+        for i in itertools.count():
+            read.append(i)
+            yield i
+
+    results = iter_prefetched(lambda x: x, items(), max_workers=2)
+    assert next(results) == 0
+    results.close()
+    assert read == [0, 1, 2]
+
+
+def test_call_with_backoff_does_not_retry_other_errors(mocker):
+    sleep = mocker.patch("time.sleep")
+    func = mocker.MagicMock(side_effect=KeyError("key"))
+    with pytest.raises(KeyError):
+        call_with_backoff(func, lambda err: isinstance(err, ValueError))
+    assert func.call_count == 1
+    sleep.assert_not_called()
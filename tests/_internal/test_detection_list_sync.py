@@ -0,0 +1,220 @@
+from collections import OrderedDict
+
+from requests import ConnectionError
+
+from py42._internal.detection_list_sync import DetectionListSync
+from py42.exceptions import Py42Error
+
+
+class StandInListClient(object):
+    def __init__(self, items):
+        self.items = items
+        self.calls = []
+
+    def get_all(self):
+        return iter([{"items": self.items}])
+
+    def add_many(self, user_ids, departure_dates=None, max_workers=None):
+        self.calls.append(("add_many", user_ids, departure_dates))
+        return OrderedDict((user_id, None) for user_id in user_ids)
+
+    def remove(self, user_id):
+        if user_id == "unreachable":
+            raise ConnectionError("Connection reset")
+        self.calls.append(("remove", user_id))
+
+    def update_departure_date(self, user_id, departure_date):
+        self.calls.append(("update_departure_date", user_id, departure_date))
+
+
+class StandInUserClient(object):
+    def __init__(self, profiles):
+        self.profiles = profiles
+        self.calls = []
+
+    def get_by_id(self, user_id):
+        self.calls.append(("get_by_id", user_id))
+        if user_id == "unreachable":
+            raise ConnectionError("Connection reset")
+        if user_id not in self.profiles:
+            raise Py42Error("No profile for {}".format(user_id))
+        return self.profiles[user_id]
+
+    def add_risk_tags(self, user_id, tags):
+        self.calls.append(("add_risk_tags", user_id, tags))
+
+    def remove_risk_tags(self, user_id, tags):
+        self.calls.append(("remove_risk_tags", user_id, tags))
+
+    def add_cloud_alias(self, user_id, alias):
+        self.calls.append(("add_cloud_alias", user_id, alias))
+
+    def remove_cloud_alias(self, user_id, alias):
+        if alias == "fails@example.com":
+            raise Py42Error("Cannot remove {}".format(alias))
+        self.calls.append(("remove_cloud_alias", user_id, alias))
+
+
+def create_sync(departing=None, high_risk=None, profiles=None):
+    departing_client = StandInListClient(departing or [])
+    high_risk_client = StandInListClient(high_risk or [])
+    user_client = StandInUserClient(profiles or {})
+    detection_list_sync = DetectionListSync(
+        departing_client, high_risk_client, user_client
+    )
+    return detection_list_sync, departing_client, high_risk_client, user_client
+
+
+class TestDetectionListSync(object):
+    def test_sync_departing_employees_applies_only_changes(self):
+        departing = [
+            {"userId": "same", "departureDate": "2020-01-01"},
+            {"userId": "moved", "departureDate": "2020-01-01"},
+            {"userId": "gone", "departureDate": None},
+        ]
+        detection_list_sync, departing_client, high_risk_client, _ = create_sync(
+            departing=departing
+        )
+        outcomes = detection_list_sync.sync(
+            departing_employees={
+                "same": "2020-01-01",
+                "moved": "2020-02-02",
+                "new": "2020-03-03",
+            }
+        )
+
+        assert outcomes == {
+            ("new", "add_departing_employee"): None,
+            ("moved", "update_departure_date"): None,
+            ("gone", "remove_departing_employee"): None,
+        }
+        assert sorted(departing_client.calls, key=str) == sorted(
+            [
+                ("add_many", ["new"], {"new": "2020-03-03"}),
+                ("update_departure_date", "moved", "2020-02-02"),
+                ("remove", "gone"),
+            ],
+            key=str,
+        )
+        assert high_risk_client.calls == []
+
+    def test_sync_high_risk_employees_adds_and_removes_only_changed_users(self):
+        high_risk = [{"userId": "same"}, {"userId": "gone"}]
+        detection_list_sync, departing_client, high_risk_client, _ = create_sync(
+            high_risk=high_risk
+        )
+        outcomes = detection_list_sync.sync(high_risk_employees=["same", "new"])
+
+        assert outcomes == {
+            ("new", "add_high_risk_employee"): None,
+            ("gone", "remove_high_risk_employee"): None,
+        }
+        assert ("add_many", ["new"], None) in high_risk_client.calls
+        assert departing_client.calls == []
+
+    def test_sync_when_nothing_changed_makes_no_changes(self):
+        high_risk = [
+            {
+                "userId": "same",
+                "userName": "same@example.com",
+                "riskFactors": ["FLIGHT_RISK"],
+                "cloudUsernames": ["same@example.com"],
+            }
+        ]
+        detection_list_sync, _, high_risk_client, user_client = create_sync(
+            high_risk=high_risk
+        )
+        outcomes = detection_list_sync.sync(
+            high_risk_employees=["same"],
+            risk_tags={"same": ["FLIGHT_RISK"]},
+            cloud_aliases={"same": []},
+        )
+
+        assert outcomes == {}
+        assert high_risk_client.calls == []
+        assert user_client.calls == []
+
+    def test_sync_risk_tags_adds_and_removes_only_changed_tags(self):
+        profiles = {"user": {"riskFactors": ["FLIGHT_RISK", "CONTRACT_EMPLOYEE"]}}
+        detection_list_sync, _, _, user_client = create_sync(profiles=profiles)
+        outcomes = detection_list_sync.sync(
+            risk_tags={"user": ["FLIGHT_RISK", "HIGH_IMPACT_EMPLOYEE"]}
+        )
+
+        assert outcomes == {
+            ("user", "add_risk_tags"): None,
+            ("user", "remove_risk_tags"): None,
+        }
+        assert ("add_risk_tags", "user", ["HIGH_IMPACT_EMPLOYEE"]) in user_client.calls
+        assert ("remove_risk_tags", "user", ["CONTRACT_EMPLOYEE"]) in user_client.calls
+
+    def test_sync_cloud_aliases_keeps_username_and_reports_failures(self):
+        profiles = {
+            "user": {
+                "userName": "user@example.com",
+                "cloudUsernames": ["user@example.com", "old@example.com"],
+            },
+            "other": {
+                "userName": "other@example.com",
+                "cloudUsernames": ["fails@example.com"],
+            },
+        }
+        detection_list_sync, _, _, user_client = create_sync(profiles=profiles)
+        outcomes = detection_list_sync.sync(
+            cloud_aliases={"user": ["new@example.com"], "other": []}
+        )
+
+        assert outcomes[("user", "add_cloud_aliases")] is None
+        assert outcomes[("user", "remove_cloud_aliases")] is None
+        assert outcomes[("other", "remove_cloud_aliases")] is not None
+        assert ("add_cloud_alias", "user", "new@example.com") in user_client.calls
+        assert ("remove_cloud_alias", "user", "old@example.com") in user_client.calls
+        assert ("remove_cloud_alias", "user", "user@example.com") not in (
+            user_client.calls
+        )
+
+    def test_sync_when_profile_cannot_be_read_reports_error(self):
+        detection_list_sync, _, _, user_client = create_sync()
+        outcomes = detection_list_sync.sync(risk_tags={"missing": ["FLIGHT_RISK"]})
+
+        assert list(outcomes) == [("missing", "get_profile")]
+        assert outcomes[("missing", "get_profile")] is not None
+        assert user_client.calls == [("get_by_id", "missing")]
+
+    def test_sync_reads_profiles_of_added_users_after_adding_them(self):
+        profiles = {"new": {"riskFactors": []}}
+        detection_list_sync, _, high_risk_client, user_client = create_sync(
+            profiles=profiles
+        )
+        outcomes = detection_list_sync.sync(
+            high_risk_employees=["new"], risk_tags={"new": ["FLIGHT_RISK"]}
+        )
+
+        assert list(outcomes) == [
+            ("new", "add_high_risk_employee"),
+            ("new", "add_risk_tags"),
+        ]
+        assert user_client.calls == [
+            ("get_by_id", "new"),
+            ("add_risk_tags", "new", ["FLIGHT_RISK"]),
+        ]
+
+    def test_sync_when_connection_fails_reports_error_and_applies_other_changes(self):
+        high_risk = [{"userId": "unreachable"}, {"userId": "gone"}]
+        profiles = {"user": {"riskFactors": []}}
+        detection_list_sync, _, high_risk_client, user_client = create_sync(
+            high_risk=high_risk, profiles=profiles
+        )
+        outcomes = detection_list_sync.sync(
+            high_risk_employees=[],
+            risk_tags={"unreachable": ["FLIGHT_RISK"], "user": ["FLIGHT_RISK"]},
+        )
+
+        assert outcomes == {
+            ("unreachable", "remove_high_risk_employee"): "Connection reset",
+            ("gone", "remove_high_risk_employee"): None,
+            ("unreachable", "get_profile"): "Connection reset",
+            ("user", "add_risk_tags"): None,
+        }
+        assert ("remove", "gone") in high_risk_client.calls
+        assert ("add_risk_tags", "user", ["FLIGHT_RISK"]) in user_client.calls
@@ -196,6 +196,17 @@ def test_storage_auth_token_provider_returns_tmp_login_token(
     assert storage_auth_token_provider.get_secret_value() == TMP_LOGIN_TOKEN
 
 
+def test_storage_auth_token_provider_when_given_timeout_requests_token_with_timeout(
+    storage_auth_token_provider,
+):
+    auth_session = storage_auth_token_provider._auth_session
+    provider = C42APIStorageAuthTokenProvider(
+        auth_session, "plan-id", "destination-guid", timeout=5
+    )
+    provider.get_secret_value()
+    assert auth_session.post.call_args[1]["timeout"] == 5
+
+
 @pytest.mark.parametrize(
     "tmp_token_provider",
     ["login_token_provider", "storage_auth_token_provider"],
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import io
+import struct
+import zipfile
+import zlib
+
+import pytest
+
+from py42._internal.zip_stream import extract_entries
+from py42._internal.zip_stream import get_extraction_path
+from py42._internal.zip_stream import ZipStreamReader
+from py42.exceptions import Py42Error
+
+FILES = [
+    (u"Users/qa/a.txt", b"a" * 1000, zipfile.ZIP_DEFLATED),
+    (u"Users/qa/b.bin", b"0123456789" * 50, zipfile.ZIP_STORED),
+    (u"Users/qa/é.txt", b"accented", zipfile.ZIP_DEFLATED),
+]
+
+
+class UnseekableStream(io.RawIOBase):
+    def __init__(self):
+        self.data = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.data.write(data)
+
+
+def create_zip(files=None, directories=None):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_file:
+        for directory in directories or []:
+            zip_file.writestr(zipfile.ZipInfo(directory), b"")
+        for path, content, method in files or FILES:
+            zip_file.writestr(path, content, compress_type=method)
+    return buffer.getvalue()
+
+
+def create_zip_with_zip64_data_descriptors(files):
+    # like Java's ZipOutputStream writes entries whose sizes are not known up front, with 8 byte
+    # sizes in the data descriptors but no zip64 extra field in the local headers
+    parts = []
+    for path, content in files:
+        name = path.encode("utf-8")
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        compressed = compressor.compress(content) + compressor.flush()
+        parts.append(b"PK\x03\x04")
+        parts.append(
+            struct.pack("<HHHHHIIIHH", 45, 0x808, 8, 0, 0, 0, 0, 0, len(name), 0)
+        )
+        parts.append(name)
+        parts.append(compressed)
+        parts.append(b"PK\x07\x08")
+        crc = zlib.crc32(content) & 0xFFFFFFFF
+        parts.append(struct.pack("<IQQ", crc, len(compressed), len(content)))
+    parts.append(b"PK\x05\x06" + b"\x00" * 18)
+    return b"".join(parts)
+
+
+def split_into_chunks(data, chunk_size=7):
+    chunks = []
+    for start in range(0, len(data), chunk_size):
+        end = start + chunk_size
+        chunks.append(data[start:end])
+    return chunks
+
+
+def read_all(data, **kwargs):
+    entries = ZipStreamReader(split_into_chunks(data)).iter_entries(**kwargs)
+    return [(path, entry.read()) for path, entry in entries]
+
+
+class TestZipStreamReader(object):
+    def test_iter_entries_yields_each_file_with_its_content(self):
+        assert read_all(create_zip()) == [(path, content) for path, content, _ in FILES]
+
+    def test_iter_entries_when_sizes_follow_content_yields_each_file(self):
+        stream = UnseekableStream()
+        with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            for path, content, _ in FILES:
+                zip_file.writestr(path, content)
+        assert read_all(stream.data.getvalue()) == [
+            (path, content) for path, content, _ in FILES
+        ]
+
+    def test_iter_entries_when_data_descriptors_have_zip64_sizes_yields_each_file(self):
+        files = [(u"a.txt", b"a" * 1000), (u"b.txt", b"b" * 10)]
+        data = create_zip_with_zip64_data_descriptors(files)
+        assert read_all(data) == files
+
+    def test_iter_entries_skips_directories_and_filtered_files(self):
+        data = create_zip(directories=[u"Users/", u"Users/qa/"])
+        actual = read_all(data, entry_filter=lambda path: path.endswith(u".txt"))
+        assert [path for path, _ in actual] == [u"Users/qa/a.txt", u"Users/qa/é.txt"]
+
+    def test_iter_entries_when_entry_partially_read_skips_rest_of_it(self):
+        entries = ZipStreamReader(split_into_chunks(create_zip())).iter_entries()
+        first_path, first = next(entries)
+        assert first.read(10) == b"a" * 10
+        second_path, second = next(entries)
+        assert second_path == u"Users/qa/b.bin"
+        assert b"".join(second) == b"0123456789" * 50
+
+    def test_iter_entries_when_content_is_corrupt_raises_error(self):
+        data = bytearray(create_zip([(u"a.txt", b"content", zipfile.ZIP_STORED)]))
+        data[data.index(b"content")] = ord(b"C")
+        with pytest.raises(Py42Error) as err:
+            read_all(bytes(data))
+        assert u"corrupt" in err.value.args[0]
+
+    def test_iter_entries_when_stream_is_not_zip_raises_error(self):
+        with pytest.raises(Py42Error):
+            read_all(b"not a zip archive")
+
+    def test_iter_entries_when_stream_is_truncated_raises_error(self):
+        with pytest.raises(Py42Error):
+            read_all(create_zip()[:100])
+
+
+class TestExtractEntries(object):
+    def test_extract_entries_writes_files_and_returns_sizes_and_hashes(self, tmpdir):
+        entries = ZipStreamReader(split_into_chunks(create_zip())).iter_entries()
+        results = extract_entries(entries, str(tmpdir), max_workers=2)
+        assert list(results) == [path for path, _, _ in FILES]
+        for path, content, _ in FILES:
+            assert tmpdir.join(*path.split(u"/")).read_binary() == content
+            size, md5, sha256 = results[path]
+            assert size == len(content)
+            assert md5 == hashlib.md5(content).hexdigest()
+            assert sha256 == hashlib.sha256(content).hexdigest()
+
+    def test_extract_entries_when_path_escapes_directory_raises_error(self, tmpdir):
+        data = create_zip([(u"../outside.txt", b"content", zipfile.ZIP_STORED)])
+        entries = ZipStreamReader([data]).iter_entries()
+        with pytest.raises(Py42Error):
+            extract_entries(entries, str(tmpdir.join(u"out")))
+        assert not tmpdir.join(u"outside.txt").check()
+
+    def test_get_extraction_path_splits_on_backslashes(self, tmpdir):
+        actual = get_extraction_path(str(tmpdir), u"Users\\qa\\a.txt")
+        assert actual == str(tmpdir.join(u"Users", u"qa", u"a.txt"))
+
+    def test_get_extraction_path_when_backslash_path_escapes_directory_raises_error(
+        self, tmpdir
+    ):
+        with pytest.raises(Py42Error):
+            get_extraction_path(str(tmpdir), u"a\\..\\..\\x")
+
+    def test_get_extraction_path_turns_drive_letter_into_directory(self, tmpdir):
+        actual = get_extraction_path(str(tmpdir), u"C:/Users/a.txt")
+        assert actual == str(tmpdir.join(u"C", u"Users", u"a.txt"))
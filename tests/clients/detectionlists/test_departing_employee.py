@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import json
+from collections import OrderedDict
 
 import pytest
 from requests import HTTPError
@@ -340,3 +341,60 @@ class TestDepartingEmployeeClient(object):
         assert (
             mock_session.post.call_args[0][0] == "/svc/api/v2/departingemployee/update"
         )
+
+    def test_add_many_adds_users_with_their_departure_dates(
+        self, mocker, mock_session, user_context
+    ):
+        detection_list_user_client = mocker.MagicMock(spec=DetectionListUserClient)
+        detection_list_user_client.create_many_if_not_exists.return_value = OrderedDict(
+            [("user-1", None), ("user-2", None)]
+        )
+        client = DepartingEmployeeClient(
+            mock_session, user_context, detection_list_user_client
+        )
+        outcomes = client.add_many(
+            ["user-1", "user-2"], departure_dates={"user-1": "2022-12-20"}
+        )
+
+        assert outcomes == {"user-1": None, "user-2": None}
+        posted_data = sorted(
+            (json.loads(call[1]["data"]) for call in mock_session.post.call_args_list),
+            key=lambda data: data["userId"],
+        )
+        assert [data["departureDate"] for data in posted_data] == ["2022-12-20", None]
+        assert mock_session.post.call_args[0][0] == "/svc/api/v2/departingemployee/add"
+
+    def test_add_many_returns_outcome_of_each_user(
+        self, mocker, mock_session, user_context
+    ):
+        def side_effect(url, data):
+            user_id = json.loads(data)["userId"]
+            if user_id in ("user-2", "user-3"):
+                base_err = mocker.MagicMock(spec=HTTPError)
+                base_err.response = mocker.MagicMock(spec=Response)
+                base_err.response.text = (
+                    "User already on list" if user_id == "user-2" else "Bad request"
+                )
+                raise Py42BadRequestError(base_err)
+
+        mock_session.post.side_effect = side_effect
+        detection_list_user_client = mocker.MagicMock(spec=DetectionListUserClient)
+        detection_list_user_client.create_many_if_not_exists.return_value = OrderedDict(
+            [
+                ("user-1", None),
+                ("user-2", None),
+                ("user-3", None),
+                ("user-4", "No profile"),
+            ]
+        )
+        client = DepartingEmployeeClient(
+            mock_session, user_context, detection_list_user_client
+        )
+        outcomes = client.add_many(["user-1", "user-2", "user-3", "user-4"])
+
+        assert list(outcomes) == ["user-1", "user-2", "user-3", "user-4"]
+        assert outcomes["user-1"] is None
+        assert outcomes["user-2"] is None
+        assert outcomes["user-3"] is not None
+        assert outcomes["user-4"] == "No profile"
+        assert mock_session.post.call_count == 3
@@ -1,6 +1,8 @@
 import json
+from collections import OrderedDict
 
 import pytest
+from requests import ConnectionError
 from requests import HTTPError
 from requests import Response
 
@@ -90,6 +92,52 @@ class TestHighRiskEmployeeClient(object):
         expected = "User with ID user_id is already on the high-risk-employee list."
         assert str(err.value) == expected
 
+    def test_add_many_returns_outcome_of_each_user(
+        self, mocker, mock_session, user_context
+    ):
+        def side_effect(url, data):
+            if json.loads(data)["userId"] == "user-2":
+                base_err = mocker.MagicMock(spec=HTTPError)
+                base_err.response = mocker.MagicMock(spec=Response)
+                base_err.response.text = "User already on list"
+                raise Py42BadRequestError(base_err)
+
+        mock_session.post.side_effect = side_effect
+        detection_list_user_client = mocker.MagicMock(spec=DetectionListUserClient)
+        detection_list_user_client.create_many_if_not_exists.return_value = OrderedDict(
+            [("user-1", None), ("user-2", None), ("user-3", "No profile")]
+        )
+        client = HighRiskEmployeeClient(
+            mock_session, user_context, detection_list_user_client
+        )
+        outcomes = client.add_many(["user-1", "user-2", "user-3"], max_workers=2)
+
+        assert outcomes == {"user-1": None, "user-2": None, "user-3": "No profile"}
+        detection_list_user_client.create_many_if_not_exists.assert_called_once_with(
+            ["user-1", "user-2", "user-3"], max_workers=2
+        )
+        assert mock_session.post.call_count == 2
+        assert mock_session.post.call_args[0][0] == "/svc/api/v2/highriskemployee/add"
+
+    def test_add_many_when_connection_fails_returns_error_of_that_user(
+        self, mocker, mock_session, user_context
+    ):
+        def side_effect(url, data):
+            if json.loads(data)["userId"] == "user-2":
+                raise ConnectionError("Connection reset")
+
+        mock_session.post.side_effect = side_effect
+        detection_list_user_client = mocker.MagicMock(spec=DetectionListUserClient)
+        detection_list_user_client.create_many_if_not_exists.return_value = OrderedDict(
+            [("user-1", None), ("user-2", None)]
+        )
+        client = HighRiskEmployeeClient(
+            mock_session, user_context, detection_list_user_client
+        )
+        outcomes = client.add_many(["user-1", "user-2"])
+
+        assert outcomes == {"user-1": None, "user-2": "Connection reset"}
+
     def test_set_alerts_enabled_posts_expected_data_with_default_value(
         self, user_context, mock_session, mock_detection_list_user_client
     ):
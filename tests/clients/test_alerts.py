@@ -1,11 +1,16 @@
 import json
+import threading
 
 import pytest
+from requests import ConnectionError
+from requests import HTTPError
 from requests import Response
 from tests.conftest import TENANT_ID_FROM_RESPONSE
 
 from py42._internal.clients.alerts import AlertClient
 from py42._internal.session import Py42Session
+from py42.exceptions import Py42BadRequestError
+from py42.exceptions import Py42InternalServerError
 from py42.response import Py42Response
 from py42.sdk.queries.alerts.alert_query import AlertQuery
 from py42.sdk.queries.alerts.filters import AlertState
@@ -57,6 +62,61 @@ TEST_NON_PARSEABLE_ALERT_DETAIL_RESPONSE = """
 """
 
 
+class StandInAlertServer(object):
+    """Answers alert searches from a list of alerts, newest first. `on_search` is called
+    before each search with the number of searches answered so far."""
+
+    def __init__(self, mocker, alert_count, on_search=None):
+        self.mocker = mocker
+        self.alerts = [create_alert(i) for i in range(alert_count, 0, -1)]
+        self.searches = []
+        self.on_search = on_search
+        self._lock = threading.Lock()
+
+    def add_alert(self, number):
+        self.alerts.insert(0, create_alert(number))
+
+    def post(self, uri, data=None):
+        query = json.loads(data)
+        with self._lock:
+            if self.on_search:
+                self.on_search(self, len(self.searches))
+            self.searches.append(query)
+            alerts = [alert for alert in self.alerts if matches(alert, query)]
+        start = query["pgNum"] * query["pgSize"]
+        end = start + query["pgSize"]
+        response = self.mocker.MagicMock(spec=Response)
+        response.status_code = 200
+        response.text = json.dumps(
+            {"alerts": alerts[start:end], "totalCount": len(alerts), "problems": []}
+        )
+        return Py42Response(response)
+
+
+def create_alert(number):
+    return {"id": "alert-{}".format(number), "createdAt": "{:06d}".format(number)}
+
+
+def matches(alert, query):
+    for group in query["groups"]:
+        for query_filter in group["filters"]:
+            if query_filter["operator"] == "ON_OR_BEFORE":
+                if alert["createdAt"] > query_filter["value"]:
+                    return False
+    return True
+
+
+def get_ids(alerts):
+    return [alert["id"] for alert in alerts]
+
+
+def create_http_error(mocker, error_class, status_code):
+    http_error = HTTPError()
+    http_error.response = mocker.MagicMock(spec=Response)
+    http_error.response.status_code = status_code
+    return error_class(http_error)
+
+
 @pytest.fixture
 def mock_get_all_session(mocker, py42_response):
     py42_response.text = TEST_RESPONSE
@@ -182,6 +242,57 @@ class TestAlertClient(object):
         expected_observation_data = '{"invalid_json": ][ }'
         assert observation_data == expected_observation_data
 
+    def test_get_details_with_many_ids_posts_batches_and_merges_alerts_in_order(
+        self, mocker, mock_session, user_context
+    ):
+        def post(uri, data=None):
+            alert_ids = json.loads(data)["alertIds"]
+            response = mocker.MagicMock(spec=Response)
+            response.text = json.dumps(
+                {"alerts": [{"id": alert_id} for alert_id in alert_ids]}
+            )
+            return Py42Response(response)
+
+        mock_session.post.side_effect = post
+        alert_client = AlertClient(mock_session, user_context)
+        alert_client.DETAILS_BATCH_SIZE = 2
+        alert_ids = ["ALERT_ID_{}".format(i) for i in range(5)]
+        response = alert_client.get_details(alert_ids, max_workers=3)
+        posted_ids = [
+            json.loads(call[1]["data"])["alertIds"]
+            for call in mock_session.post.call_args_list
+        ]
+        assert sorted(posted_ids) == [
+            ["ALERT_ID_0", "ALERT_ID_1"],
+            ["ALERT_ID_2", "ALERT_ID_3"],
+            ["ALERT_ID_4"],
+        ]
+        assert [alert["id"] for alert in response["alerts"]] == alert_ids
+
+    def test_get_details_decodes_observation_data_when_first_read(
+        self, mocker, mock_session, user_context
+    ):
+        requests_response = mocker.MagicMock(spec=Response)
+        requests_response.text = TEST_PARSEABLE_ALERT_DETAIL_RESPONSE
+        mock_session.post.return_value = Py42Response(requests_response)
+        alert_client = AlertClient(mock_session, user_context)
+        response = alert_client.get_details("alert_id")
+        observation = response["alerts"][0]["observations"][0]
+        assert isinstance(dict.get(observation, "data"), str)
+        assert observation["data"]["example_key"] == "example_string_value"
+        assert dict.get(observation, "data")["example_key"] == "example_string_value"
+
+    def test_get_details_response_text_includes_decoded_observation_data(
+        self, mocker, mock_session, user_context
+    ):
+        requests_response = mocker.MagicMock(spec=Response)
+        requests_response.text = TEST_PARSEABLE_ALERT_DETAIL_RESPONSE
+        mock_session.post.return_value = Py42Response(requests_response)
+        alert_client = AlertClient(mock_session, user_context)
+        response = alert_client.get_details("alert_id")
+        observation = json.loads(response.text)["alerts"][0]["observations"][0]
+        assert observation["data"]["example_key"] == "example_string_value"
+
     def test_resolve_when_not_given_tenant_id_posts_expected_data(
         self, mock_session, user_context, successful_post
     ):
@@ -364,3 +475,144 @@ class TestAlertClient(object):
         mock_session.post.assert_called_once_with(
             "/svc/api/v1/rules/query-rule-metadata", data=json.dumps(data)
         )
+
+    def test_search_all_yields_alerts_of_every_page_in_order(
+        self, mocker, user_context
+    ):
+        server = StandInAlertServer(mocker, 25)
+        alert_client = AlertClient(server, user_context)
+        query = AlertQuery(AlertState.eq("OPEN"))
+        query.page_size = 10
+        alerts = list(alert_client.search_all(query, max_workers=2))
+        assert get_ids(alerts) == ["alert-{}".format(i) for i in range(25, 0, -1)]
+        assert sorted(search["pgNum"] for search in server.searches) == [0, 1, 2]
+
+    def test_search_all_when_last_page_is_full_stops_at_empty_page(
+        self, mocker, user_context
+    ):
+        server = StandInAlertServer(mocker, 20)
+        alert_client = AlertClient(server, user_context)
+        query = AlertQuery(AlertState.eq("OPEN"))
+        query.page_size = 10
+        assert len(list(alert_client.search_all(query))) == 20
+        assert len(server.searches) == 3
+
+    def test_search_all_when_alerts_are_created_while_paging_does_not_skip_or_repeat(
+        self, mocker, user_context
+    ):
+        def create_alerts_after_first_search(server, search_count):
+            if search_count == 1:
+                for number in range(26, 31):
+                    server.add_alert(number)
+
+        server = StandInAlertServer(
+            mocker, 25, on_search=create_alerts_after_first_search
+        )
+        alert_client = AlertClient(server, user_context)
+        query = AlertQuery(AlertState.eq("OPEN"))
+        query.page_size = 10
+        alerts = list(alert_client.search_all(query))
+        assert get_ids(alerts) == ["alert-{}".format(i) for i in range(25, 0, -1)]
+        cutoff = server.searches[1]["groups"][-1]["filters"][0]
+        assert cutoff == {
+            "operator": "ON_OR_BEFORE",
+            "term": "createdAt",
+            "value": "000025",
+        }
+
+    def test_search_all_with_any_query_yields_each_alert_once(
+        self, mocker, user_context
+    ):
+        def create_alerts_after_first_search(server, search_count):
+            if search_count == 1:
+                for number in range(26, 31):
+                    server.add_alert(number)
+
+        server = StandInAlertServer(
+            mocker, 25, on_search=create_alerts_after_first_search
+        )
+        alert_client = AlertClient(server, user_context)
+        query = AlertQuery.any(AlertState.eq("OPEN"), AlertState.eq("PENDING"))
+        query.page_size = 10
+        alerts = list(alert_client.search_all(query, max_workers=1))
+        assert get_ids(alerts)[:25] == ["alert-{}".format(i) for i in range(25, 0, -1)]
+        assert len(set(get_ids(alerts))) == len(alerts)
+
+    def test_bulk_resolve_posts_batches_and_reports_each_id(
+        self, mocker, mock_session, user_context, successful_response
+    ):
+        mock_session.post.return_value = successful_response
+        alert_client = AlertClient(mock_session, user_context)
+        alert_client.STATE_CHANGE_BATCH_SIZE = 2
+        outcomes = alert_client.bulk_resolve(["A", "B", "C", "A"], reason="done")
+        posted = [
+            json.loads(call[1]["data"]) for call in mock_session.post.call_args_list
+        ]
+        assert sorted(data["alertIds"] for data in posted) == [["A", "B"], ["C"]]
+        assert all(data["reason"] == "done" for data in posted)
+        assert mock_session.post.call_args[0][0] == "/svc/api/v1/resolve-alert"
+        assert list(outcomes.items()) == [("A", None), ("B", None), ("C", None)]
+
+    def test_bulk_reopen_reports_ids_of_failed_batches_without_failing_others(
+        self, mocker, mock_session, user_context, successful_response
+    ):
+        def post(uri, data=None):
+            if "B" in json.loads(data)["alertIds"]:
+                raise create_http_error(mocker, Py42BadRequestError, 400)
+            return successful_response
+
+        mock_session.post.side_effect = post
+        alert_client = AlertClient(mock_session, user_context)
+        alert_client.STATE_CHANGE_BATCH_SIZE = 1
+        outcomes = alert_client.bulk_reopen(["A", "B", "C"])
+        assert mock_session.post.call_args[0][0] == "/svc/api/v1/reopen-alert"
+        assert mock_session.post.call_count == 3
+        assert outcomes["A"] is None and outcomes["C"] is None
+        assert outcomes["B"].startswith("Failure in HTTP call")
+
+    def test_bulk_resolve_retries_batches_that_fail_with_server_errors(
+        self, mocker, mock_session, user_context, successful_response
+    ):
+        sleep = mocker.patch("time.sleep")
+        mock_session.post.side_effect = [
+            create_http_error(mocker, Py42InternalServerError, 500),
+            create_http_error(mocker, Py42BadRequestError, 429),
+            successful_response,
+        ]
+        alert_client = AlertClient(mock_session, user_context)
+        outcomes = alert_client.bulk_resolve(["A"])
+        assert outcomes == {"A": None}
+        assert [call[0][0] for call in sleep.call_args_list] == [0.5, 1.0]
+
+    def test_bulk_resolve_when_retries_run_out_reports_error(
+        self, mocker, mock_session, user_context
+    ):
+        mocker.patch("time.sleep")
+        mock_session.post.side_effect = create_http_error(
+            mocker, Py42InternalServerError, 503
+        )
+        alert_client = AlertClient(mock_session, user_context)
+        outcomes = alert_client.bulk_resolve(["A"])
+        assert mock_session.post.call_count == AlertClient.STATE_CHANGE_MAX_RETRIES + 1
+        assert outcomes["A"] is not None
+
+    def test_bulk_resolve_when_connection_fails_retries_and_reports_error_of_that_batch(
+        self, mocker, mock_session, user_context, successful_response
+    ):
+        mocker.patch("time.sleep")
+
+        def post(uri, data=None):
+            if "B" in json.loads(data)["alertIds"]:
+                raise ConnectionError("Connection reset")
+            return successful_response
+
+        mock_session.post.side_effect = post
+        alert_client = AlertClient(mock_session, user_context)
+        alert_client.STATE_CHANGE_BATCH_SIZE = 1
+        outcomes = alert_client.bulk_resolve(["A", "B", "C"])
+        assert mock_session.post.call_count == AlertClient.STATE_CHANGE_MAX_RETRIES + 3
+        assert list(outcomes.items()) == [
+            ("A", None),
+            ("B", "Connection reset"),
+            ("C", None),
+        ]
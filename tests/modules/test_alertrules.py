@@ -1,3 +1,5 @@
+import json
+
 import pytest
 from requests import HTTPError
 from requests import Response
@@ -25,6 +27,43 @@ TEST_SYSTEM_RULE_RESPONSE = {
     ]
 }
 
+TEST_RULES_RESPONSE = {
+    "ruleMetadata": [
+        {
+            "id": "id-1",
+            "observerRuleId": "observer-id-1",
+            "type": "FED_ENDPOINT_EXFILTRATION",
+            "name": "Rule One",
+            "isSystem": False,
+            "ruleSource": "Alerting",
+        },
+        {
+            "id": "id-2",
+            "observerRuleId": "observer-id-2",
+            "type": "FED_CLOUD_SHARE_PERMISSIONS",
+            "name": "rule one",
+            "isSystem": False,
+            "ruleSource": "Alerting",
+        },
+        {
+            "id": "id-3",
+            "observerRuleId": TEST_RULE_ID,
+            "type": "FED_FILE_TYPE_MISMATCH",
+            "name": "Departing",
+            "isSystem": True,
+            "ruleSource": "NOTVALID",
+        },
+        {
+            "id": "id-4",
+            "observerRuleId": "observer-id-4",
+            "type": "NOT_A_RULE_TYPE",
+            "name": "Other",
+            "isSystem": False,
+            "ruleSource": "Alerting",
+        },
+    ]
+}
+
 
 @pytest.fixture
 def mock_microservice_client_factory(mocker):
@@ -42,10 +81,23 @@ def mock_alerts_client(mocker):
 
 
 @pytest.fixture
-def mock_alerts_client_system_rule(mocker, mock_alerts_client):
+def mock_alerts_client_system_rule(mocker, mock_alerts_client, py42_response):
     response = mocker.MagicMock(spec=Py42Response)
     response.text = TEST_SYSTEM_RULE_RESPONSE
     mock_alerts_client.get_rule_by_observer_id.return_value = response
+    py42_response.text = json.dumps(TEST_SYSTEM_RULE_RESPONSE)
+    mock_alerts_client.get_all_rules.side_effect = lambda **kwargs: iter(
+        [py42_response]
+    )
+    return mock_alerts_client
+
+
+@pytest.fixture
+def mock_alerts_client_with_rules(mock_alerts_client, py42_response):
+    py42_response.text = json.dumps(TEST_RULES_RESPONSE)
+    mock_alerts_client.get_all_rules.side_effect = lambda **kwargs: iter(
+        [py42_response]
+    )
     return mock_alerts_client
 
 
@@ -87,7 +139,7 @@ class TestAlertRulesModules(object):
         )
         alert_rules_module = AlertRulesModule(mock_microservice_client_factory)
         with pytest.raises(Py42InvalidRuleOperationError) as err:
-            alert_rules_module.add_user(self._rule_id, self._rule_id)
+            alert_rules_module.add_user(TEST_RULE_ID, self._user_id)
 
         assert (
             "Only alert rules with a source of 'Alerting' can be targeted by this command."
@@ -159,3 +211,232 @@ class TestAlertRulesModules(object):
         mock_alerts_client.get_rules_page.assert_called_once_with(
             sort_key="key", sort_direction="dir", page_num=70, page_size=700
         )
+
+    def test_alert_rules_module_get_cached_by_id_returns_expected_rule(
+        self, mock_microservice_client_factory, mock_alerts_client_with_rules
+    ):
+        mock_microservice_client_factory.get_alerts_client.return_value = (
+            mock_alerts_client_with_rules
+        )
+        alert_rules_module = AlertRulesModule(mock_microservice_client_factory)
+        assert alert_rules_module.get_cached_by_id("id-2")["name"] == "rule one"
+        assert alert_rules_module.get_cached_by_id("not-a-rule") is None
+
+    def test_alert_rules_module_get_cached_by_observer_id_returns_expected_rule(
+        self, mock_microservice_client_factory, mock_alerts_client_with_rules
+    ):
+        mock_microservice_client_factory.get_alerts_client.return_value = (
+            mock_alerts_client_with_rules
+        )
+        alert_rules_module = AlertRulesModule(mock_microservice_client_factory)
+        rule = alert_rules_module.get_cached_by_observer_id("observer-id-1")
+        assert rule["id"] == "id-1"
+
+    def test_alert_rules_module_get_cached_by_name_ignores_case(
+        self, mock_microservice_client_factory, mock_alerts_client_with_rules
+    ):
+        mock_microservice_client_factory.get_alerts_client.return_value = (
+            mock_alerts_client_with_rules
+        )
+        alert_rules_module = AlertRulesModule(mock_microservice_client_factory)
+        rules = alert_rules_module.get_cached_by_name("RULE ONE")
+        assert [rule["id"] for rule in rules] == ["id-1", "id-2"]
+
+    def test_alert_rules_module_cached_lookups_load_rules_once(
+        self, mock_microservice_client_factory, mock_alerts_client_with_rules
+    ):
+        mock_microservice_client_factory.get_alerts_client.return_value = (
+            mock_alerts_client_with_rules
+        )
+        alert_rules_module = AlertRulesModule(mock_microservice_client_factory)
+        alert_rules_module.get_cached_by_id("id-1")
+        alert_rules_module.get_cached_by_observer_id("observer-id-2")
+        alert_rules_module.get_cached_by_name("Departing")
+        assert mock_alerts_client_with_rules.get_all_rules.call_count == 1
+
+    def test_alert_rules_module_cached_lookups_load_rules_again_when_expired(
+        self, mocker, mock_microservice_client_factory, mock_alerts_client_with_rules
+    ):
+        mock_microservice_client_factory.get_alerts_client.return_value = (
+            mock_alerts_client_with_rules
+        )
+        mock_time = mocker.patch("py42._internal.alert_rule_index.time.time")
+        mock_time.return_value = 1000
+        alert_rules_module = AlertRulesModule(mock_microservice_client_factory)
+        alert_rules_module.get_cached_by_id("id-1")
+        mock_time.return_value = 1000 + AlertRulesModule.RULE_CACHE_TTL_SECONDS
+        alert_rules_module.get_cached_by_id("id-1")
+        assert mock_alerts_client_with_rules.get_all_rules.call_count == 2
+
+    def test_alert_rules_module_refresh_cache_loads_rules_again(
+        self, mock_microservice_client_factory, mock_alerts_client_with_rules
+    ):
+        mock_microservice_client_factory.get_alerts_client.return_value = (
+            mock_alerts_client_with_rules
+        )
+        alert_rules_module = AlertRulesModule(mock_microservice_client_factory)
+        alert_rules_module.get_cached_by_id("id-1")
+        alert_rules_module.refresh_cache()
+        alert_rules_module.get_cached_by_id("id-1")
+        assert mock_alerts_client_with_rules.get_all_rules.call_count == 2
+
+    def test_alert_rules_module_add_user_error_checks_system_rule_with_cached_rules(
+        self,
+        mocker,
+        mock_microservice_client_factory,
+        mock_alert_rules_client,
+        mock_alerts_client_with_rules,
+    ):
+        def add(*args, **kwargs):
+            base_err = mocker.MagicMock(spec=HTTPError)
+            base_err.response = mocker.MagicMock(spec=Response)
+            raise Py42InternalServerError(base_err)
+
+        mock_alert_rules_client.add_user.side_effect = add
+        mock_microservice_client_factory.get_alert_rules_client.return_value = (
+            mock_alert_rules_client
+        )
+        mock_microservice_client_factory.get_alerts_client.return_value = (
+            mock_alerts_client_with_rules
+        )
+        alert_rules_module = AlertRulesModule(mock_microservice_client_factory)
+        alert_rules_module.get_cached_by_id("id-1")
+        with pytest.raises(Py42InvalidRuleOperationError):
+            alert_rules_module.add_user(TEST_RULE_ID, self._user_id)
+        with pytest.raises(Py42InternalServerError):
+            alert_rules_module.add_user("observer-id-1", self._user_id)
+        assert mock_alerts_client_with_rules.get_all_rules.call_count == 1
+        assert not mock_alerts_client_with_rules.get_rule_by_observer_id.called
+
+    def test_alert_rules_module_calls_add_users_with_expected_value(
+        self, mock_microservice_client_factory, mock_alert_rules_client
+    ):
+        mock_microservice_client_factory.get_alert_rules_client.return_value = (
+            mock_alert_rules_client
+        )
+        alert_rules_module = AlertRulesModule(mock_microservice_client_factory)
+        alert_rules_module.add_users(self._rule_id, [self._user_id], max_workers=3)
+        mock_alert_rules_client.add_users.assert_called_once_with(
+            self._rule_id, [self._user_id], max_workers=3
+        )
+
+    def test_alert_rules_module_calls_remove_users_with_expected_value(
+        self, mock_microservice_client_factory, mock_alert_rules_client
+    ):
+        mock_microservice_client_factory.get_alert_rules_client.return_value = (
+            mock_alert_rules_client
+        )
+        alert_rules_module = AlertRulesModule(mock_microservice_client_factory)
+        alert_rules_module.remove_users(self._rule_id, [self._user_id])
+        mock_alert_rules_client.remove_users.assert_called_once_with(
+            self._rule_id, [self._user_id], max_workers=None
+        )
+
+    def test_alert_rules_module_calls_sync_users_with_expected_value(
+        self, mock_microservice_client_factory, mock_alert_rules_client
+    ):
+        mock_microservice_client_factory.get_alert_rules_client.return_value = (
+            mock_alert_rules_client
+        )
+        alert_rules_module = AlertRulesModule(mock_microservice_client_factory)
+        alert_rules_module.sync_users(self._rule_id, [self._user_id], [])
+        mock_alert_rules_client.sync_users.assert_called_once_with(
+            self._rule_id, [self._user_id], [], max_workers=None
+        )
+
+    @pytest.mark.parametrize(
+        "call",
+        [
+            lambda module: module.add_users(TEST_RULE_ID, ["user-1"]),
+            lambda module: module.remove_users(TEST_RULE_ID, ["user-1"]),
+            lambda module: module.sync_users(TEST_RULE_ID, ["user-1"], ["user-2"]),
+        ],
+        ids=["add_users", "remove_users", "sync_users"],
+    )
+    def test_alert_rules_module_bulk_user_changes_to_system_rule_raise_before_sending(
+        self,
+        call,
+        mock_microservice_client_factory,
+        mock_alert_rules_client,
+        mock_alerts_client_system_rule,
+    ):
+        mock_microservice_client_factory.get_alert_rules_client.return_value = (
+            mock_alert_rules_client
+        )
+        mock_microservice_client_factory.get_alerts_client.return_value = (
+            mock_alerts_client_system_rule
+        )
+        alert_rules_module = AlertRulesModule(mock_microservice_client_factory)
+        with pytest.raises(Py42InvalidRuleOperationError) as err:
+            call(alert_rules_module)
+        assert TEST_RULE_ID in str(err.value)
+        assert not mock_alert_rules_client.add_users.called
+        assert not mock_alert_rules_client.remove_users.called
+        assert not mock_alert_rules_client.sync_users.called
+
+    def test_alert_rules_module_get_all_details_gets_details_from_client_for_rule_type(
+        self,
+        mock_microservice_client_factory,
+        mock_alert_rules_client,
+        mock_alerts_client_with_rules,
+    ):
+        mock_microservice_client_factory.get_alert_rules_client.return_value = (
+            mock_alert_rules_client
+        )
+        mock_microservice_client_factory.get_alerts_client.return_value = (
+            mock_alerts_client_with_rules
+        )
+        alert_rules_module = AlertRulesModule(mock_microservice_client_factory)
+        details = alert_rules_module.get_all_details()
+
+        assert list(details) == ["observer-id-1", "observer-id-2", TEST_RULE_ID]
+        mock_alert_rules_client.exfiltration.get.assert_called_once_with(
+            "observer-id-1"
+        )
+        mock_alert_rules_client.cloudshare.get.assert_called_once_with("observer-id-2")
+        mock_alert_rules_client.filetypemismatch.get.assert_called_once_with(
+            TEST_RULE_ID
+        )
+        assert (
+            details["observer-id-1"]
+            == mock_alert_rules_client.exfiltration.get.return_value
+        )
+
+    def test_alert_rules_module_get_all_details_again_uses_cached_details(
+        self,
+        mock_microservice_client_factory,
+        mock_alert_rules_client,
+        mock_alerts_client_with_rules,
+    ):
+        mock_microservice_client_factory.get_alert_rules_client.return_value = (
+            mock_alert_rules_client
+        )
+        mock_microservice_client_factory.get_alerts_client.return_value = (
+            mock_alerts_client_with_rules
+        )
+        alert_rules_module = AlertRulesModule(mock_microservice_client_factory)
+        alert_rules_module.get_all_details()
+        details = alert_rules_module.get_all_details()
+
+        assert len(details) == 3
+        assert mock_alert_rules_client.exfiltration.get.call_count == 1
+        assert mock_alerts_client_with_rules.get_all_rules.call_count == 1
+
+    def test_alert_rules_module_get_all_details_after_refresh_cache_gets_details_again(
+        self,
+        mock_microservice_client_factory,
+        mock_alert_rules_client,
+        mock_alerts_client_with_rules,
+    ):
+        mock_microservice_client_factory.get_alert_rules_client.return_value = (
+            mock_alert_rules_client
+        )
+        mock_microservice_client_factory.get_alerts_client.return_value = (
+            mock_alerts_client_with_rules
+        )
+        alert_rules_module = AlertRulesModule(mock_microservice_client_factory)
+        alert_rules_module.get_all_details()
+        alert_rules_module.refresh_cache()
+        alert_rules_module.get_all_details()
+
+        assert mock_alert_rules_client.exfiltration.get.call_count == 2
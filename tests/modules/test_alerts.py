@@ -2,6 +2,7 @@ import pytest
 
 from py42._internal.client_factories import MicroserviceClientFactory
 from py42._internal.clients.alerts import AlertClient
+from py42.clients.file_event import FileEventClient
 from py42.modules.alertrules import AlertRulesModule
 from py42.modules.alerts import AlertsModule
 from py42.sdk.queries.fileevents.file_event_query import FileEventQuery
@@ -35,6 +36,21 @@ class TestAlertsModule(object):
         alert_module = AlertsModule(mock_microservice_client_factory)
         assert type(alert_module.rules) == AlertRulesModule
 
+    def test_alerts_module_calls_search_all_with_expected_value(
+        self,
+        mock_microservice_client_factory,
+        mock_alerts_client,
+        mock_file_event_query,
+    ):
+        mock_microservice_client_factory.get_alerts_client.return_value = (
+            mock_alerts_client
+        )
+        alert_module = AlertsModule(mock_microservice_client_factory)
+        alert_module.search_all(mock_file_event_query, max_workers=4)
+        mock_alerts_client.search_all.assert_called_once_with(
+            mock_file_event_query, max_workers=4
+        )
+
     def test_alerts_module_calls_search_with_expected_value(
         self,
         mock_microservice_client_factory,
@@ -83,3 +99,66 @@ class TestAlertsModule(object):
         alert_module = AlertsModule(mock_microservice_client_factory)
         alert_module.reopen(self._alert_ids)
         mock_alerts_client.reopen.assert_called_once_with(self._alert_ids, reason=None)
+
+    def test_alerts_module_calls_bulk_resolve_with_expected_value(
+        self, mock_microservice_client_factory, mock_alerts_client
+    ):
+        mock_microservice_client_factory.get_alerts_client.return_value = (
+            mock_alerts_client
+        )
+        alert_module = AlertsModule(mock_microservice_client_factory)
+        alert_module.bulk_resolve(self._alert_ids, reason="test")
+        mock_alerts_client.bulk_resolve.assert_called_once_with(
+            self._alert_ids, reason="test", max_workers=None
+        )
+
+    def test_alerts_module_calls_bulk_reopen_with_expected_value(
+        self, mock_microservice_client_factory, mock_alerts_client
+    ):
+        mock_microservice_client_factory.get_alerts_client.return_value = (
+            mock_alerts_client
+        )
+        alert_module = AlertsModule(mock_microservice_client_factory)
+        alert_module.bulk_reopen(self._alert_ids, max_workers=2)
+        mock_alerts_client.bulk_reopen.assert_called_once_with(
+            self._alert_ids, reason=None, max_workers=2
+        )
+
+    def test_create_collector_returns_collector_for_alerts_client(
+        self, mock_microservice_client_factory, mock_alerts_client
+    ):
+        mock_microservice_client_factory.get_alerts_client.return_value = (
+            mock_alerts_client
+        )
+        alert_module = AlertsModule(mock_microservice_client_factory)
+        collector = alert_module.create_collector()
+        mock_alerts_client.search_all.return_value = iter([])
+        assert list(collector.collect()) == []
+        assert mock_alerts_client.search_all.call_count == 1
+
+    def test_get_file_events_searches_file_events_of_alert_details(
+        self, mocker, mock_microservice_client_factory, mock_alerts_client
+    ):
+        mock_microservice_client_factory.get_alerts_client.return_value = (
+            mock_alerts_client
+        )
+        mock_file_event_client = mocker.MagicMock(spec=FileEventClient)
+        mock_microservice_client_factory.get_file_event_client.return_value = (
+            mock_file_event_client
+        )
+        mock_alerts_client.get_details.return_value = {
+            u"alerts": [
+                {
+                    u"id": u"test-id1",
+                    u"observations": [{u"data": {u"files": [{u"eventId": u"e-1"}]}}],
+                }
+            ]
+        }
+        event = {u"eventId": u"e-1"}
+        mock_file_event_client.search.return_value = {u"fileEvents": [event]}
+        alert_module = AlertsModule(mock_microservice_client_factory)
+        results = list(alert_module.get_file_events([u"test-id1"], max_workers=2))
+        assert results == [(u"test-id1", [event], None)]
+        mock_alerts_client.get_details.assert_called_once_with(
+            [u"test-id1"], max_workers=2
+        )
@@ -2,8 +2,12 @@ import pytest
 
 from py42._internal.archive_access import ArchiveAccessor
 from py42._internal.archive_access import ArchiveAccessorManager
+from py42._internal.archive_access import FileSelection
 from py42._internal.clients.archive import ArchiveClient
+from py42.clients.devices import DeviceClient
 from py42.modules.archive import ArchiveModule
+from py42.response import DownloadResult
+from py42.response import Py42Response
 
 
 @pytest.fixture
@@ -53,8 +57,97 @@ class TestArchiveModule(object):
             "encryption_key",
         )
         archive_accessor.stream_from_backup.assert_called_once_with(
-            ["path/to/first/file", "path/to/second/file"], file_size_calc_timeout=10
+            ["path/to/first/file", "path/to/second/file"],
+            file_size_calc_timeout=10,
+            restore_timeout=None,
+            progress_callback=None,
+        )
+
+    def test_restore_to_directory_restores_each_device_with_one_job(
+        self, mocker, tmpdir, archive_accessor_manager, archive_client, archive_accessor
+    ):
+        archive_accessor_manager.get_archive_accessor.return_value = archive_accessor
+        archive_accessor.storage_host_address = "https://node"
+        archive_accessor.create_file_selections.return_value = [
+            FileSelection({"type": "file", "path": "/a.txt"}, 1, 0, 1)
+        ]
+        response = mocker.MagicMock(spec=Py42Response)
+        response.download_to.return_value = DownloadResult(1, "md5", "sha256")
+        archive_accessor.stream_file_selections.return_value = response
+        archive = ArchiveModule(archive_accessor_manager, archive_client)
+        manifest = archive.restore_to_directory(
+            [("device_guid", "/a.txt"), ("device_guid", "/b.txt")],
+            str(tmpdir),
+            archive_password="password",
+        )
+        archive_accessor_manager.get_archive_accessor.assert_called_once_with(
+            "device_guid",
+            destination_guid=None,
+            private_password="password",
+            encryption_key=None,
+        )
+        archive_accessor.create_file_selections.assert_called_once_with(
+            ["/a.txt", "/b.txt"], file_size_calc_timeout=10
+        )
+        assert manifest[0]["file"] == str(tmpdir.join("device_guid", "a.txt"))
+        assert manifest[0]["md5"] == "md5"
+        assert tmpdir.join("manifest.json").check()
+
+    def test_find_in_backups_returns_matches_from_each_destination_of_users_devices(
+        self, mocker, archive_accessor_manager, archive_client, archive_accessor
+    ):
+        device_client = mocker.MagicMock(spec=DeviceClient)
+        device_client.get_all.return_value = [
+            {
+                "computers": [
+                    {
+                        "guid": "device_guid",
+                        "backupUsage": [{"targetComputerGuid": "dest"}],
+                    }
+                ]
+            }
+        ]
+        archive_accessor_manager.get_archive_accessor.return_value = archive_accessor
+        archive_accessor.find_files.return_value = [{"path": "/a.txt", "size": 1}]
+        archive = ArchiveModule(archive_accessor_manager, archive_client, device_client)
+        found = archive.find_in_backups("user_uid", "a.txt")
+        archive_accessor.find_files.assert_called_once_with(
+            "a.txt", file_size_calc_timeout=10
+        )
+        assert found == [
+            {
+                "deviceGuid": "device_guid",
+                "destinationGuid": "dest",
+                "path": "/a.txt",
+                "size": 1,
+            }
+        ]
+
+    def test_crawl_backup_crawls_archive_into_index_at_path(
+        self, tmpdir, archive_accessor_manager, archive_client, archive_accessor
+    ):
+        archive_accessor_manager.get_archive_accessor.return_value = archive_accessor
+        archive = ArchiveModule(archive_accessor_manager, archive_client)
+        index_path = str(tmpdir.join("index.db"))
+        index = archive.crawl_backup(
+            "device_guid", index_path, path="/Users", max_depth=2
+        )
+        archive_accessor_manager.get_archive_accessor.assert_called_once_with(
+            "device_guid",
+            destination_guid=None,
+            private_password=None,
+            encryption_key=None,
+        )
+        archive_accessor.crawl.assert_called_once_with(
+            index,
+            path="/Users",
+            max_depth=2,
+            max_workers=None,
+            max_requests_per_second=None,
+            incremental=True,
         )
+        assert index.find_by_prefix("/") == []
+        index.close()
 
     def test_get_backup_sets_calls_archive_client_get_backup_sets_with_expected_params(
         self, archive_accessor_manager, archive_client, archive_accessor
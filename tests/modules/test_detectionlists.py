@@ -2,6 +2,7 @@ import pytest
 
 from py42._internal.client_factories import MicroserviceClientFactory
 from py42._internal.clients.detection_list_user import DetectionListUserClient
+from py42.clients.detectionlists.departing_employee import DepartingEmployeeClient
 from py42.modules.detectionlists import DetectionListsModule
 from py42.modules.detectionlists import RiskTags
 
@@ -208,3 +209,22 @@ class TestDetectionListModule(object):
         module = DetectionListsModule(mock_microservice_client_factory)
         response = module.refresh_user_scim_attributes(TEST_USER_ID)
         assert response
+
+    def test_sync_compares_list_members_and_removes_users_not_wanted(
+        self, mocker, mock_microservice_client_factory, mock_detection_list_user_client
+    ):
+        departing_employee_client = mocker.MagicMock(spec=DepartingEmployeeClient)
+        departing_employee_client.get_all.return_value = iter(
+            [{"items": [{"userId": TEST_USER_ID, "departureDate": None}]}]
+        )
+        mock_microservice_client_factory.get_departing_employee_client.return_value = (
+            departing_employee_client
+        )
+        mock_microservice_client_factory.get_detection_list_user_client.return_value = (
+            mock_detection_list_user_client
+        )
+        module = DetectionListsModule(mock_microservice_client_factory)
+        outcomes = module.sync(departing_employees={})
+        assert outcomes == {(TEST_USER_ID, "remove_departing_employee"): None}
+        departing_employee_client.remove.assert_called_once_with(TEST_USER_ID)
+        assert not departing_employee_client.add_many.called
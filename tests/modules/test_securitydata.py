@@ -1,7 +1,9 @@
 import json
 
 import pytest
+from requests.exceptions import ConnectionError
 from requests.exceptions import HTTPError
+from requests.exceptions import Timeout
 
 from py42._internal.client_factories import MicroserviceClientFactory
 from py42._internal.clients.pds import PreservationDataServiceClient
@@ -14,6 +16,7 @@ from py42.clients.file_event import FileEventClient
 from py42.exceptions import Py42ChecksumNotFoundError
 from py42.exceptions import Py42Error
 from py42.exceptions import Py42HTTPError
+from py42.exceptions import Py42SecurityPlanConnectionError
 from py42.modules.securitydata import PlanStorageInfo
 from py42.modules.securitydata import SecurityModule
 from py42.response import Py42Response
@@ -417,6 +420,129 @@ class TestSecurityModule(object):
             storage_infos, "222222222222222222", "4", "41"
         ) or self._storage_info_contains(storage_infos, "222222222222222222", "5", "52")
 
+    @pytest.fixture
+    def failing_storage_client_factory(self, mocker, storage_client_factory):
+        def from_plan_info(plan_uid, destination_guid, **kwargs):
+            if destination_guid == "4":
+                raise Py42HTTPError(HTTPError())
+            return mocker.MagicMock(spec=StorageClient)
+
+        storage_client_factory.from_plan_info.side_effect = from_plan_info
+        return storage_client_factory
+
+    def test_get_security_plan_storage_info_when_one_destination_fails_returns_other_destination(
+        self,
+        security_client_one_plan_two_destinations,
+        failing_storage_client_factory,
+        microservice_client_factory,
+    ):
+        security_module = SecurityModule(
+            security_client_one_plan_two_destinations,
+            failing_storage_client_factory,
+            microservice_client_factory,
+        )
+        storage_infos = security_module.get_security_plan_storage_info_list("foo")
+        assert len(storage_infos) == 1
+        assert self._storage_info_contains(
+            storage_infos, "111111111111111111", "5", "51"
+        )
+
+    def test_get_security_plan_storage_info_when_one_destination_unreachable_returns_other_destination(
+        self,
+        mocker,
+        security_client_one_plan_two_destinations,
+        storage_client_factory,
+        microservice_client_factory,
+    ):
+        def from_plan_info(plan_uid, destination_guid, **kwargs):
+            if destination_guid == "4":
+                raise ConnectionError()
+            return mocker.MagicMock(spec=StorageClient)
+
+        storage_client_factory.from_plan_info.side_effect = from_plan_info
+        security_module = SecurityModule(
+            security_client_one_plan_two_destinations,
+            storage_client_factory,
+            microservice_client_factory,
+        )
+        storage_infos = security_module.get_security_plan_storage_info_list("foo")
+        assert len(storage_infos) == 1
+        assert self._storage_info_contains(
+            storage_infos, "111111111111111111", "5", "51"
+        )
+
+    def test_get_security_plan_storage_info_probes_destinations_with_timeout(
+        self,
+        security_client_one_plan_two_destinations,
+        storage_client_factory,
+        microservice_client_factory,
+    ):
+        security_module = SecurityModule(
+            security_client_one_plan_two_destinations,
+            storage_client_factory,
+            microservice_client_factory,
+        )
+        security_module.get_security_plan_storage_info_list("foo")
+        timeout = SecurityModule.STORAGE_NODE_PROBE_TIMEOUT_SECONDS
+        for call in storage_client_factory.from_plan_info.call_args_list:
+            assert call[1]["timeout"] == timeout
+
+    def test_get_security_plan_storage_info_when_every_probe_times_out_logs_and_raises(
+        self,
+        mocker,
+        security_client_one_plan_two_destinations,
+        storage_client_factory,
+        microservice_client_factory,
+    ):
+        storage_client_factory.from_plan_info.side_effect = Timeout()
+        mock_logger = mocker.patch("py42.modules.securitydata.debug.logger")
+        security_module = SecurityModule(
+            security_client_one_plan_two_destinations,
+            storage_client_factory,
+            microservice_client_factory,
+        )
+        with pytest.raises(Py42SecurityPlanConnectionError):
+            security_module.get_security_plan_storage_info_list("foo")
+        assert "111111111111111111" in mock_logger.warning.call_args[0][0]
+
+    def test_get_security_plan_storage_info_when_called_twice_does_not_probe_destinations_again(
+        self,
+        security_client_one_plan_two_destinations,
+        failing_storage_client_factory,
+        microservice_client_factory,
+    ):
+        security_module = SecurityModule(
+            security_client_one_plan_two_destinations,
+            failing_storage_client_factory,
+            microservice_client_factory,
+        )
+        security_module.get_security_plan_storage_info_list("foo")
+        storage_infos = security_module.get_security_plan_storage_info_list("foo")
+        assert failing_storage_client_factory.from_plan_info.call_count == 2
+        assert self._storage_info_contains(
+            storage_infos, "111111111111111111", "5", "51"
+        )
+
+    def test_get_security_plan_storage_info_when_cached_info_expired_probes_destinations_again(
+        self,
+        mocker,
+        security_client_one_plan_two_destinations,
+        failing_storage_client_factory,
+        microservice_client_factory,
+    ):
+        mock_time = mocker.patch("py42.modules.securitydata.time")
+        mock_time.time.return_value = 1000
+        security_module = SecurityModule(
+            security_client_one_plan_two_destinations,
+            failing_storage_client_factory,
+            microservice_client_factory,
+        )
+        security_module.get_security_plan_storage_info_list("foo")
+        ttl = SecurityModule.STORAGE_INFO_CACHE_TTL_SECONDS
+        mock_time.time.return_value = 1000 + ttl
+        security_module.get_security_plan_storage_info_list("foo")
+        assert failing_storage_client_factory.from_plan_info.call_count == 3
+
     def test_get_all_user_security_events_calls_security_client_with_expected_params(
         self,
         mocker,
@@ -650,6 +776,329 @@ class TestSecurityModule(object):
             pass
         assert mock_storage_security_client.get_plan_security_events.call_count == 4
 
+    def test_get_all_plans_security_events_uses_cursor_of_each_plan(
+        self,
+        mocker,
+        security_client,
+        storage_client_factory,
+        microservice_client_factory,
+    ):
+        mock_storage_client = mocker.MagicMock(spec=StorageClient)
+        mock_storage_security_client = mocker.MagicMock(spec=StorageSecurityClient)
+        mock_storage_client.securitydata = mock_storage_security_client
+        response = mocker.MagicMock(spec=Py42Response)
+        response.text = "{}"
+        mock_storage_security_client.get_plan_security_events.return_value = response
+        storage_client_factory.from_plan_info.return_value = mock_storage_client
+        security_module = SecurityModule(
+            security_client, storage_client_factory, microservice_client_factory
+        )
+        plans = [
+            PlanStorageInfo("111111111111111111", "41", "4"),
+            PlanStorageInfo("222222222222222222", "41", "4"),
+        ]
+        cursors = {"111111111111111111": "1:1"}
+        for _ in security_module.get_all_plans_security_events(plans, cursors=cursors):
+            pass
+        calls = mock_storage_security_client.get_plan_security_events.call_args_list
+        cursors_used = {call[0][0]: call[1]["cursor"] for call in calls}
+        assert cursors_used == {"111111111111111111": "1:1", "222222222222222222": None}
+
+    def test_get_all_plans_security_events_returns_pages_tagged_with_plan_uid(
+        self,
+        mocker,
+        security_client,
+        storage_client_factory,
+        microservice_client_factory,
+    ):
+        mock_storage_client = mocker.MagicMock(spec=StorageClient)
+        mock_storage_security_client = mocker.MagicMock(spec=StorageSecurityClient)
+        mock_storage_client.securitydata = mock_storage_security_client
+
+        def get_plan_security_events(plan_uid, cursor=None, **kwargs):
+            response = mocker.MagicMock(spec=Py42Response)
+            if cursor:
+                response.text = "{}"
+            else:
+                response.text = '{{"cursor": "{}:1"}}'.format(plan_uid)
+            return response
+
+        mock_storage_security_client.get_plan_security_events.side_effect = (
+            get_plan_security_events
+        )
+        storage_client_factory.from_plan_info.return_value = mock_storage_client
+        security_module = SecurityModule(
+            security_client, storage_client_factory, microservice_client_factory
+        )
+        plans = [
+            PlanStorageInfo("111111111111111111", "41", "4"),
+            PlanStorageInfo("222222222222222222", "41", "4"),
+        ]
+        results = {
+            plan_uid: cursor
+            for plan_uid, _, cursor in security_module.get_all_plans_security_events(
+                plans
+            )
+        }
+        assert results == {
+            "111111111111111111": "111111111111111111:1",
+            "222222222222222222": "222222222222222222:1",
+        }
+
+    def test_get_all_user_plans_security_events_calls_security_client_for_each_plan(
+        self,
+        mocker,
+        security_client_two_plans_one_node,
+        storage_client_factory,
+        microservice_client_factory,
+    ):
+        mock_storage_client = mocker.MagicMock(spec=StorageClient)
+        mock_storage_security_client = mocker.MagicMock(spec=StorageSecurityClient)
+        mock_storage_client.securitydata = mock_storage_security_client
+        response = mocker.MagicMock(spec=Py42Response)
+        response.text = "{}"
+        mock_storage_security_client.get_plan_security_events.return_value = response
+        storage_client_factory.from_plan_info.return_value = mock_storage_client
+        security_module = SecurityModule(
+            security_client_two_plans_one_node,
+            storage_client_factory,
+            microservice_client_factory,
+        )
+        for _ in security_module.get_all_user_plans_security_events("foo"):
+            pass
+        assert mock_storage_security_client.get_plan_security_events.call_count == 2
+
+    def test_get_all_users_security_events_returns_pages_tagged_with_user_uid(
+        self,
+        mocker,
+        security_client_one_location,
+        storage_client_factory,
+        microservice_client_factory,
+    ):
+        mock_storage_client = mocker.MagicMock(spec=StorageClient)
+        mock_storage_security_client = mocker.MagicMock(spec=StorageSecurityClient)
+        mock_storage_client.securitydata = mock_storage_security_client
+        response1 = mocker.MagicMock(spec=Py42Response)
+        response1.text = '{"cursor": "1:1"}'
+        response2 = mocker.MagicMock(spec=Py42Response)
+        response2.text = "{}"
+
+        def get_plan_security_events(plan_uid, cursor=None, **kwargs):
+            return response2 if cursor else response1
+
+        mock_storage_security_client.get_plan_security_events.side_effect = (
+            get_plan_security_events
+        )
+        storage_client_factory.from_plan_info.return_value = mock_storage_client
+        security_module = SecurityModule(
+            security_client_one_location,
+            storage_client_factory,
+            microservice_client_factory,
+        )
+        results = list(
+            security_module.get_all_users_security_events(["foo", "bar", "foo"])
+        )
+        assert sorted(results, key=lambda result: result[0]) == [
+            ("bar", response1, "1:1"),
+            ("foo", response1, "1:1"),
+        ]
+
+    def test_get_all_users_security_events_creates_one_storage_client_per_node(
+        self,
+        mocker,
+        security_client_one_location,
+        storage_client_factory,
+        microservice_client_factory,
+    ):
+        mock_storage_client = mocker.MagicMock(spec=StorageClient)
+        mock_storage_security_client = mocker.MagicMock(spec=StorageSecurityClient)
+        mock_storage_client.securitydata = mock_storage_security_client
+        response = mocker.MagicMock(spec=Py42Response)
+        response.text = "{}"
+        mock_storage_security_client.get_plan_security_events.return_value = response
+        storage_client_factory.from_plan_info.return_value = mock_storage_client
+        security_module = SecurityModule(
+            security_client_one_location,
+            storage_client_factory,
+            microservice_client_factory,
+        )
+        user_uids = ["user{}".format(i) for i in range(20)]
+        for _ in security_module.get_all_users_security_events(user_uids):
+            pass
+        assert storage_client_factory.from_plan_info.call_count == 1
+        assert mock_storage_security_client.get_plan_security_events.call_count == 20
+
+    def test_get_all_users_security_events_finds_storage_nodes_without_more_workers(
+        self,
+        mocker,
+        security_client_two_plans_two_destinations,
+        storage_client_factory,
+        microservice_client_factory,
+    ):
+        mock_storage_client = mocker.MagicMock(spec=StorageClient)
+        mock_storage_security_client = mocker.MagicMock(spec=StorageSecurityClient)
+        mock_storage_client.securitydata = mock_storage_security_client
+        response = mocker.MagicMock(spec=Py42Response)
+        response.text = '{"cursor": "1:1"}'
+        empty_response = mocker.MagicMock(spec=Py42Response)
+        empty_response.text = "{}"
+
+        def get_plan_security_events(plan_uid, cursor=None, **kwargs):
+            return empty_response if cursor else response
+
+        mock_storage_security_client.get_plan_security_events.side_effect = (
+            get_plan_security_events
+        )
+        storage_client_factory.from_plan_info.return_value = mock_storage_client
+        map_concurrently = mocker.patch("py42.modules.securitydata.map_concurrently")
+        iter_completed = mocker.patch("py42.modules.securitydata.iter_completed")
+        security_module = SecurityModule(
+            security_client_two_plans_two_destinations,
+            storage_client_factory,
+            microservice_client_factory,
+        )
+        results = list(security_module.get_all_users_security_events(["foo"]))
+        assert results == [("foo", response, "1:1"), ("foo", response, "1:1")]
+        assert not map_concurrently.called
+        assert not iter_completed.called
+
+    def test_get_all_users_security_events_when_user_fails_logs_and_returns_other_users(
+        self,
+        mocker,
+        security_client_one_location,
+        storage_client_factory,
+        microservice_client_factory,
+    ):
+        mock_storage_client = mocker.MagicMock(spec=StorageClient)
+        mock_storage_security_client = mocker.MagicMock(spec=StorageSecurityClient)
+        mock_storage_client.securitydata = mock_storage_security_client
+        response = mocker.MagicMock(spec=Py42Response)
+        response.text = '{"cursor": "1:1"}'
+        empty_response = mocker.MagicMock(spec=Py42Response)
+        empty_response.text = "{}"
+
+        def get_plan_security_events(plan_uid, cursor=None, **kwargs):
+            return empty_response if cursor else response
+
+        mock_storage_security_client.get_plan_security_events.side_effect = (
+            get_plan_security_events
+        )
+        storage_client_factory.from_plan_info.return_value = mock_storage_client
+        locations_response = (
+            security_client_one_location.get_security_event_locations.return_value
+        )
+
+        def get_security_event_locations(user_uid):
+            if user_uid == "unreachable":
+                raise ConnectionError("Connection reset")
+            if user_uid == "failing":
+                raise Py42HTTPError(HTTPError())
+            return locations_response
+
+        security_client_one_location.get_security_event_locations.side_effect = (
+            get_security_event_locations
+        )
+        mock_logger = mocker.patch("py42.modules.securitydata.debug.logger")
+        security_module = SecurityModule(
+            security_client_one_location,
+            storage_client_factory,
+            microservice_client_factory,
+        )
+        results = list(
+            security_module.get_all_users_security_events(
+                ["unreachable", "foo", "failing"]
+            )
+        )
+        assert results == [("foo", response, "1:1")]
+        warnings = [call[0][0] for call in mock_logger.warning.call_args_list]
+        assert len(warnings) == 2
+        assert any("unreachable" in warning for warning in warnings)
+        assert any("failing" in warning for warning in warnings)
+
+    def test_get_user_security_event_summary_returns_counts_merged_across_plans(
+        self,
+        mocker,
+        security_client_two_plans_one_node,
+        storage_client_factory,
+        microservice_client_factory,
+    ):
+        mock_storage_client = mocker.MagicMock(spec=StorageClient)
+        mock_storage_security_client = mocker.MagicMock(spec=StorageSecurityClient)
+        mock_storage_client.securitydata = mock_storage_security_client
+
+        def get_plan_security_event_summary(plan_uid, **kwargs):
+            response = mocker.MagicMock(spec=Py42Response)
+            response.text = json.dumps(
+                {
+                    "summary": [
+                        {"eventType": "DEVICE_APPEARED", "count": 1},
+                        {"eventType": "RULE_MATCH", "count": 5},
+                    ]
+                }
+            )
+            return response
+
+        mock_storage_security_client.get_plan_security_event_summary.side_effect = (
+            get_plan_security_event_summary
+        )
+        storage_client_factory.from_plan_info.return_value = mock_storage_client
+        security_module = SecurityModule(
+            security_client_two_plans_one_node,
+            storage_client_factory,
+            microservice_client_factory,
+        )
+        event_counts = security_module.get_user_security_event_summary(
+            "foo", min_timestamp=1, max_timestamp=2
+        )
+        assert event_counts == {"DEVICE_APPEARED": 2, "RULE_MATCH": 10}
+        mock_storage_security_client.get_plan_security_event_summary.assert_any_call(
+            "111111111111111111", cursor=None, min_timestamp=1, max_timestamp=2
+        )
+
+    def test_get_user_security_event_summary_adds_counts_of_every_page(
+        self,
+        mocker,
+        security_client_one_location,
+        storage_client_factory,
+        microservice_client_factory,
+    ):
+        mock_storage_client = mocker.MagicMock(spec=StorageClient)
+        mock_storage_security_client = mocker.MagicMock(spec=StorageSecurityClient)
+        mock_storage_client.securitydata = mock_storage_security_client
+        pages = [
+            {"cursor": "1:1", "summary": [{"eventType": "FILE_OPENED", "count": 3}]},
+            {
+                "cursor": "1:2",
+                "summary": [
+                    {"eventType": "FILE_OPENED", "count": 2},
+                    {"eventType": "RULE_MATCH", "count": 1},
+                ],
+            },
+            {},
+        ]
+        responses = []
+        for page in pages:
+            response = mocker.MagicMock(spec=Py42Response)
+            response.text = json.dumps(page)
+            responses.append(response)
+        mock_storage_security_client.get_plan_security_event_summary.side_effect = (
+            responses
+        )
+        storage_client_factory.from_plan_info.return_value = mock_storage_client
+        security_module = SecurityModule(
+            security_client_one_location,
+            storage_client_factory,
+            microservice_client_factory,
+        )
+        assert security_module.get_user_security_event_summary("foo") == {
+            "FILE_OPENED": 5,
+            "RULE_MATCH": 1,
+        }
+        calls = (
+            mock_storage_security_client.get_plan_security_event_summary.call_args_list
+        )
+        assert [call[1]["cursor"] for call in calls] == [None, "1:1", "1:2"]
+
     # the order the items are iterated through is not deterministic in some versions of python,
     # so we simply test that the value returned is one of the _possible_ values.
     def _storage_info_contains(
@@ -1030,3 +1479,49 @@ class TestSecurityModule(object):
             security_module.stream_file_by_md5("md5hash")
 
         assert e.value.args[0] == PDS_EXCEPTION_MESSAGE.format("md5hash")
+
+    def test_stream_file_by_sha256_when_one_location_fails_returns_stream_from_other_location(
+        self,
+        mocker,
+        security_client,
+        storage_client_factory,
+        microservice_client_factory,
+        file_event_search,
+        file_location,
+        find_file_version,
+        file_download,
+    ):
+        security_module = SecurityModule(
+            security_client, storage_client_factory, microservice_client_factory
+        )
+        file_event_client = mocker.MagicMock(spec=FileEventClient)
+        file_event_client.search.return_value = file_event_search
+        file_event_client.get_file_location_detail_by_sha256.return_value = (
+            file_location
+        )
+        microservice_client_factory.get_file_event_client.return_value = (
+            file_event_client
+        )
+
+        def find_file_versions(md5_hash, sha256_hash, device_id, paths):
+            if device_id == "device1":
+                raise Py42HTTPError(HTTPError())
+            return find_file_version
+
+        pds_client = mocker.MagicMock(spec=PreservationDataServiceClient)
+        pds_client.find_file_versions.side_effect = find_file_versions
+        microservice_client_factory.get_preservation_data_service_client.return_value = (
+            pds_client
+        )
+
+        storage_node_client = mocker.MagicMock(spec=StoragePreservationDataClient)
+        storage_node_client.get_download_token.return_value = file_download
+        storage_node_client.get_file.return_value = b"stream"
+        microservice_client_factory.create_storage_preservation_client.return_value = (
+            storage_node_client
+        )
+
+        response = security_module.stream_file_by_sha256("shahash")
+        assert response == b"stream"
+        assert pds_client.find_file_versions.call_count == 2
+        assert storage_node_client.get_file.call_count == 1
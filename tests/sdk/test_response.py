@@ -1,5 +1,12 @@
+import hashlib
+import io
+import zipfile
+
 import pytest
+from requests import Request
 from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.exceptions import ProtocolError
 
 from py42.exceptions import Py42Error
 from py42.response import Py42Response
@@ -14,6 +21,39 @@ JSON_DICT_NO_DATA_NODE = '{"item_list_key": {"foo": "foo_val", "bar": "bar_val"}
 
 PLAIN_TEXT = "TEST_PLAIN_TEXT"
 
+FILE_CONTENT = b"0123456789" * 100
+
+
+def create_stream_response(raw, status_code=200, headers=None):
+    response = Response()
+    response.status_code = status_code
+    response.raw = raw
+    response.headers.update(headers or {})
+    response.request = Request(u"GET", u"https://example.com/file").prepare()
+    return response
+
+
+def create_partial_response(offset):
+    content_range = u"bytes {}-{}/{}".format(
+        offset, len(FILE_CONTENT) - 1, len(FILE_CONTENT)
+    )
+    return create_stream_response(
+        io.BytesIO(FILE_CONTENT[offset:]),
+        status_code=206,
+        headers={u"Content-Range": content_range},
+    )
+
+
+class InterruptedStream(io.BytesIO):
+    def __init__(self, content, fail_after):
+        super(InterruptedStream, self).__init__(content)
+        self._fail_after = fail_after
+
+    def readinto(self, buffer):
+        if self.tell() >= self._fail_after:
+            raise ProtocolError(u"Connection broken")
+        return super(InterruptedStream, self).readinto(buffer)
+
 
 class TestPy42Response(object):
     @pytest.fixture
@@ -212,3 +252,179 @@ class TestPy42Response(object):
     def test_data_no_data_node_returns_dict_keys(self, mock_response_dict_no_data_node):
         response = Py42Response(mock_response_dict_no_data_node)
         assert type(response.data["item_list_key"]) == dict
+
+
+class TestPy42ResponseDownloadTo(object):
+    @pytest.fixture
+    def ranged_headers(self):
+        return {
+            u"Content-Length": str(len(FILE_CONTENT)),
+            u"Accept-Ranges": u"bytes",
+            u"ETag": u'"v1"',
+        }
+
+    @pytest.fixture
+    def adapter(self, mocker):
+        return mocker.MagicMock(spec=HTTPAdapter)
+
+    def test_download_to_writes_content_to_file_object(self):
+        response = Py42Response(create_stream_response(io.BytesIO(FILE_CONTENT)))
+        file_obj = io.BytesIO()
+        response.download_to(file_obj, chunk_size=64)
+        assert file_obj.getvalue() == FILE_CONTENT
+
+    def test_download_to_returns_size_and_hashes(self):
+        response = Py42Response(create_stream_response(io.BytesIO(FILE_CONTENT)))
+        result = response.download_to(io.BytesIO(), chunk_size=64)
+        assert result.size == len(FILE_CONTENT)
+        assert result.md5 == hashlib.md5(FILE_CONTENT).hexdigest()
+        assert result.sha256 == hashlib.sha256(FILE_CONTENT).hexdigest()
+
+    def test_download_to_writes_content_to_path(self, tmpdir):
+        path = str(tmpdir.join(u"file"))
+        response = Py42Response(create_stream_response(io.BytesIO(FILE_CONTENT)))
+        response.download_to(path)
+        with open(path, u"rb") as file_obj:
+            assert file_obj.read() == FILE_CONTENT
+
+    def test_download_to_calls_progress_callback_with_bytes_downloaded_and_total(
+        self, ranged_headers
+    ):
+        progress = []
+        raw = io.BytesIO(FILE_CONTENT)
+        response = Py42Response(create_stream_response(raw, headers=ranged_headers))
+        response.download_to(
+            io.BytesIO(),
+            chunk_size=400,
+            progress_callback=lambda done, total: progress.append((done, total)),
+        )
+        assert progress == [(400, 1000), (800, 1000), (1000, 1000)]
+
+    def test_download_to_when_interrupted_resumes_from_last_byte_written(
+        self, adapter, ranged_headers
+    ):
+        raw = InterruptedStream(FILE_CONTENT, fail_after=300)
+        response = create_stream_response(raw, headers=ranged_headers)
+        response.connection = adapter
+        adapter.send.return_value = create_partial_response(300)
+        file_obj = io.BytesIO()
+        result = Py42Response(response).download_to(file_obj, chunk_size=100)
+        assert file_obj.getvalue() == FILE_CONTENT
+        assert result.sha256 == hashlib.sha256(FILE_CONTENT).hexdigest()
+        request = adapter.send.call_args[0][0]
+        assert request.headers[u"Range"] == u"bytes=300-"
+        assert request.headers[u"If-Range"] == u'"v1"'
+
+    def test_download_to_when_interrupted_and_ranges_not_supported_raises(self):
+        raw = InterruptedStream(FILE_CONTENT, fail_after=300)
+        response = Py42Response(create_stream_response(raw))
+        with pytest.raises(ProtocolError):
+            response.download_to(io.BytesIO(), chunk_size=100)
+
+    def test_download_to_when_partial_file_exists_downloads_remaining_bytes(
+        self, tmpdir, adapter, ranged_headers
+    ):
+        path = str(tmpdir.join(u"file"))
+        with open(path, u"wb") as file_obj:
+            file_obj.write(FILE_CONTENT[:600])
+        response = create_stream_response(
+            io.BytesIO(FILE_CONTENT), headers=ranged_headers
+        )
+        response.connection = adapter
+        adapter.send.return_value = create_partial_response(600)
+        result = Py42Response(response).download_to(path, resume=True)
+        with open(path, u"rb") as file_obj:
+            assert file_obj.read() == FILE_CONTENT
+        assert result.size == len(FILE_CONTENT)
+        assert result.md5 == hashlib.md5(FILE_CONTENT).hexdigest()
+
+    def test_download_to_when_partial_file_exists_and_server_sends_whole_file_overwrites_file(
+        self, tmpdir, adapter, ranged_headers
+    ):
+        path = str(tmpdir.join(u"file"))
+        with open(path, u"wb") as file_obj:
+            file_obj.write(b"stale")
+        response = create_stream_response(
+            io.BytesIO(FILE_CONTENT), headers=ranged_headers
+        )
+        response.connection = adapter
+        adapter.send.return_value = create_stream_response(io.BytesIO(FILE_CONTENT))
+        Py42Response(response).download_to(path, resume=True)
+        with open(path, u"rb") as file_obj:
+            assert file_obj.read() == FILE_CONTENT
+
+    def test_download_to_when_partial_file_exists_and_resume_not_set_overwrites_file(
+        self, tmpdir, adapter, ranged_headers
+    ):
+        path = str(tmpdir.join(u"file"))
+        with open(path, u"wb") as file_obj:
+            file_obj.write(b"stale")
+        response = create_stream_response(
+            io.BytesIO(FILE_CONTENT), headers=ranged_headers
+        )
+        response.connection = adapter
+        Py42Response(response).download_to(path)
+        with open(path, u"rb") as file_obj:
+            assert file_obj.read() == FILE_CONTENT
+        assert not adapter.send.call_count
+
+    def test_download_to_when_partial_response_starts_at_wrong_offset_downloads_whole_file(
+        self, tmpdir, adapter, ranged_headers
+    ):
+        path = str(tmpdir.join(u"file"))
+        with open(path, u"wb") as file_obj:
+            file_obj.write(FILE_CONTENT[:600])
+        response = create_stream_response(
+            io.BytesIO(FILE_CONTENT), headers=ranged_headers
+        )
+        response.connection = adapter
+        adapter.send.side_effect = [
+            create_partial_response(500),
+            create_stream_response(io.BytesIO(FILE_CONTENT)),
+        ]
+        result = Py42Response(response).download_to(path, resume=True)
+        with open(path, u"rb") as file_obj:
+            assert file_obj.read() == FILE_CONTENT
+        assert result.size == len(FILE_CONTENT)
+        request = adapter.send.call_args[0][0]
+        assert u"Range" not in request.headers
+        assert u"If-Range" not in request.headers
+
+
+def create_zip_stream_response():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, u"w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr(u"Users/qa/a.txt", FILE_CONTENT)
+        zip_file.writestr(u"Users/qa/b.txt", b"second file")
+    return create_stream_response(io.BytesIO(buffer.getvalue()))
+
+
+class TestPy42ResponseZipEntries(object):
+    def test_iter_zip_entries_yields_each_file_with_its_content(self):
+        response = Py42Response(create_zip_stream_response())
+        actual = [
+            (path, entry.read())
+            for path, entry in response.iter_zip_entries(chunk_size=16)
+        ]
+        assert actual == [
+            (u"Users/qa/a.txt", FILE_CONTENT),
+            (u"Users/qa/b.txt", b"second file"),
+        ]
+
+    def test_iter_zip_entries_with_entry_filter_skips_filtered_files(self):
+        response = Py42Response(create_zip_stream_response())
+        entries = response.iter_zip_entries(
+            entry_filter=lambda path: path.endswith(u"b.txt")
+        )
+        assert [path for path, _ in entries] == [u"Users/qa/b.txt"]
+
+    def test_extract_zip_to_writes_files_and_returns_results(self, tmpdir):
+        response = Py42Response(create_zip_stream_response())
+        results = response.extract_zip_to(str(tmpdir))
+        assert tmpdir.join(u"Users", u"qa", u"a.txt").read_binary() == FILE_CONTENT
+        assert list(results) == [u"Users/qa/a.txt", u"Users/qa/b.txt"]
+        assert results[u"Users/qa/a.txt"].size == len(FILE_CONTENT)
+        assert (
+            results[u"Users/qa/b.txt"].sha256
+            == hashlib.sha256(b"second file").hexdigest()
+        )